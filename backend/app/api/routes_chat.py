@@ -1,61 +1,97 @@
 """Chat routes for QA and summarization."""
 
+from typing import List, Literal, Optional
+
+from app.config import settings
+from app.core.admission import BULK, llm_stage, rerank_stage, stage_stats
 from app.core.llm import llm_chat
 from app.core.prompts import build_rag_prompt, build_summary_prompt
+from app.core.tokens import count_tokens
+from app.core.tracing import annotate, span, span_timings, trace
+from app.ingestion.catalog import document_catalog
 from app.memory.conversation import conversation_memory
 from app.memory.query_rewriter import rewrite_query
-from app.models.api import ChatRequest, ChatResponse
-from app.retrieval.chunk_registry import get_chunks
+from app.models.api import ChatRequest, ChatResponse, SessionStats, StageStats
 from app.retrieval.citation_filter import filter_citations
+from app.retrieval.context_packer import join_chunks, pack_context
 from app.retrieval.retrieve import hybrid_graph_search
+from app.retrieval.sharding import all_chunks
 from fastapi import APIRouter
 
 router = APIRouter()
 
 
 @router.post("/ask", response_model=ChatResponse)
-def chat(request: ChatRequest) -> ChatResponse:
-    """Unified QA + Summarization endpoint with memory and query rewriting."""
+def chat(
+    request: ChatRequest,
+    debug: Optional[Literal["timings"]] = None,
+) -> ChatResponse:
+    """Unified QA + Summarization endpoint with memory and query rewriting.
+
+    With `debug=timings`, the response carries the request's span breakdown.
+    """
+    with trace(
+        "routes_chat",
+        query=request.query,
+        mode=request.mode,
+        top_k=request.top_k,
+        session_id=request.session_id,
+    ) as root:
+        response = _answer(request)
+
+    if debug == "timings":
+        response.timings = span_timings(root)
+    return response
+
+
+def _answer(request: ChatRequest) -> ChatResponse:
+    """Answer a QA or summarization request."""
     session_id = request.session_id
 
+    # Reject up front, before any work, if a stage the request needs is full
+    if request.mode == "summarize":
+        llm_stage.check(BULK)
+    else:
+        llm_stage.check()
+        rerank_stage.check()
+
     # SUMMARIZATION MODE
     if request.mode == "summarize":
-        chunks = get_chunks()
+        # Size pre-check from the document catalog, before touching chunks
+        estimated_tokens = document_catalog.total_tokens(request.doc_ids or None)
+        if (
+            estimated_tokens is not None
+            and estimated_tokens > settings.max_summary_tokens
+        ):
+            return _too_large_to_summarize(estimated_tokens)
+
+        # Only the selected documents' chunks are gathered
+        chunks = all_chunks(request.doc_ids or None)
 
         if not chunks:
             return ChatResponse(
-                answer="No documents available to summarize.",
+                answer=(
+                    "No content found for the selected documents."
+                    if request.doc_ids
+                    else "No documents available to summarize."
+                ),
                 citations=[],
             )
 
-        # Filter chunks by selected doc_ids if provided
-        if request.doc_ids:
-            chunks = [chunk for chunk in chunks if chunk.doc_id in request.doc_ids]
-
-            if not chunks:
-                return ChatResponse(
-                    answer="No content found for the selected documents.",
-                    citations=[],
-                )
-
-        # ADD TOKEN CHECK HERE
-        context = "\n\n".join(chunk.text for chunk in chunks)
-        estimated_tokens = len(context) // 4
+        # Chunk overlap is only sent once
+        with span("join_chunks", chunks=len(chunks)):
+            context = join_chunks(chunks)
 
-        from app.config import settings
-
-        if estimated_tokens > settings.max_summary_tokens:
-            return ChatResponse(
-                answer=f"The selected documents are too large \
-to summarize ({estimated_tokens:,} tokens). "
-                f"Maximum allowed: {settings.max_summary_tokens:,} tokens. "
-                f"Please select fewer documents or upload smaller PDFs.",
-                citations=[],
-            )
+        if estimated_tokens is None:
+            # Documents missing from the catalog: measure the context itself
+            estimated_tokens = count_tokens(context)
+            if estimated_tokens > settings.max_summary_tokens:
+                return _too_large_to_summarize(estimated_tokens)
 
         messages = build_summary_prompt(context)
 
-        answer = llm_chat(messages=messages)
+        # Summaries queue behind interactive questions
+        answer = llm_chat(messages=messages, priority=BULK)
 
         # Store conversation
         conversation_memory.add_user_message(session_id, request.query)
@@ -72,17 +108,24 @@ to summarize ({estimated_tokens:,} tokens). "
     history = conversation_memory.get_history(session_id)
 
     # 2. Rewrite query using history
-    rewritten_query = rewrite_query(
-        question=request.query,
-        history=history,
-    )
+    with span("rewrite_query", history=len(history)):
+        rewritten_query = rewrite_query(
+            question=request.query,
+            history=history,
+        )
 
     # 3. Retrieve documents
-    results = hybrid_graph_search(rewritten_query, request.top_k)
+    with span("retrieve", query=rewritten_query):
+        results = hybrid_graph_search(
+            rewritten_query,
+            request.top_k,
+            doc_ids=request.doc_ids or None,
+        )
 
     # Filter results by selected doc_ids if provided
     if request.doc_ids:
-        results = [r for r in results if r.chunk.doc_id in request.doc_ids]
+        selected = set(request.doc_ids)
+        results = [r for r in results if r.chunk.source_doc_ids() & selected]
 
     if not results:
         return ChatResponse(
@@ -90,10 +133,16 @@ to summarize ({estimated_tokens:,} tokens). "
             citations=[],
         )
 
-    # 4. Build prompt
-    context = "\n\n".join(sc.chunk.text for sc in results)
+    # 4. Build prompt (deduplicated, ordered and fit to the token budget)
+    with span("pack_context", candidates=len(results)):
+        packed = pack_context(results)
+        annotate(
+            tokens=packed.stats.tokens,
+            passages=packed.stats.passages,
+            dropped=packed.stats.dropped,
+        )
     messages = build_rag_prompt(
-        context=context,
+        context=packed.text,
         question=rewritten_query,
     )
 
@@ -103,7 +152,7 @@ to summarize ({estimated_tokens:,} tokens). "
     # 6. Filter citations
     citations = filter_citations(
         answer=answer,
-        chunks=results,
+        chunks=packed.chunks,
     )
 
     # 7. Store conversation
@@ -113,6 +162,18 @@ to summarize ({estimated_tokens:,} tokens). "
     return ChatResponse(
         answer=answer,
         citations=citations,
+        context=packed.stats,
+    )
+
+
+def _too_large_to_summarize(estimated_tokens: int) -> ChatResponse:
+    """Response for a summary request over the token limit."""
+    return ChatResponse(
+        answer=f"The selected documents are too large \
+to summarize ({estimated_tokens:,} tokens). "
+        f"Maximum allowed: {settings.max_summary_tokens:,} tokens. "
+        f"Please select fewer documents or upload smaller PDFs.",
+        citations=[],
     )
 
 
@@ -121,3 +182,15 @@ def clear_conversation(session_id: str = "default") -> dict:
     """Clear conversation history for a session."""
     conversation_memory.clear(session_id)
     return {"status": "success", "message": "Conversation cleared"}
+
+
+@router.get("/sessions", response_model=SessionStats)
+def session_stats() -> SessionStats:
+    """Live conversation sessions, their memory use and eviction counts."""
+    return conversation_memory.stats()
+
+
+@router.get("/admission", response_model=List[StageStats])
+def admission_stats() -> List[StageStats]:
+    """Per-stage concurrency, queue-wait times and rejections."""
+    return stage_stats()
@@ -1,40 +1,119 @@
 """Chat routes using LangChain retriever."""
 
+import asyncio
+import json
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Tuple
+from uuid import UUID
+
 from app.config import settings
+from app.core.admission import llm_stage, rerank_stage
+from app.core.llm import call_outcome, llm_guard, model_timeout
+from app.core.metrics import llm_seconds, llm_tokens
+from app.core.tokens import count_tokens
 from app.models.api import ChatRequest, ChatResponse
 from app.models.retrieval import ScoredChunk
 from app.retrieval.citation_filter import filter_citations
 from app.retrieval.langchain_retriever import AtlasGraphRetriever
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from langchain.chains import RetrievalQA
+from langchain.chains.question_answering.stuff_prompt import PROMPT
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import LLMResult
 from langchain_groq import ChatGroq
 
 router = APIRouter()
 
 
-@router.post("/ask/langchain", response_model=ChatResponse)
-def chat_langchain(request: ChatRequest) -> ChatResponse:
-    """LangChain-powered RAG endpoint with citation filtering."""
-    retriever = AtlasGraphRetriever(top_k=request.top_k)
+class _LLMMetrics(BaseCallbackHandler):
+    """Record LangChain model calls in the LLM latency and token metrics.
+
+    Streamed answers carry no token usage, so their tokens are counted
+    from the prompt and the generated text.
+    """
+
+    run_inline = True
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        # run_id -> (start, prompt tokens counted locally)
+        self._runs: Dict[UUID, Tuple[float, int]] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        prompt_tokens = sum(
+            count_tokens(str(message.content))
+            for batch in messages
+            for message in batch
+        )
+        self._runs[run_id] = (time.perf_counter(), prompt_tokens)
 
-    llm = ChatGroq(
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        if run_id not in self._runs:
+            return
+        start, prompt_tokens = self._runs.pop(run_id)
+        llm_seconds.labels(self.model, "ok").observe(time.perf_counter() - start)
+
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        completion_tokens = usage.get("completion_tokens")
+        if completion_tokens is None:
+            completion_tokens = sum(
+                count_tokens(generation.text)
+                for generations in response.generations
+                for generation in generations
+            )
+        else:
+            prompt_tokens = usage.get("prompt_tokens") or 0
+        llm_tokens.labels(self.model, "prompt").inc(prompt_tokens)
+        llm_tokens.labels(self.model, "completion").inc(completion_tokens)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        if run_id not in self._runs:
+            return
+        start, _ = self._runs.pop(run_id)
+        # Cancelled calls are not observed, as in `llm_chat`
+        if not isinstance(error, (asyncio.CancelledError, GeneratorExit)):
+            elapsed = time.perf_counter() - start
+            llm_seconds.labels(self.model, call_outcome(error)).observe(elapsed)
+
+
+@lru_cache(maxsize=1)
+def get_chat_model() -> ChatGroq:
+    """Return the shared LangChain chat model (and its HTTP clients)."""
+    return ChatGroq(
         api_key=settings.groq_api_key,
         model=settings.default_model,
+        base_url=settings.llm_base_url or None,
+        timeout=model_timeout(settings.default_model),
+        callbacks=[_LLMMetrics(settings.default_model)],
     )
 
-    qa_chain = RetrievalQA.from_chain_type(
-        llm=llm,
-        retriever=retriever,
+
+@lru_cache(maxsize=16)
+def get_qa_chain(top_k: int) -> RetrievalQA:
+    """Return the long-lived RetrievalQA chain for a given top_k."""
+    return RetrievalQA.from_chain_type(
+        llm=get_chat_model(),
+        retriever=AtlasGraphRetriever(top_k=top_k),
         return_source_documents=True,
     )
 
-    result = qa_chain.invoke({"query": request.query})
-
-    answer = result["result"]
-    source_docs = result.get("source_documents", [])
 
-    # Convert LangChain docs → ScoredChunk
-    scored_chunks = [
+def _to_scored_chunks(source_docs: list[Document]) -> list[ScoredChunk]:
+    """Convert LangChain docs → ScoredChunk."""
+    return [
         ScoredChunk(
             chunk=doc.metadata["chunk"],
             score=doc.metadata["score"],
@@ -42,7 +121,32 @@ def chat_langchain(request: ChatRequest) -> ChatResponse:
         for doc in source_docs
     ]
 
-    citations = filter_citations(
+
+def _admit() -> None:
+    """Reject up front if the rerank or LLM stage cannot take the request."""
+    llm_stage.check()
+    rerank_stage.check()
+
+
+@router.post("/ask/langchain", response_model=ChatResponse)
+async def chat_langchain(request: ChatRequest) -> ChatResponse:
+    """LangChain-powered RAG endpoint with citation filtering."""
+    _admit()
+    qa_chain = get_qa_chain(request.top_k)
+
+    # The chain's two steps run apart so only the model call holds an LLM slot
+    source_docs = await qa_chain.retriever.ainvoke(request.query)
+    async with llm_guard(settings.default_model):
+        result = await qa_chain.combine_documents_chain.ainvoke(
+            {"input_documents": source_docs, "question": request.query}
+        )
+
+    answer = result[qa_chain.combine_documents_chain.output_key]
+    scored_chunks = _to_scored_chunks(source_docs)
+
+    # Sentence embedding is CPU-bound: keep it off the event loop
+    citations = await asyncio.to_thread(
+        filter_citations,
         answer=answer,
         chunks=scored_chunks,
     )
@@ -51,3 +155,38 @@ def chat_langchain(request: ChatRequest) -> ChatResponse:
         answer=answer,
         citations=citations,
     )
+
+
+@router.post("/ask/langchain/stream")
+async def chat_langchain_stream(request: ChatRequest) -> StreamingResponse:
+    """Streaming variant of the LangChain endpoint.
+
+    Emits newline-delimited JSON: {"token": ...} events as the answer is
+    generated, then one {"citations": [...]} event.
+    """
+    _admit()
+    retriever = get_qa_chain(request.top_k).retriever
+    source_docs = await retriever.ainvoke(request.query)
+
+    async def events() -> AsyncIterator[str]:
+        prompt = PROMPT.format(
+            context="\n\n".join(doc.page_content for doc in source_docs),
+            question=request.query,
+        )
+
+        parts = []
+        async with llm_guard(settings.default_model):
+            async for message in get_chat_model().astream(prompt):
+                if message.content:
+                    parts.append(message.content)
+                    yield json.dumps({"token": message.content}) + "\n"
+
+        citations = await asyncio.to_thread(
+            filter_citations,
+            answer="".join(parts),
+            chunks=_to_scored_chunks(source_docs),
+        )
+        payload = [citation.model_dump() for citation in citations]
+        yield json.dumps({"citations": payload}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
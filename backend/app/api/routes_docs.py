@@ -1,13 +1,18 @@
 """Routes for uploading and processing documents."""
 
+import shutil
 import uuid
 from pathlib import Path
 from typing import Dict, List
 
 from app.config import settings
-from app.ingestion.pipeline import ingest_pdf
-from app.models.ingestion import Chunk
-from app.retrieval.chunk_registry import get_chunks
+from app.core.admission import OverloadedError
+from app.ingestion.catalog import document_catalog
+from app.ingestion.jobs import QueueFullError, ingestion_queue
+from app.ingestion.pipeline import remove_document as remove_document_chunks
+from app.models.ingestion import IngestionJob
+from app.models.retrieval import DocumentMemory, ShardStats
+from app.retrieval.sharding import all_memory_usage, shard_coordinator
 from fastapi import APIRouter, File, HTTPException, UploadFile
 
 router = APIRouter()
@@ -16,36 +21,81 @@ DOC_STORAGE = Path(settings.docs_path)
 DOC_STORAGE.mkdir(parents=True, exist_ok=True)
 
 
-@router.post("/upload", response_model=Dict[str, List[Chunk]])
+@router.post("/upload", response_model=Dict[str, IngestionJob])
 def upload_documents(
     files: List[UploadFile] = File(...),
-) -> Dict[str, List[Chunk]]:
-    """Upload one or more PDF documents.
+) -> Dict[str, IngestionJob]:
+    """Upload one or more PDF documents for background ingestion.
 
     Args:
         files: Uploaded PDF files.
 
     Returns:
-        A mapping of doc_id to raw extracted page segments.
+        A mapping of doc_id to its queued ingestion job.
     """
-    results: Dict[str, List[Chunk]] = {}
-
     for file in files:
         if not file.filename.lower().endswith(".pdf"):
             msg = "Only PDF files are supported."
             raise HTTPException(status_code=400, detail=msg)
 
-        # Generate a unique document ID
-        doc_id = str(uuid.uuid4())
-        save_path = DOC_STORAGE / f"{doc_id}.pdf"
+    doc_ids = [str(uuid.uuid4()) for _ in files]
+    saved: List[Path] = []
+
+    try:
+        # Reject before storing anything if the queue cannot take every file
+        ingestion_queue.check(len(files))
+
+        for doc_id, file in zip(doc_ids, files, strict=True):
+            save_path = DOC_STORAGE / f"{doc_id}.pdf"
+            saved.append(save_path)
+            # Stream to disk in fixed-size chunks instead of reading it whole
+            with save_path.open("wb") as f:
+                shutil.copyfileobj(file.file, f, settings.upload_chunk_bytes)
+
+        # All files are queued, or none
+        jobs = ingestion_queue.submit_many(
+            [
+                (doc_id, file.filename)
+                for doc_id, file in zip(doc_ids, files, strict=True)
+            ]
+        )
+    except OverloadedError:
+        # Answered with 429 + Retry-After
+        _discard(saved)
+        raise
+    except QueueFullError as e:
+        _discard(saved)
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
+    return dict(zip(doc_ids, jobs, strict=True))
+
+
+def _discard(paths: List[Path]) -> None:
+    """Delete stored uploads whose jobs were not queued."""
+    for path in paths:
+        path.unlink(missing_ok=True)
 
-        with save_path.open("wb") as f:
-            f.write(file.file.read())
 
-        chunks = ingest_pdf(save_path, doc_id)
-        results[doc_id] = chunks
+@router.get("/jobs", response_model=List[IngestionJob])
+def list_jobs() -> List[IngestionJob]:
+    """List ingestion jobs, newest first."""
+    return ingestion_queue.list_jobs()
 
-    return results
+
+@router.get("/jobs/{job_id}", response_model=IngestionJob)
+def get_job(job_id: str) -> IngestionJob:
+    """Return status and per-stage progress of an ingestion job.
+
+    Args:
+        job_id: Job ID returned by the upload endpoint.
+
+    Returns:
+        The job's current state.
+    """
+    job = ingestion_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
 
 
 @router.delete("/remove/{doc_id}")
@@ -58,25 +108,7 @@ def remove_document(doc_id: str) -> dict:
     Returns:
         Status message
     """
-    from app.ingestion.indexing import COLLECTION_NAME, get_qdrant_client
-    from app.retrieval.chunk_registry import _CHUNKS
-
-    # Remove chunks from registry
-    chunks_to_remove = [cid for cid, chunk in _CHUNKS.items() if chunk.doc_id == doc_id]
-    for chunk_id in chunks_to_remove:
-        _CHUNKS.pop(chunk_id, None)
-
-    # Remove from Qdrant
-    if chunks_to_remove:
-        try:
-            client = get_qdrant_client()
-            if client.collection_exists(COLLECTION_NAME):
-                client.delete(
-                    collection_name=COLLECTION_NAME,
-                    points_selector=chunks_to_remove,
-                )
-        except Exception as e:
-            print(f"Error removing from Qdrant: {e}")
+    chunks_removed = remove_document_chunks(doc_id)
 
     # Remove PDF file
     pdf_path = DOC_STORAGE / f"{doc_id}.pdf"
@@ -86,7 +118,7 @@ def remove_document(doc_id: str) -> dict:
     return {
         "status": "success",
         "message": f"Removed document {doc_id}",
-        "chunks_removed": len(chunks_to_remove),
+        "chunks_removed": chunks_removed,
     }
 
 
@@ -97,34 +129,50 @@ def list_documents() -> dict:
     Returns:
         Dictionary with document information
     """
-    chunks = get_chunks()
-    doc_ids = list(set(chunk.doc_id for chunk in chunks))
+    documents = document_catalog.list()
 
     return {
-        "total_documents": len(doc_ids),
-        "total_chunks": len(chunks),
-        "doc_ids": doc_ids,
+        "total_documents": len(documents),
+        "total_chunks": sum(d.chunks - d.duplicates for d in documents),
+        "doc_ids": [d.doc_id for d in documents],
+        "documents": documents,
     }
 
 
 @router.get("/token-counts")
 def get_document_token_counts() -> dict:
-    """Get approximate token counts for all documents.
+    """Get token counts for all documents.
 
     Returns:
         Dictionary with doc_id -> token_count mapping and max limit
     """
-    from app.retrieval.chunk_registry import get_chunks
-
-    chunks = get_chunks()
-    doc_token_counts = {}
-
-    for chunk in chunks:
-        # Rough estimate: 1 token ≈ 4 characters
-        tokens = len(chunk.text) // 4
-        doc_token_counts[chunk.doc_id] = doc_token_counts.get(chunk.doc_id, 0) + tokens
+    # Folded near-duplicates count towards every document they occur in
+    doc_token_counts = {d.doc_id: d.tokens for d in document_catalog.list()}
 
     return {
         "doc_token_counts": doc_token_counts,
         "max_summary_tokens": settings.max_summary_tokens,
     }
+
+
+@router.get("/shards", response_model=List[ShardStats])
+def list_shards() -> List[ShardStats]:
+    """Per-shard sizes and recall latency, to spot stragglers.
+
+    Returns:
+        One entry per shard (empty when retrieval is not sharded).
+    """
+    return shard_coordinator.stats()
+
+
+@router.get("/memory", response_model=List[DocumentMemory])
+def list_memory_usage() -> List[DocumentMemory]:
+    """Resident versus offloaded chunk storage per document.
+
+    `index_bytes` is the document's share of the keyword and concept
+    indexes, which stay resident whatever the memory budget.
+
+    Returns:
+        One entry per document, most recently accessed first.
+    """
+    return all_memory_usage()
@@ -0,0 +1,39 @@
+"""Routes for retrieval without generation."""
+
+from app.models.retrieval import (
+    BatchRetrieveRequest,
+    BatchRetrieveResponse,
+    RecallStats,
+)
+from app.retrieval.recall_stages import recall_stats
+from app.retrieval.retrieve import hybrid_graph_search_batch
+from fastapi import APIRouter
+
+router = APIRouter()
+
+
+@router.post("/batch", response_model=BatchRetrieveResponse)
+def retrieve_batch(request: BatchRetrieveRequest) -> BatchRetrieveResponse:
+    """Retrieve chunks for many queries in one vectorized pass.
+
+    Args:
+        request: Queries, final chunks per query and optional documents.
+
+    Returns:
+        Final chunks for each query, in query order.
+    """
+    results = hybrid_graph_search_batch(
+        request.queries,
+        request.top_k,
+        doc_ids=request.doc_ids or None,
+    )
+    return BatchRetrieveResponse(results=results)
+
+
+@router.get("/stages", response_model=RecallStats)
+def recall_stage_stats() -> RecallStats:
+    """Recall stage wall times, timeouts and the critical-path saving.
+
+    With sharding, recall runs in the shard processes and is not counted.
+    """
+    return recall_stats()
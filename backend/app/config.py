@@ -1,5 +1,8 @@
 """Configuration settings for AtlasRAG backend."""
 
+from typing import Dict, List, Literal
+
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -9,9 +12,151 @@ class Settings(BaseSettings):
     groq_api_key: str = ""
     default_model: str = "openai/gpt-oss-120b"
     qdrant_path: str = "/tmp/qdrant"
+    qdrant_url: str = ""  # Qdrant server; takes precedence over qdrant_path
+    qdrant_collection: str = "atlasrag_chunks"  # shard i uses "<name>_shard<i>"
     docs_path: str = "/tmp/docs"
     max_summary_tokens: int = 6000  # Conservative limit for model openai/gpt-oss-120b
 
+    # LLM tail latency: a duplicate request is hedged once a call outlasts this
+    # percentile of the model's recent latencies (LLM_HEDGE_DELAY_MS until
+    # enough are seen; 0 disables hedging), to LLM_HEDGE_MODEL if set. Failed
+    # calls fall back down LLM_FALLBACK_MODELS; per-model timeouts (JSON map)
+    # with a default; a model's circuit opens after consecutive failures
+    llm_base_url: str = ""  # OpenAI-compatible endpoint, e.g. the fake server
+    llm_hedge_percentile: float = 95.0
+    llm_hedge_delay_ms: float = 2000.0
+    llm_hedge_model: str = ""
+    llm_fallback_models: List[str] = []
+    llm_timeout_s: float = 60.0
+    model_timeouts_s: Dict[str, float] = {}
+    llm_breaker_failures: int = 5
+    llm_breaker_cooldown_s: float = 30.0
+
+    # Admission control: concurrent LLM calls, reranks and ingestion jobs per
+    # API worker; the rest wait in bounded queues (interactive QA ahead of
+    # summaries and uploads) and get 429 + Retry-After when the estimated
+    # wait exceeds the stage's limit (JSON map, seconds) or the queue is full
+    llm_concurrency: int = 8
+    rerank_concurrency: int = 2
+    ingest_concurrency: int = 0  # 0 = one per ingest worker
+    admission_queue_max: int = 64
+    admission_max_wait_s: Dict[str, float] = {
+        "llm": 30.0,
+        "rerank": 5.0,
+        "ingest": 900.0,
+    }
+
+    # Prompt context: token budget for retrieved passages, per model (JSON
+    # map) with a default; near-repeat sentences above the Jaccard threshold
+    # are dropped, and passages are picked MMR-style (1.0 = relevance only)
+    context_budget_tokens: int = 3000
+    model_context_budgets: Dict[str, int] = {}
+    context_redundancy: float = 0.8
+    context_mmr_lambda: float = 0.7
+
+    # Conversation sessions: LRU cap, idle TTL, and the token cap of the
+    # rolling summary that turns past the recent window are compacted into
+    session_max: int = 10_000
+    session_ttl_s: int = 3600
+    session_summary_tokens: int = 200
+
+    # Vector storage: "qdrant", the built-in "hnsw" graph index, or "quantized"
+    vector_backend: Literal["qdrant", "hnsw", "quantized"] = "qdrant"
+    hnsw_path: str = "/tmp/hnsw"
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 100
+    hnsw_ef_search: int = 64
+    quantized_path: str = "/tmp/quantized"
+    # "binary" (1 bit/dim, ~3.5x faster than exact); "int8" only saves memory
+    quantization: Literal["binary", "int8"] = "binary"
+    quantized_rescore: int = 8  # exact rescoring pool, as a multiple of top_k
+    # Lexical search: in-process "bm25", or "qdrant" sparse vectors stored in
+    # the Qdrant collection and searched in one request with dense vectors
+    # (needs VECTOR_BACKEND=qdrant and a collection created with it enabled;
+    # local QDRANT_PATH mode scans sparse vectors, so pair it with QDRANT_URL)
+    lexical_backend: Literal["bm25", "qdrant"] = "bm25"
+
+    # Vector payloads: "full" (chunk text and metadata) or "ids" (doc_id only;
+    # hits resolve from the chunk store, which then needs SHARED_STATE to
+    # survive restarts). Existing data: python -m app.ingestion.migrate_payloads
+    vector_payload: Literal["full", "ids"] = "full"
+
+    # Chunk text kept in RAM; colder documents are offloaded to memory-mapped
+    # files under tier_path (pair with VECTOR_PAYLOAD=ids for in-process stores).
+    # Only chunk text is budgeted: BM25 postings and the concept index stay in
+    # RAM (reported per document as index_bytes by /docs/memory)
+    memory_budget_mb: int = 0  # 0 = unlimited
+    tier_path: str = "/tmp/tiers"
+
+    # Document routing: restrict recall to the most relevant documents
+    route_fan_out: int = 8  # 0 disables routing
+
+    # Async retrieval: concurrent queries arriving within this window share
+    # one batch retrieval pass
+    retrieval_batch_window_ms: float = 5.0
+    retrieval_batch_max: int = 32
+
+    # Recall stages (vector, BM25, graph) run one after another by default:
+    # side by side on a thread pool they contend for the GIL and measured
+    # slower (35.9 ms vs 25.8 ms per pass). With RECALL_PARALLEL on, a stage
+    # still running past its timeout (JSON map, ms per query, from the
+    # stage's start; 0 = none) is dropped, unless every stage overruns
+    recall_parallel: bool = False
+    recall_workers: int = 12
+    recall_timeouts_ms: Dict[str, float] = {
+        "vector": 2000.0,
+        "bm25": 1000.0,
+        "graph": 1000.0,
+    }
+
+    # Request tracing: finished traces go to each exporter listed ("json" to
+    # a local JSON-lines file, "otlp" to an OTLP/HTTP collector); requests
+    # slower than slow_query_ms (0 = off) go to the slow-query log
+    trace_exporters: List[str] = []
+    trace_json_path: str = "/tmp/traces/traces.jsonl"
+    otlp_endpoint: str = "http://localhost:4318/v1/traces"
+    slow_query_ms: float = 5000.0
+    slow_query_log_path: str = "/tmp/traces/slow_queries.jsonl"
+
+    # Prometheus metrics (GET /metrics): index sizes that need a scan or a
+    # Qdrant round trip are re-read at most this often. With more than one
+    # API worker, set PROMETHEUS_MULTIPROC_DIR (read by prometheus_client)
+    # so a scrape aggregates every worker; each one then publishes its cache
+    # and index readings at this interval
+    metrics_index_ttl_s: float = 30.0
+
+    # Sharded retrieval: documents partitioned across local shard processes,
+    # run by a single API worker (startup fails with several uvicorn workers)
+    shard_count: int = 0  # 0 = single-process indexes
+    shard_path: str = "/tmp/shards"
+
+    # Shared state across uvicorn workers (needs a Qdrant server via QDRANT_URL,
+    # since local path mode locks the collection to one process)
+    shared_state: bool = False
+    state_path: str = "/tmp/state/atlasrag.db"
+
+    # Background ingestion
+    jobs_path: str = "/tmp/docs/jobs"
+    ingest_workers: int = 0  # 0 = one worker process per CPU core
+    ingest_queue_size: int = 32
+    ingest_batch_chunks: int = 64  # chunks flowing through each pipeline stage
+    index_batch_chunks: int = 512  # soft cap on chunks per embedding/upsert batch
+    upload_chunk_bytes: int = 1024 * 1024
+    pdf_extract_workers: int = 1  # >1 splits large PDFs into page ranges
+    dedup_enabled: bool = True
+    dedup_threshold: float = 0.85  # estimated Jaccard to fold a chunk
+
+    @model_validator(mode="after")
+    def check_backends(self) -> "Settings":
+        """Reject backend combinations that cannot work together."""
+        if self.lexical_backend == "qdrant" and self.vector_backend != "qdrant":
+            msg = (
+                "LEXICAL_BACKEND=qdrant stores sparse vectors in the Qdrant "
+                f"collection and needs VECTOR_BACKEND=qdrant, not {self.vector_backend}"
+            )
+            raise ValueError(msg)
+        return self
+
     class Config:
         """Pydantic Settings configuration."""
 
@@ -0,0 +1,288 @@
+"""Admission control: per-stage concurrency limits with bounded wait queues.
+
+Each expensive stage (LLM calls, cross-encoder reranking, ingestion)
+admits a fixed number of concurrent holders. Others wait in a bounded
+queue ordered by priority, interactive QA ahead of bulk work
+(summaries, uploads), then arrival. A request is rejected up front,
+with the wait it would have faced, when the queue is full or its
+estimated wait exceeds the stage's limit: the caller answers 429 with
+Retry-After instead of joining a queue it would time out in.
+
+Note:
+- The wait estimate is the number of holders ahead of a request, in
+  rounds of `limit`, times a moving average of hold time
+- Async callers wait on a future resolved when their turn comes, so a
+  queued coroutine holds no thread
+- Limits are per API worker process
+"""
+
+import asyncio
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Deque, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from app.config import settings
+from app.models.api import StageStats
+
+# Request priorities (lower is served first)
+INTERACTIVE = 0
+BULK = 1
+
+# Weight of the newest hold time in the moving average
+_EWMA_ALPHA = 0.2
+
+# Recent queue waits kept per stage for percentiles
+_WAIT_WINDOW = 1024
+
+
+class OverloadedError(Exception):
+    """A stage is too busy to admit a request within its wait limit."""
+
+    def __init__(self, stage: str, retry_after_s: float) -> None:
+        """Record the stage and how long the caller should back off."""
+        super().__init__(f"The {stage} stage is overloaded, please retry later.")
+        self.stage = stage
+        self.retry_after_s = retry_after_s
+
+
+class Stage:
+    """Concurrency limit with a bounded priority wait queue."""
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        queue_max: int,
+        max_wait_s: float,
+    ) -> None:
+        """Admit `limit` holders; queue up to `queue_max` within `max_wait_s`."""
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_max = queue_max
+        self.max_wait_s = max_wait_s
+        self._active = 0
+        self._waiting: List[Tuple[int, int]] = []  # heap of (priority, seq)
+        # Queued async callers: ticket -> (loop, future, queued since)
+        self._async_waiters: Dict[
+            Tuple[int, int],
+            Tuple[asyncio.AbstractEventLoop, "asyncio.Future[float]", float],
+        ] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._hold_s = 0.0
+        self._waits: Deque[float] = deque(maxlen=_WAIT_WINDOW)
+        self._admitted = 0
+        self._rejected = 0
+
+    def estimated_wait(self, priority: int = INTERACTIVE, extra: int = 0) -> float:
+        """Seconds a new request would wait for a slot.
+
+        Args:
+            priority: The request's priority.
+            extra: Work queued outside the stage (e.g. jobs not yet started).
+        """
+        with self._cond:
+            return self._estimate(priority, extra)
+
+    def check(self, priority: int = INTERACTIVE, extra: int = 0) -> None:
+        """Reject a request that would wait too long, without queueing it.
+
+        Raises:
+            OverloadedError: If the estimated wait exceeds the limit.
+        """
+        with self._cond:
+            wait = self._estimate(priority, extra)
+            if wait > self.max_wait_s:
+                self._rejected += 1
+                raise OverloadedError(self.name, wait)
+
+    def acquire(
+        self,
+        priority: int = INTERACTIVE,
+        queued_since: Optional[float] = None,
+        force: bool = False,
+    ) -> float:
+        """Wait for a slot; return when it was granted (monotonic seconds).
+
+        Args:
+            priority: The request's priority.
+            queued_since: When the work was queued, if before this call
+                (monotonic seconds); queue-wait times count from it.
+            force: Queue regardless of limits, for work already accepted.
+
+        Raises:
+            OverloadedError: If the queue is full or the wait is too long.
+        """
+        start = time.monotonic() if queued_since is None else queued_since
+        with self._cond:
+            if self._active < self.limit and not self._waiting:
+                return self._grant(start)
+
+            wait = self._estimate(priority)
+            overloaded = len(self._waiting) >= self.queue_max or wait > self.max_wait_s
+            if overloaded and not force:
+                self._rejected += 1
+                raise OverloadedError(self.name, wait)
+
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            while self._waiting[0] != ticket or self._active >= self.limit:
+                self._cond.wait()
+            heapq.heappop(self._waiting)
+            granted_at = self._grant(start)
+            # Another slot may be free for the next in line
+            self._wake()
+            return granted_at
+
+    def release(self, granted_at: float) -> None:
+        """Free a slot, folding its hold time into the wait estimate."""
+        held = time.monotonic() - granted_at
+        with self._cond:
+            self._active -= 1
+            self._hold_s += _EWMA_ALPHA * (held - self._hold_s)
+            self._wake()
+
+    @contextmanager
+    def slot(
+        self,
+        priority: int = INTERACTIVE,
+        queued_since: Optional[float] = None,
+        force: bool = False,
+    ) -> Iterator[None]:
+        """Hold a slot for the duration of the block (see `acquire`)."""
+        granted_at = self.acquire(priority, queued_since, force)
+        try:
+            yield
+        finally:
+            self.release(granted_at)
+
+    @asynccontextmanager
+    async def aslot(self, priority: int = INTERACTIVE) -> AsyncIterator[None]:
+        """Async `slot`: queued callers wait without holding a thread.
+
+        Raises:
+            OverloadedError: If the queue is full or the wait is too long.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        granted: Optional["asyncio.Future[float]"] = None
+        with self._cond:
+            if self._active < self.limit and not self._waiting:
+                granted_at = self._grant(start)
+            else:
+                wait = self._estimate(priority)
+                if len(self._waiting) >= self.queue_max or wait > self.max_wait_s:
+                    self._rejected += 1
+                    raise OverloadedError(self.name, wait)
+                ticket = (priority, next(self._seq))
+                heapq.heappush(self._waiting, ticket)
+                granted = loop.create_future()
+                self._async_waiters[ticket] = (loop, granted, start)
+
+        if granted is not None:
+            try:
+                granted_at = await granted
+            except asyncio.CancelledError:
+                self._abandon(granted)
+                raise
+        try:
+            yield
+        finally:
+            self.release(granted_at)
+
+    def _abandon(self, granted: "asyncio.Future[float]") -> None:
+        """Leave the queue, or free the slot granted to a cancelled caller."""
+        with self._cond:
+            for ticket, (_, future, _) in self._async_waiters.items():
+                if future is granted:
+                    del self._async_waiters[ticket]
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._wake()
+                    return
+        # Granted already: `_resolve` frees it if the future was cancelled
+        if granted.done() and not granted.cancelled():
+            self.release(granted.result())
+
+    def _resolve(self, granted: "asyncio.Future[float]", granted_at: float) -> None:
+        """Hand a slot to an async waiter (on its loop)."""
+        if granted.cancelled():
+            self.release(granted_at)
+        else:
+            granted.set_result(granted_at)
+
+    def stats(self) -> StageStats:
+        """Return the stage's occupancy, queue-wait times and rejections."""
+        with self._cond:
+            waits = np.array(self._waits) * 1000
+            return StageStats(
+                stage=self.name,
+                limit=self.limit,
+                active=self._active,
+                queued=len(self._waiting),
+                admitted=self._admitted,
+                rejected=self._rejected,
+                wait_ms_mean=round(float(waits.mean()), 2) if len(waits) else 0.0,
+                wait_ms_p95=(
+                    round(float(np.percentile(waits, 95)), 2) if len(waits) else 0.0
+                ),
+                hold_ms=round(self._hold_s * 1000, 2),
+                estimated_wait_ms=round(self._estimate(INTERACTIVE) * 1000, 2),
+            )
+
+    def _grant(self, start: float) -> float:
+        """Take a slot (under the lock)."""
+        self._active += 1
+        self._admitted += 1
+        now = time.monotonic()
+        self._waits.append(now - start)
+        return now
+
+    def _wake(self) -> None:
+        """Grant free slots to async waiters first in line, wake the threads."""
+        while (
+            self._waiting
+            and self._active < self.limit
+            and self._waiting[0] in self._async_waiters
+        ):
+            ticket = heapq.heappop(self._waiting)
+            loop, granted, start = self._async_waiters.pop(ticket)
+            loop.call_soon_threadsafe(self._resolve, granted, self._grant(start))
+        self._cond.notify_all()
+
+    def _estimate(self, priority: int, extra: int = 0) -> float:
+        """Wait estimate (under the lock)."""
+        ahead = extra + sum(1 for p, _ in self._waiting if p <= priority)
+        free = self.limit - self._active
+        if ahead < free:
+            return 0.0
+        return math.ceil((ahead - free + 1) / self.limit) * self._hold_s
+
+
+_stages: Dict[str, Stage] = {}
+
+
+def register_stage(name: str, limit: int) -> Stage:
+    """Create a stage with its configured queue size and wait limit."""
+    stage = _stages[name] = Stage(
+        name,
+        limit,
+        queue_max=settings.admission_queue_max,
+        max_wait_s=settings.admission_max_wait_s.get(name, 30.0),
+    )
+    return stage
+
+
+def stage_stats() -> List[StageStats]:
+    """Return every stage's statistics."""
+    return [stage.stats() for stage in _stages.values()]
+
+
+llm_stage = register_stage("llm", settings.llm_concurrency)
+rerank_stage = register_stage("rerank", settings.rerank_concurrency)
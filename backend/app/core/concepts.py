@@ -0,0 +1,120 @@
+"""Concept normalization and vocabulary matching.
+
+Concepts extracted at ingest and terms found in queries go through the
+same `normalize_concept`, so "Transformer Models" in a document and
+"transformer model" in a question meet as one key. The vocabulary of
+known concepts is a word-level trie; matching a query walks it once
+from each word, so it costs O(words x longest concept) with no NLP call.
+"""
+
+import re
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Set
+
+from app.core.metrics import lru_counts, register_cache
+
+_WORD = re.compile(r"\w+")
+
+# Trie key marking the end of a concept; never equal to a word
+_END = ""
+
+
+@lru_cache(maxsize=65_536)
+def normalize_concept(text: str) -> str:
+    """Normalize a concept: NFKC, lowercase, words only, plurals folded."""
+    words = _WORD.findall(unicodedata.normalize("NFKC", text).lower())
+    return " ".join(_fold_plural(word) for word in words)
+
+
+register_cache("normalize_concept", lru_counts(normalize_concept))
+
+
+def _fold_plural(word: str) -> str:
+    """Strip a plain plural "s" ("models" -> "model", not "class")."""
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+class ConceptTrie:
+    """Word-level trie over normalized concepts, with reference counts."""
+
+    def __init__(self) -> None:
+        """Initialize an empty vocabulary."""
+        self._root: Dict[str, dict] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of distinct concepts."""
+        return len(self._counts)
+
+    def add(self, concepts: Iterable[str]) -> None:
+        """Add normalized concepts (counted, so shared ones survive removals)."""
+        with self._lock:
+            for concept in concepts:
+                if not concept:
+                    continue
+                count = self._counts.get(concept, 0)
+                self._counts[concept] = count + 1
+                if count:
+                    continue
+
+                node = self._root
+                for word in concept.split(" "):
+                    node = node.setdefault(word, {})
+                node[_END] = concept
+
+    def remove(self, concepts: Iterable[str]) -> None:
+        """Drop one reference to each concept, pruning unused branches."""
+        with self._lock:
+            for concept in concepts:
+                count = self._counts.get(concept, 0)
+                if count > 1:
+                    self._counts[concept] = count - 1
+                    continue
+                if not count:
+                    continue
+                del self._counts[concept]
+
+                path = [self._root]
+                for word in concept.split(" "):
+                    path.append(path[-1][word])
+                del path[-1][_END]
+
+                for word, parent in zip(
+                    reversed(concept.split(" ")), reversed(path[:-1]), strict=True
+                ):
+                    if parent[word]:
+                        break
+                    del parent[word]
+
+    def clear(self) -> None:
+        """Remove every concept."""
+        with self._lock:
+            self._root = {}
+            self._counts.clear()
+
+    def match(self, text: str) -> Set[str]:
+        """Return every known concept occurring in `text` as whole words."""
+        words = normalize_concept(text).split(" ")
+        root = self._root
+        found: Set[str] = set()
+
+        for start in range(len(words)):
+            node = root
+            for word in words[start:]:
+                node = node.get(word)
+                if node is None:
+                    break
+                concept = node.get(_END)
+                if concept is not None:
+                    found.add(concept)
+
+        return found
+
+    def match_batch(self, texts: List[str]) -> List[Set[str]]:
+        """Match many texts."""
+        return [self.match(text) for text in texts]
@@ -2,6 +2,7 @@
 
 from typing import List
 
+from app.core.metrics import inference
 from sentence_transformers import SentenceTransformer
 
 _model = SentenceTransformer("all-MiniLM-L6-v2")
@@ -9,4 +10,5 @@ _model = SentenceTransformer("all-MiniLM-L6-v2")
 
 def embed_texts(texts: List[str]) -> List[list[float]]:
     """Embed a list of texts."""
-    return _model.encode(texts, normalize_embeddings=True).tolist()
+    with inference("embedding", len(texts)):
+        return _model.encode(texts, normalize_embeddings=True).tolist()
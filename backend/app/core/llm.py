@@ -1,38 +1,423 @@
-"""LLM abstraction layer for Groq and optional OpenAI support."""
+"""LLM abstraction layer for Groq and optional OpenAI support.
 
-from typing import Dict, List
+Chat completions go through a tail-latency policy:
+- A hedged duplicate is sent once the primary call has run longer than
+  LLM_HEDGE_PERCENTILE of the model's recent latencies, optionally to a
+  faster LLM_HEDGE_MODEL; the first answer wins and the other is cancelled
+- Each model call has its own timeout (MODEL_TIMEOUTS_S, LLM_TIMEOUT_S)
+- Failed or timed-out calls fall back down LLM_FALLBACK_MODELS; a 4xx
+  response is the request's fault and is raised as is
+- A model's circuit opens after LLM_BREAKER_FAILURES consecutive timeouts,
+  connection errors or 5xx responses, skipping it until
+  LLM_BREAKER_COOLDOWN_S has passed; one trial call then decides whether
+  it closes again, and is never hedged to the same model
+- Cancelled and timed-out calls add their elapsed time to the latency
+  history, so slow calls still move the hedge delay
 
+Calls run on one background event loop that owns the async clients, so
+sync routes and async callers share connections and cancelling a losing
+request aborts its HTTP call. Calls made by other clients (LangChain)
+take an LLM stage slot and pass the model's circuit via `llm_guard`.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Deque, Dict, List, Optional, Set
+
+import numpy as np
 from app.config import settings
-from groq import Groq
+from app.core.admission import INTERACTIVE, llm_stage
+from app.core.metrics import llm_events, llm_seconds, llm_tokens
+from app.core.tracing import Span, annotate, attach, current_span, span
+from groq import APIConnectionError, APIStatusError, APITimeoutError, AsyncGroq
+
+# Recent latencies kept per model, and how many are needed before the
+# hedge delay follows them instead of LLM_HEDGE_DELAY_MS
+_LATENCY_WINDOW = 256
+_MIN_SAMPLES = 20
+
+
+class LLMUnavailableError(RuntimeError):
+    """Every candidate model failed, timed out or has an open circuit."""
+
+    def __init__(self, msg: str, retry_after_s: float) -> None:
+        """Record when the first circuit lets a trial through again."""
+        super().__init__(msg)
+        self.retry_after_s = retry_after_s
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with a half-open trial call."""
+
+    def __init__(self, failures: int, cooldown_s: float) -> None:
+        """Open after `failures` in a row; allow a trial after `cooldown_s`."""
+        self.failures = failures
+        self.cooldown_s = cooldown_s
+        self._consecutive = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """Return "closed", "open" or "half-open"."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._trial or self.retry_after() == 0:
+                return "half-open"
+            return "open"
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a trial call through."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown_s - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (claims the trial when half-open)."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or self.retry_after() > 0:
+                return False
+            self._trial = True
+            return True
+
+    def record(self, ok: bool) -> None:
+        """Record a call's outcome."""
+        with self._lock:
+            self._trial = False
+            if ok:
+                self._consecutive = 0
+                self._opened_at = None
+                return
+            self._consecutive += 1
+            if self._opened_at is not None or self._consecutive >= self.failures:
+                self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give back a trial whose call was cancelled before it finished."""
+        with self._lock:
+            self._trial = False
+
+
+class _ModelState:
+    """Latency history and circuit breaker of one model."""
+
+    __slots__ = ("latencies", "breaker")
+
+    def __init__(self) -> None:
+        self.latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.breaker = CircuitBreaker(
+            settings.llm_breaker_failures, settings.llm_breaker_cooldown_s
+        )
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on a call before hedging it."""
+        if len(self.latencies) < _MIN_SAMPLES:
+            return settings.llm_hedge_delay_ms / 1000
+        return float(np.percentile(self.latencies, settings.llm_hedge_percentile))
+
+
+_models: Dict[str, _ModelState] = {}
+_models_lock = threading.Lock()
+
+_counters: Dict[str, int] = {
+    "calls": 0,
+    "hedged": 0,
+    "hedge_wins": 0,
+    "fallbacks": 0,
+    "timeouts": 0,
+    "errors": 0,
+    "rejected": 0,
+}
+
+
+def _state(model: str) -> _ModelState:
+    """Return a model's state, creating it on first use."""
+    with _models_lock:
+        state = _models.get(model)
+        if state is None:
+            state = _models[model] = _ModelState()
+        return state
+
+
+def _count(name: str) -> None:
+    with _models_lock:
+        _counters[name] += 1
+    llm_events.labels(name).inc()
+
+
+def llm_counters() -> Dict[str, int]:
+    """Return call, hedge, fallback, timeout, error and rejection counts."""
+    with _models_lock:
+        return dict(_counters)
+
+
+def circuit_states() -> Dict[str, str]:
+    """Return the circuit state of every model called so far."""
+    with _models_lock:
+        models = dict(_models)
+    return {model: state.breaker.state for model, state in models.items()}
+
+
+def _is_client_error(exc: BaseException) -> bool:
+    """Whether `exc` is a 4xx response, which no other model would fix."""
+    return isinstance(exc, APIStatusError) and exc.status_code < 500
+
+
+def _is_outage(exc: BaseException) -> bool:
+    """Whether `exc` says the model is unreachable or failing."""
+    if isinstance(exc, APIStatusError):
+        return exc.status_code >= 500
+    return isinstance(exc, (asyncio.TimeoutError, APIConnectionError))
 
 
-def _get_groq_client() -> Groq:
-    """Return a Groq API client instance."""
-    if not settings.groq_api_key:
+def call_outcome(exc: BaseException) -> str:
+    """Outcome label of a failed call in the LLM latency metric."""
+    if isinstance(exc, (asyncio.TimeoutError, APITimeoutError)):
+        return "timeout"
+    return "client_error" if _is_client_error(exc) else "error"
+
+
+def model_timeout(model: str) -> float:
+    """Return the timeout in seconds for one call to `model`."""
+    return settings.model_timeouts_s.get(model, settings.llm_timeout_s)
+
+
+@lru_cache(maxsize=1)
+def _get_groq_client() -> AsyncGroq:
+    """Return the Groq API client (owned by the background loop)."""
+    if not settings.groq_api_key and not settings.llm_base_url:
         msg = (
             "GROQ_API_KEY is not set. Please add it to your .env file "
             "to enable Llama 3 and GPT-OSS models."
         )
         raise ValueError(msg)
 
-    return Groq(api_key=settings.groq_api_key)
+    # Timeouts and retries are handled here, per model
+    return AsyncGroq(
+        api_key=settings.groq_api_key or "local",
+        base_url=settings.llm_base_url or None,
+        max_retries=0,
+    )
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop LLM calls run on, starting it on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever,
+                name="llm-loop",
+                daemon=True,
+            ).start()
+        return _loop
+
+
+def _submit(messages: List[Dict[str, str]], model: Optional[str]) -> Future:
+    # The loop's tasks nest their spans under the caller's
+    return asyncio.run_coroutine_threadsafe(
+        _chat(messages, model or settings.default_model, current_span()),
+        _background_loop(),
+    )
 
 
 def llm_chat(
     messages: List[Dict[str, str]],
-    model: str = settings.default_model,
+    model: Optional[str] = None,
+    priority: int = INTERACTIVE,
 ) -> str:
-    """Generate a chat completion using Groq."""
-    client = _get_groq_client()
+    """Generate a chat completion using Groq, hedged and with fallbacks.
+
+    Raises:
+        OverloadedError: If the LLM stage cannot admit the call in time.
+    """
+    with span("llm", model=model or settings.default_model, priority=priority):
+        queued = time.perf_counter()
+        with llm_stage.slot(priority):
+            annotate(queue_ms=round((time.perf_counter() - queued) * 1000, 3))
+            return _submit(messages, model).result()
+
+
+@asynccontextmanager
+async def llm_guard(model: str, priority: int = INTERACTIVE) -> AsyncIterator[None]:
+    """Admit a call made by another client (e.g. LangChain's ChatGroq).
+
+    The call holds an LLM stage slot and goes through `model`'s circuit,
+    without hedging or fallbacks.
+
+    Raises:
+        OverloadedError: If the LLM stage cannot admit the call in time.
+        LLMUnavailableError: If the model's circuit is open.
+    """
+    breaker = _state(model).breaker
+    async with llm_stage.aslot(priority):
+        if not breaker.allow():
+            _count("rejected")
+            msg = f"No LLM available ({model}: circuit open)"
+            raise LLMUnavailableError(msg, retry_after_s=breaker.retry_after() or 1.0)
+        _count("calls")
+        recorded = False
+        try:
+            yield
+            breaker.record(ok=True)
+            recorded = True
+        except Exception as exc:
+            _count("timeouts" if call_outcome(exc) == "timeout" else "errors")
+            if _is_outage(exc):
+                breaker.record(ok=False)
+                recorded = True
+            raise
+        finally:
+            # Cancelled, closed early or not the model's fault
+            if not recorded:
+                breaker.release()
 
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-    )
 
+async def _call(model: str, messages: List[Dict[str, str]], role: str) -> str:
+    """One timed model call, recorded in the model's latency and breaker."""
+    with span("llm.call", model=model, role=role):
+        return await _timed_call(model, messages)
+
+
+async def _timed_call(model: str, messages: List[Dict[str, str]]) -> str:
+    state = _state(model)
+    start = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(
+            _get_groq_client().chat.completions.create(
+                model=model,
+                messages=messages,
+            ),
+            timeout=model_timeout(model),
+        )
+    except asyncio.CancelledError:
+        # Censored sample: the call would have taken at least this long
+        state.latencies.append(time.perf_counter() - start)
+        state.breaker.release()
+        raise
+    except asyncio.TimeoutError:
+        _count("timeouts")
+        state.latencies.append(time.perf_counter() - start)
+        state.breaker.record(ok=False)
+        llm_seconds.labels(model, "timeout").observe(time.perf_counter() - start)
+        raise
+    except Exception as exc:
+        _count("errors")
+        if _is_outage(exc):
+            state.breaker.record(ok=False)
+        else:
+            # The model answered (or was never reached); its health is unknown
+            state.breaker.release()
+        llm_seconds.labels(model, call_outcome(exc)).observe(
+            time.perf_counter() - start
+        )
+        raise
+
+    elapsed = time.perf_counter() - start
+    state.latencies.append(elapsed)
+    state.breaker.record(ok=True)
+    llm_seconds.labels(model, "ok").observe(elapsed)
+    if response.usage is not None:
+        prompt_tokens = response.usage.prompt_tokens or 0
+        completion_tokens = response.usage.completion_tokens or 0
+        llm_tokens.labels(model, "prompt").inc(prompt_tokens)
+        llm_tokens.labels(model, "completion").inc(completion_tokens)
+        annotate(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
     return response.choices[0].message.content
 
 
+async def _chat(
+    messages: List[Dict[str, str]],
+    model: str,
+    parent: Optional[Span],
+) -> str:
+    """Hedged call to the first available model, then the fallbacks."""
+    attach(parent)
+    _count("calls")
+    candidates = list(dict.fromkeys([model, *settings.llm_fallback_models]))
+    errors: List[str] = []
+
+    for i, candidate in enumerate(candidates):
+        if not _state(candidate).breaker.allow():
+            errors.append(f"{candidate}: circuit open")
+            continue
+        if i:
+            _count("fallbacks")
+            annotate(fallback=candidate)
+        try:
+            return await _hedged(candidate, messages)
+        except Exception as exc:
+            if _is_client_error(exc):
+                raise
+            errors.append(f"{candidate}: {type(exc).__name__}")
+
+    _count("rejected")
+    retry_after = min(_state(c).breaker.retry_after() for c in candidates)
+    msg = f"No LLM available ({'; '.join(errors)})"
+    raise LLMUnavailableError(msg, retry_after_s=retry_after or 1.0)
+
+
+async def _hedged(model: str, messages: List[Dict[str, str]]) -> str:
+    """Call `model`, hedging with a duplicate if it runs past the delay.
+
+    The hedge goes to LLM_HEDGE_MODEL if set (and its circuit allows),
+    else to `model` again unless its circuit is half-open: the trial call
+    decides alone. Raises the primary's error if every call failed.
+    """
+    primary = asyncio.ensure_future(_call(model, messages, "primary"))
+    tasks = [primary]
+    try:
+        if settings.llm_hedge_percentile <= 0:
+            return await primary
+
+        delay = _state(model).hedge_delay()
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge_model = settings.llm_hedge_model or model
+        if hedge_model == model:
+            if _state(model).breaker.state != "closed":
+                return await primary
+        elif not _state(hedge_model).breaker.allow():
+            return await primary
+
+        _count("hedged")
+        annotate(hedged=True)
+        hedge = asyncio.ensure_future(_call(hedge_model, messages, "hedge"))
+        tasks.append(hedge)
+        pending: Set[asyncio.Future] = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        _count("hedge_wins")
+                    return task.result()
+        # Both failed: surface the primary's error
+        return primary.result()
+    finally:
+        # The loser (or both, if the caller was cancelled)
+        for task in tasks:
+            task.cancel()
+
+
 def get_default_model() -> str:
     """Return the default LLM model name."""
     return settings.default_model
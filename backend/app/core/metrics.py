@@ -0,0 +1,296 @@
+"""Prometheus metrics for capacity planning, served at GET /metrics.
+
+Covers request and stage latencies, reranker candidate pools, model
+inference batches, LLM tokens and latency, cache hit rates, ingestion
+throughput and index sizes. Hot paths only bump a counter or a
+histogram bucket. Cache and index sizes are read when Prometheus
+scrapes, and sizes that need a scan or a round trip (Qdrant points) are
+refreshed at most every METRICS_INDEX_TTL_S.
+
+With several API workers (WEB_CONCURRENCY>1) a scrape reaches one
+worker at random, so per-process metrics would be that worker's only.
+Setting PROMETHEUS_MULTIPROC_DIR switches prometheus_client to
+multiprocess mode: every process writes its counters, histograms and
+gauges to files there, and /metrics aggregates them across workers.
+Scrape-time readings (cache counts, index sizes) have no file of their
+own, so each worker publishes them every METRICS_INDEX_TTL_S, and the
+worker answering a scrape publishes first.
+
+Note:
+- The directory must be emptied before the workers start (the
+  Dockerfile does) and is read by prometheus_client at import
+- In multiprocess mode cache counts are summed over workers and index
+  sizes are the most recent reading of a live worker
+- Without multiprocess mode, metrics are only valid with one worker
+- With sharding, index sizes live in the shard processes and are not
+  reported; their stage latencies are, in multiprocess mode only
+- Throughput and hit rates are counters: take their `rate()` in Prometheus
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from app.config import settings
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import CounterMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+
+# Aggregate metrics of every worker through files (see module docstring)
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+# Latency buckets (seconds), from cache lookups to slow LLM answers
+_LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+# Batch and pool size buckets
+_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048)
+
+request_seconds = Histogram(
+    "atlasrag_request_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+    buckets=_LATENCY_BUCKETS,
+)
+stage_seconds = Histogram(
+    "atlasrag_stage_seconds",
+    "Latency of a pipeline stage (retrieval, rerank, LLM, ...).",
+    ["stage"],
+    buckets=_LATENCY_BUCKETS,
+)
+rerank_candidates = Histogram(
+    "atlasrag_rerank_candidates",
+    "Candidates per query passed to the cross-encoder.",
+    buckets=_SIZE_BUCKETS,
+)
+inference_batch_size = Histogram(
+    "atlasrag_inference_batch_size",
+    "Inputs per model inference call.",
+    ["model"],
+    buckets=_SIZE_BUCKETS,
+)
+inference_seconds = Histogram(
+    "atlasrag_inference_seconds",
+    "Duration of a model inference call.",
+    ["model"],
+    buckets=_LATENCY_BUCKETS,
+)
+query_graph_size = Histogram(
+    "atlasrag_query_graph_size",
+    "Nodes and edges of each concept graph built for graph recall.",
+    ["kind"],
+    buckets=_SIZE_BUCKETS,
+)
+llm_tokens = Counter(
+    "atlasrag_llm_tokens",
+    "LLM tokens used, by model and kind (prompt or completion).",
+    ["model", "kind"],
+)
+llm_seconds = Histogram(
+    "atlasrag_llm_seconds",
+    "Latency of one LLM call, by model and outcome.",
+    ["model", "outcome"],
+    buckets=_LATENCY_BUCKETS,
+)
+llm_events = Counter(
+    "atlasrag_llm_events",
+    "LLM calls, hedges, fallbacks, timeouts, errors and rejections.",
+    ["event"],
+)
+ingested_pages = Counter("atlasrag_ingested_pages", "PDF pages ingested.")
+ingested_chunks = Counter("atlasrag_ingested_chunks", "Chunks ingested.")
+ingested_embeddings = Counter(
+    "atlasrag_ingested_embeddings", "Chunk embeddings computed and indexed."
+)
+ingest_document_seconds = Histogram(
+    "atlasrag_ingest_document_seconds",
+    "Time from a document's first batch to its completion.",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+)
+index_size = Gauge(
+    "atlasrag_index_size",
+    "Entries in each index (chunks, BM25 terms, concepts, vector points).",
+    ["index"],
+    multiprocess_mode="livemostrecent",
+)
+
+# Multiprocess mode: scrape-time readings, published to files by `publish`
+_index_readers: Dict[str, Callable[[], int]] = {}
+_published_caches: Dict[str, Tuple[int, int]] = {}
+_publish_lock = threading.Lock()
+_publisher_stop = threading.Event()
+
+
+@contextmanager
+def inference(model: str, batch: int) -> Iterator[None]:
+    """Record the batch size and duration of a model call."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        inference_batch_size.labels(model).observe(batch)
+        inference_seconds.labels(model).observe(time.perf_counter() - start)
+
+
+def register_index(index: str, size: Callable[[], int], cached: bool = False) -> None:
+    """Report an index's size, read at scrape time.
+
+    Args:
+        index: Label value of the index.
+        size: Returns the current number of entries.
+        cached: Reuse the last reading for METRICS_INDEX_TTL_S, for sizes
+            that are costly to compute.
+    """
+    if cached:
+        size = _Cached(size)
+    if MULTIPROCESS:
+        # Function gauges are not written to the multiprocess files
+        _index_readers[index] = size
+    else:
+        index_size.labels(index).set_function(size)
+
+
+class _Cached:
+    """A size reading reused until it is older than the TTL."""
+
+    def __init__(self, size: Callable[[], int]) -> None:
+        self.size = size
+        self.value = 0
+        self.read_at = float("-inf")
+        self.lock = threading.Lock()
+
+    def __call__(self) -> int:
+        with self.lock:
+            if time.monotonic() - self.read_at >= settings.metrics_index_ttl_s:
+                self.value = self.size()
+                self.read_at = time.monotonic()
+            return self.value
+
+
+class _CacheCollector(Collector):
+    """Hit and miss counts of registered caches, read at scrape time."""
+
+    def __init__(self) -> None:
+        self.caches: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+    def collect(self) -> Iterator[CounterMetricFamily]:
+        hits = CounterMetricFamily(
+            "atlasrag_cache_hits", "Cache lookups served.", labels=["cache"]
+        )
+        misses = CounterMetricFamily(
+            "atlasrag_cache_misses", "Cache lookups missed.", labels=["cache"]
+        )
+        for name, counts in list(self.caches.items()):
+            hit, miss = counts()
+            hits.add_metric([name], hit)
+            misses.add_metric([name], miss)
+        yield hits
+        yield misses
+
+    def describe(self) -> List[CounterMetricFamily]:
+        return []
+
+
+_caches = _CacheCollector()
+if MULTIPROCESS:
+    # Same series as _CacheCollector, fed by `publish` and summed over workers
+    _cache_hits = Counter(
+        "atlasrag_cache_hits", "Cache lookups served.", ["cache"], registry=None
+    )
+    _cache_misses = Counter(
+        "atlasrag_cache_misses", "Cache lookups missed.", ["cache"], registry=None
+    )
+else:
+    REGISTRY.register(_caches)
+
+
+def register_cache(name: str, counts: Callable[[], Tuple[int, int]]) -> None:
+    """Report a cache's hit and miss counts, read at scrape time."""
+    _caches.caches[name] = counts
+
+
+def lru_counts(cached: Any) -> Callable[[], Tuple[int, int]]:
+    """Hit and miss reader of an `lru_cache`-wrapped function."""
+
+    def counts() -> Tuple[int, int]:
+        info = cached.cache_info()
+        return info.hits, info.misses
+
+    return counts
+
+
+def publish() -> None:
+    """Write this process's scrape-time readings to the multiprocess files.
+
+    Cache counts are added as the increase since the last publish.
+    """
+    if not MULTIPROCESS:
+        return
+
+    with _publish_lock:
+        for index, size in list(_index_readers.items()):
+            index_size.labels(index).set(size())
+        for name, counts in list(_caches.caches.items()):
+            hit, miss = counts()
+            last_hit, last_miss = _published_caches.get(name, (0, 0))
+            # lru_cache counts restart when the cache is cleared
+            _cache_hits.labels(name).inc(max(0, hit - last_hit))
+            _cache_misses.labels(name).inc(max(0, miss - last_miss))
+            _published_caches[name] = (hit, miss)
+
+
+def start_publisher() -> None:
+    """Publish scrape-time readings every METRICS_INDEX_TTL_S (on startup)."""
+    if not MULTIPROCESS:
+        return
+
+    def run() -> None:
+        while not _publisher_stop.wait(settings.metrics_index_ttl_s):
+            publish()
+
+    _publisher_stop.clear()
+    threading.Thread(target=run, name="metrics-publisher", daemon=True).start()
+
+
+def stop_publisher() -> None:
+    """Stop publishing and drop this worker's live gauges (on shutdown)."""
+    if not MULTIPROCESS:
+        return
+
+    _publisher_stop.set()
+    multiprocess.mark_process_dead(os.getpid())
+
+
+def render() -> bytes:
+    """Metrics for GET /metrics: of every worker in multiprocess mode."""
+    if not MULTIPROCESS:
+        return generate_latest()
+
+    publish()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
@@ -0,0 +1,445 @@
+"""Index and session state shared between uvicorn worker processes.
+
+A local SQLite database (WAL mode) holds the current chunks, their
+embeddings, the document catalog and conversation messages, plus an
+append-only change log.
+Every worker still serves queries from its own in-memory indexes; it
+publishes its writes to the log and, before handling a request, applies
+changes published by other workers since its last sync.
+
+Note:
+- Vectors themselves live in the (shared) vector store; the copy kept
+  here only feeds per-document routing centroids
+- Old log entries are trimmed; a worker that falls behind reloads fully
+- Index writes hold a lock across workers (`write_lock`), so the
+  near-duplicate check of one worker sees every chunk another published
+"""
+
+import fcntl
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import (
+    Callable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import numpy as np
+from app.config import settings
+from app.models.ingestion import Chunk, DocumentStats
+
+# Change log entries kept before trimming
+_LOG_RETENTION = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id TEXT PRIMARY KEY,
+    doc_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    vector BLOB
+);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    origin TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    doc_id TEXT,
+    chunk_ids TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL DEFAULT '',
+    last_active REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_active ON sessions (last_active);
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+class StoredChunk(NamedTuple):
+    """A chunk with its embedding, if one was published."""
+
+    chunk: Chunk
+    vector: Optional[np.ndarray]
+
+
+class Change(NamedTuple):
+    """A change published by another worker.
+
+    `kind` is "upsert" (chunks added or updated), "remove" (a document
+    was removed; `removed` lists deleted chunk IDs) or "reload" (the
+    log was trimmed past this worker; `chunks` is the full state).
+    """
+
+    kind: str
+    doc_id: Optional[str]
+    removed: List[str]
+    chunks: List[StoredChunk]
+
+
+class SharedState:
+    """SQLite-backed chunk state, change log and session messages."""
+
+    def __init__(self, path: Path) -> None:
+        """Configure the store; the database opens on first use."""
+        self.path = path
+        self.origin = str(os.getpid())
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._last_seq = 0
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Return the (lazily opened) connection."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=30,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """Hold the index write lock shared by every worker process."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def publish_chunks(
+        self,
+        chunks: List[Chunk],
+        vectors: Optional[Sequence[Sequence[float]]] = None,
+    ) -> None:
+        """Store chunks (and embeddings, when given) and log an upsert."""
+        if not chunks:
+            return
+
+        rows = [
+            (
+                chunk.chunk_id,
+                chunk.doc_id,
+                chunk.model_dump_json(),
+                None if vectors is None else _pack(vectors[i]),
+            )
+            for i, chunk in enumerate(chunks)
+        ]
+        with self._lock, self._transaction():
+            self.conn.executemany(
+                """
+                INSERT INTO chunks (chunk_id, doc_id, data, vector)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (chunk_id) DO UPDATE SET
+                    doc_id = excluded.doc_id,
+                    data = excluded.data,
+                    vector = COALESCE(excluded.vector, chunks.vector)
+                """,
+                rows,
+            )
+            self._log("upsert", None, [chunk.chunk_id for chunk in chunks])
+
+    def publish_removal(
+        self,
+        doc_id: str,
+        removed: List[str],
+        updated: List[Chunk],
+    ) -> None:
+        """Delete a document's chunks and log the removal."""
+        with self._lock, self._transaction():
+            self.conn.executemany(
+                "DELETE FROM chunks WHERE chunk_id = ?",
+                [(chunk_id,) for chunk_id in removed],
+            )
+            self._log("remove", doc_id, removed)
+
+        # Re-owned canonical chunks follow as a normal upsert
+        self.publish_chunks(updated)
+
+    def has_changes(self) -> bool:
+        """Cheaply check whether anything was published since the last poll."""
+        with self._lock:
+            (last,) = self.conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM changes"
+            ).fetchone()
+            return last > self._last_seq
+
+    def poll(self) -> List[Change]:
+        """Return changes published by other workers since the last poll."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT COALESCE(MIN(seq), 0), COALESCE(MAX(seq), 0) FROM changes"
+            ).fetchone()
+            first, last = row
+            if last <= self._last_seq:
+                return []
+
+            if self._last_seq == 0 or self._last_seq < first - 1:
+                # First sync, or entries we never saw were trimmed
+                self._last_seq = last
+                return [Change("reload", None, [], self._load_chunks())]
+
+            entries = self.conn.execute(
+                """
+                SELECT seq, origin, kind, doc_id, chunk_ids FROM changes
+                WHERE seq > ? AND seq <= ? ORDER BY seq
+                """,
+                (self._last_seq, last),
+            ).fetchall()
+            self._last_seq = last
+
+            changes: List[Change] = []
+            for _, origin, kind, doc_id, chunk_ids in entries:
+                if origin == self.origin:
+                    continue
+                ids = chunk_ids.split(",") if chunk_ids else []
+                if kind == "remove":
+                    changes.append(Change(kind, doc_id, ids, []))
+                else:
+                    changes.append(Change(kind, None, [], self._load_chunks(ids)))
+
+            return changes
+
+    def load_chunks(self) -> List[StoredChunk]:
+        """Return every stored chunk."""
+        with self._lock:
+            return self._load_chunks()
+
+    def publish_document(self, stats: DocumentStats) -> None:
+        """Store a document's catalog entry."""
+        with self._lock:
+            self.conn.execute(
+                """
+                INSERT INTO documents (doc_id, data) VALUES (?, ?)
+                ON CONFLICT (doc_id) DO UPDATE SET data = excluded.data
+                """,
+                (stats.doc_id, stats.model_dump_json()),
+            )
+
+    def delete_document(self, doc_id: str) -> None:
+        """Delete a document's catalog entry."""
+        with self._lock:
+            self.conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+
+    def load_documents(self) -> List[DocumentStats]:
+        """Return every document's catalog entry."""
+        with self._lock:
+            rows = self.conn.execute("SELECT data FROM documents").fetchall()
+        return [DocumentStats.model_validate_json(data) for (data,) in rows]
+
+    def append_message(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        keep: int,
+        compact: Callable[[str, List[Tuple[str, str]]], str],
+    ) -> int:
+        """Append a conversation message, keeping the last `keep`.
+
+        Trimmed messages are folded into the session summary by
+        `compact(summary, trimmed)` in the same transaction, so concurrent
+        appends from other workers cannot lose each other's updates.
+
+        Returns:
+            Number of messages trimmed.
+        """
+        with self._lock, self._transaction():
+            self.conn.execute(
+                "INSERT INTO messages (session_id, role, content) VALUES (?, ?, ?)",
+                (session_id, role, content),
+            )
+            self._touch(session_id)
+            trimmed = self.conn.execute(
+                """
+                SELECT id, role, content FROM messages WHERE session_id = ?
+                AND id NOT IN (
+                    SELECT id FROM messages WHERE session_id = ?
+                    ORDER BY id DESC LIMIT ?
+                )
+                ORDER BY id
+                """,
+                (session_id, session_id, keep),
+            ).fetchall()
+            if not trimmed:
+                return 0
+
+            self.conn.executemany(
+                "DELETE FROM messages WHERE id = ?",
+                [(row[0],) for row in trimmed],
+            )
+            (summary,) = self.conn.execute(
+                "SELECT summary FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            summary = compact(summary, [(role, text) for _, role, text in trimmed])
+            self.conn.execute(
+                "UPDATE sessions SET summary = ? WHERE session_id = ?",
+                (summary, session_id),
+            )
+        return len(trimmed)
+
+    def get_session(self, session_id: str) -> Tuple[str, List[Tuple[str, str]]]:
+        """Return a session's summary and messages (role, content), oldest first."""
+        with self._lock, self._transaction():
+            row = self.conn.execute(
+                "SELECT summary FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            rows = self.conn.execute(
+                "SELECT role, content FROM messages WHERE session_id = ? ORDER BY id",
+                (session_id,),
+            ).fetchall()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE sessions SET last_active = ? WHERE session_id = ?",
+                    (time.time(), session_id),
+                )
+        return (row[0] if row else ""), [(role, content) for role, content in rows]
+
+    def clear_session(self, session_id: str) -> None:
+        """Delete a session's messages."""
+        with self._lock, self._transaction():
+            self.conn.execute(
+                "DELETE FROM messages WHERE session_id = ?", (session_id,)
+            )
+            self.conn.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+            )
+
+    def expire_sessions(self, max_sessions: int, ttl_s: float) -> Tuple[int, int]:
+        """Delete idle sessions, then the least recently active overflow.
+
+        Returns:
+            Number of (expired, evicted) sessions.
+        """
+        with self._lock, self._transaction():
+            expired = self._drop_sessions(
+                "SELECT session_id FROM sessions WHERE last_active < ?",
+                (time.time() - ttl_s,),
+            )
+            evicted = self._drop_sessions(
+                """
+                SELECT session_id FROM sessions ORDER BY last_active DESC
+                LIMIT -1 OFFSET ?
+                """,
+                (max_sessions,),
+            )
+        return expired, evicted
+
+    def session_stats(self) -> Tuple[int, int, int]:
+        """Return (sessions, messages, bytes of message and summary text)."""
+        with self._lock:
+            sessions, summary_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(summary AS BLOB))), 0) "
+                "FROM sessions"
+            ).fetchone()
+            messages, message_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(content AS BLOB))), 0) "
+                "FROM messages"
+            ).fetchone()
+        return sessions, messages, summary_bytes + message_bytes
+
+    def _touch(self, session_id: str) -> None:
+        """Mark a session active now (in a transaction)."""
+        self.conn.execute(
+            """
+            INSERT INTO sessions (session_id, last_active) VALUES (?, ?)
+            ON CONFLICT (session_id) DO UPDATE SET last_active = excluded.last_active
+            """,
+            (session_id, time.time()),
+        )
+
+    def _drop_sessions(self, select: str, params: tuple) -> int:
+        """Delete the sessions a query selects (in a transaction)."""
+        ids = [(row[0],) for row in self.conn.execute(select, params).fetchall()]
+        self.conn.executemany("DELETE FROM messages WHERE session_id = ?", ids)
+        self.conn.executemany("DELETE FROM sessions WHERE session_id = ?", ids)
+        return len(ids)
+
+    def _log(self, kind: str, doc_id: Optional[str], chunk_ids: List[str]) -> None:
+        """Append a change log entry and trim old ones (in a transaction)."""
+        cursor = self.conn.execute(
+            "INSERT INTO changes (origin, kind, doc_id, chunk_ids) VALUES (?, ?, ?, ?)",
+            (self.origin, kind, doc_id, ",".join(chunk_ids)),
+        )
+        self.conn.execute(
+            "DELETE FROM changes WHERE seq <= ?",
+            (cursor.lastrowid - _LOG_RETENTION,),
+        )
+        if cursor.lastrowid == self._last_seq + 1:
+            # Nothing from other workers in between; no need to poll it back
+            self._last_seq = cursor.lastrowid
+
+    def _load_chunks(self, chunk_ids: Optional[List[str]] = None) -> List[StoredChunk]:
+        """Read chunks by ID (skipping since-deleted ones), or all chunks."""
+        if chunk_ids is None:
+            rows = self.conn.execute("SELECT data, vector FROM chunks").fetchall()
+        else:
+            rows = []
+            for start in range(0, len(chunk_ids), 500):
+                batch = chunk_ids[start : start + 500]
+                rows += self.conn.execute(
+                    "SELECT data, vector FROM chunks WHERE chunk_id IN "
+                    f"({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+
+        return [
+            StoredChunk(
+                chunk=Chunk.model_validate_json(data),
+                vector=None if vector is None else np.frombuffer(vector, np.float32),
+            )
+            for data, vector in rows
+        ]
+
+    def _transaction(self):
+        """Return a context manager wrapping one write transaction."""
+        return _Transaction(self.conn)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK on an autocommit connection."""
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self.conn = conn
+
+    def __enter__(self) -> None:
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def _pack(vector: Sequence[float]) -> bytes:
+    """Serialize an embedding as float32 bytes."""
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+shared_state: Optional[SharedState] = (
+    SharedState(Path(settings.state_path)) if settings.shared_state else None
+)
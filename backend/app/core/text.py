@@ -0,0 +1,8 @@
+"""Text tokenization shared by the lexical indexes."""
+
+from typing import List
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase whitespace tokens, as indexed by BM25 and document routing."""
+    return text.lower().split()
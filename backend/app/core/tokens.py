@@ -0,0 +1,68 @@
+"""Token counting and per-model prompt budgets.
+
+tiktoken downloads its BPE files on first use and caches them under
+TIKTOKEN_CACHE_DIR (the Docker image bakes them in). When a file is
+neither cached nor downloadable, counts fall back to a character
+estimate instead of failing requests.
+"""
+
+import math
+from functools import lru_cache
+from typing import Optional
+
+import tiktoken
+from app.config import settings
+from app.core.metrics import lru_counts, register_cache
+
+# Encoding for models tiktoken does not know (gpt-oss uses an o200k variant)
+_DEFAULT_ENCODING = "o200k_base"
+
+# Characters per token without a tokenizer; errs towards overcounting
+_CHARS_PER_TOKEN = 3
+
+
+@lru_cache(maxsize=8)
+def get_encoding(model: str = settings.default_model) -> Optional[tiktoken.Encoding]:
+    """Return the tokenizer for a model, falling back to o200k_base.
+
+    Returns None if its BPE file cannot be loaded (offline, no cache).
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model.split("/")[-1])
+        except KeyError:
+            return tiktoken.get_encoding(_DEFAULT_ENCODING)
+    except (OSError, ValueError):
+        # Download failed (requests errors are OSErrors) or bad checksum
+        return None
+
+
+register_cache("tokenizer", lru_counts(get_encoding))
+
+
+def count_tokens(text: str, model: str = settings.default_model) -> int:
+    """Count the tokens `text` takes up in a prompt for `model`."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / _CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def context_budget(model: str = settings.default_model) -> int:
+    """Return the retrieved-context token budget for a model."""
+    return settings.model_context_budgets.get(model, settings.context_budget_tokens)
+
+
+def truncate_tokens(
+    text: str,
+    max_tokens: int,
+    model: str = settings.default_model,
+) -> str:
+    """Cut `text` down to its first `max_tokens` tokens."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text[: max_tokens * _CHARS_PER_TOKEN]
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
@@ -0,0 +1,312 @@
+"""Lightweight request tracing: nested timed spans per request.
+
+A request opens a root span with `trace`; code along its path opens
+child spans with `span`, which outside a traced request only feed the
+stage latency metric.
+Finished traces go to the configured exporters on a background thread:
+- "json": one JSON object per trace appended to TRACE_JSON_PATH
+- "otlp": OTLP/HTTP JSON posted to OTLP_ENDPOINT, readable by any
+  OpenTelemetry collector
+Requests slower than SLOW_QUERY_MS are also written, with every span's
+timing and attributes (query, candidate counts), to SLOW_QUERY_LOG_PATH.
+
+Note:
+- The current span follows contextvars; work handed to a thread pool
+  or another event loop must carry the context (`copy_context`, `attach`)
+- A span still running when its trace is exported (a recall stage
+  dropped on timeout) is reported as unfinished, ending with the trace
+"""
+
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import httpx
+from app.config import settings
+from app.core.metrics import stage_seconds
+from app.models.api import SpanTiming
+
+Attribute = Union[str, int, float, bool]
+
+# Finished traces waiting for the exporter thread; dropped beyond this
+_EXPORT_QUEUE_MAX = 1024
+
+_SERVICE_NAME = "atlasrag-backend"
+
+
+class Span:
+    """One timed operation, its attributes and child spans."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "children",
+        "start",
+        "end",
+        "epoch_ns",
+        "status",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Attribute]] = None,
+    ) -> None:
+        """Start a span, as a child of `parent` or as a new trace."""
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes: Dict[str, Attribute] = dict(attributes or {})
+        self.children: List[Span] = []
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        # Wall-clock start, derived from the root's so the tree stays consistent
+        if parent is None:
+            self.epoch_ns = time.time_ns()
+        else:
+            self.epoch_ns = parent.epoch_ns + int((self.start - parent.start) * 1e9)
+        self.status = "ok"
+
+    def set(self, **attributes: Attribute) -> None:
+        """Add or overwrite attributes."""
+        self.attributes.update(attributes)
+
+    @property
+    def duration_ms(self) -> float:
+        """Elapsed milliseconds (so far, if still running)."""
+        end = time.perf_counter() if self.end is None else self.end
+        return (end - self.start) * 1000
+
+
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    """Return the innermost open span, if the request is traced."""
+    return _current.get()
+
+
+def attach(parent: Optional[Span]) -> None:
+    """Make `parent` current in this context (e.g. a task on another loop)."""
+    _current.set(parent)
+
+
+def annotate(**attributes: Attribute) -> None:
+    """Set attributes on the current span, if any."""
+    current = _current.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+@contextmanager
+def span(name: str, **attributes: Attribute) -> Iterator[Optional[Span]]:
+    """Time a block as a child of the current span.
+
+    Outside a traced request only the stage latency metric is recorded.
+    """
+    parent = _current.get()
+    if parent is None:
+        start = time.perf_counter()
+        try:
+            yield None
+        finally:
+            stage_seconds.labels(name).observe(time.perf_counter() - start)
+        return
+
+    child = Span(name, parent, attributes)
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as exc:
+        child.status = _status(exc)
+        raise
+    finally:
+        child.end = time.perf_counter()
+        _current.reset(token)
+        stage_seconds.labels(name).observe(child.end - child.start)
+
+
+@contextmanager
+def trace(name: str, **attributes: Attribute) -> Iterator[Span]:
+    """Time a request as a root span, exporting it when the block ends."""
+    root = Span(name, None, attributes)
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as exc:
+        root.status = _status(exc)
+        raise
+    finally:
+        root.end = time.perf_counter()
+        _current.reset(token)
+        _export(root)
+
+
+def _status(exc: BaseException) -> str:
+    if isinstance(exc, asyncio.CancelledError):
+        return "cancelled"
+    return "error"
+
+
+def span_timings(root: Span) -> List[SpanTiming]:
+    """Flatten a trace depth-first, with offsets from the root's start."""
+    timings: List[SpanTiming] = []
+
+    def visit(node: Span, depth: int) -> None:
+        timings.append(
+            SpanTiming(
+                name=node.name,
+                depth=depth,
+                start_ms=round((node.start - root.start) * 1000, 3),
+                duration_ms=round(node.duration_ms, 3),
+                status=node.status if node.end is not None else "unfinished",
+                attributes=node.attributes,
+            )
+        )
+        for child in list(node.children):
+            visit(child, depth + 1)
+
+    visit(root, 0)
+    return timings
+
+
+# Exporters
+
+
+_exports: "queue.Queue[Span]" = queue.Queue(maxsize=_EXPORT_QUEUE_MAX)
+_exporter: Optional[threading.Thread] = None
+_exporter_lock = threading.Lock()
+
+
+def _export(root: Span) -> None:
+    """Hand a finished trace to the exporter thread (dropped if backed up)."""
+    slow = 0 < settings.slow_query_ms <= root.duration_ms
+    if not settings.trace_exporters and not slow:
+        return
+
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = threading.Thread(
+                target=_export_forever,
+                name="trace-exporter",
+                daemon=True,
+            )
+            _exporter.start()
+
+    try:
+        _exports.put_nowait(root)
+    except queue.Full:
+        pass
+
+
+def _export_forever() -> None:
+    """Write finished traces to every configured destination."""
+    client = httpx.Client(timeout=5.0)
+    while True:
+        root = _exports.get()
+        timings = span_timings(root)
+        try:
+            if "json" in settings.trace_exporters:
+                _append_json(Path(settings.trace_json_path), _json_trace(root, timings))
+            if "otlp" in settings.trace_exporters and settings.otlp_endpoint:
+                client.post(settings.otlp_endpoint, json=_otlp_trace(root))
+            if 0 < settings.slow_query_ms <= root.duration_ms:
+                _append_json(
+                    Path(settings.slow_query_log_path),
+                    _json_trace(root, timings),
+                )
+        except (OSError, httpx.HTTPError):
+            # Tracing never fails a request; a lost trace is acceptable
+            continue
+
+
+def _append_json(path: Path, record: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def _json_trace(root: Span, timings: List[SpanTiming]) -> Dict[str, Any]:
+    """Local JSON form: the request, its total time and every span."""
+    return {
+        "trace_id": root.trace_id,
+        "name": root.name,
+        "timestamp": root.epoch_ns / 1e9,
+        "duration_ms": round(root.duration_ms, 3),
+        "status": root.status,
+        "attributes": root.attributes,
+        "spans": [timing.model_dump() for timing in timings],
+    }
+
+
+def _otlp_trace(root: Span) -> Dict[str, Any]:
+    """OTLP/HTTP JSON export request for one trace."""
+    end_ns = root.epoch_ns + int(root.duration_ms * 1e6)
+    spans: List[Dict[str, Any]] = []
+
+    def visit(node: Span) -> None:
+        start_ns = node.epoch_ns
+        if node.end is None:
+            node_end = end_ns
+        else:
+            node_end = start_ns + int(node.duration_ms * 1e6)
+        spans.append(
+            {
+                "traceId": node.trace_id,
+                "spanId": node.span_id,
+                "parentSpanId": node.parent_id or "",
+                "name": node.name,
+                "kind": 2 if node.parent_id is None else 1,  # server / internal
+                "startTimeUnixNano": str(start_ns),
+                "endTimeUnixNano": str(node_end),
+                "attributes": [
+                    {"key": key, "value": _otlp_value(value)}
+                    for key, value in node.attributes.items()
+                ],
+                # 1 = OK, 2 = ERROR
+                "status": {"code": 1 if node.status == "ok" else 2},
+            }
+        )
+        for child in list(node.children):
+            visit(child)
+
+    visit(root)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {
+                            "key": "service.name",
+                            "value": {"stringValue": _SERVICE_NAME},
+                        }
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+def _otlp_value(value: Attribute) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
@@ -0,0 +1,50 @@
+"""Throughput report: batch retrieval against a per-query loop."""
+
+import argparse
+import time
+
+from app.evaluation.test_queries import TEST_QUERIES
+from app.retrieval.retrieve import hybrid_graph_search, hybrid_graph_search_batch
+
+_TOP_K = 5
+
+
+def run_benchmark(n: int) -> None:
+    """Retrieve `n` queries one by one, then as one batch."""
+    print("\n=== Batch Retrieval Benchmark ===\n")
+
+    base = [item["query"] for item in TEST_QUERIES]
+    queries = [f"{base[i % len(base)]} ({i})" for i in range(n)]
+    print(f"Queries: {n}  top_k={_TOP_K}\n")
+
+    # Warm up models and caches
+    hybrid_graph_search(queries[0], _TOP_K)
+
+    start = time.perf_counter()
+    looped = [hybrid_graph_search(query, _TOP_K) for query in queries]
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = hybrid_graph_search_batch(queries, _TOP_K)
+    batch_seconds = time.perf_counter() - start
+
+    same = sum(
+        [sc.chunk.chunk_id for sc in a] == [sc.chunk.chunk_id for sc in b]
+        for a, b in zip(looped, batched, strict=True)
+    )
+
+    print(f"{'mode':>8} {'seconds':>8} {'queries/s':>10}")
+    print(f"{'loop':>8} {loop_seconds:>8.2f} {n / loop_seconds:>10.1f}")
+    print(f"{'batch':>8} {batch_seconds:>8.2f} {n / batch_seconds:>10.1f}")
+    print(f"\nSpeedup: {loop_seconds / batch_seconds:.1f}x")
+    print(f"Identical results: {same}/{n}")
+
+    print("\nBenchmark complete.\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=64)
+    args = parser.parse_args()
+
+    run_benchmark(args.n)
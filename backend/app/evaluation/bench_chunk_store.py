@@ -0,0 +1,122 @@
+"""Memory and hydration report: columnar chunk store against pydantic objects."""
+
+import argparse
+import random
+import time
+import tracemalloc
+import uuid
+from typing import Callable, Dict, List
+
+import numpy as np
+from app.models.ingestion import Chunk
+from app.retrieval.chunk_registry import ChunkStore
+
+_WORDS = 120
+_VOCAB = 5_000
+_ENTITIES = 2_000
+_TOP_K = 20
+
+
+def synthetic_chunks(n: int, docs: int, seed: int = 0) -> List[Chunk]:
+    """Generate chunks with realistic text length and entity counts."""
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(_VOCAB)]
+    entities = [f"concept {i}" for i in range(_ENTITIES)]
+    return [
+        Chunk(
+            chunk_id=str(uuid.UUID(int=rng.getrandbits(128))),
+            doc_id=f"doc-{i % docs}.pdf",
+            page_start=i // docs,
+            page_end=i // docs + 1,
+            text=" ".join(rng.choices(vocab, k=_WORDS)),
+            entities=rng.sample(entities, rng.randint(2, 8)),
+        )
+        for i in range(n)
+    ]
+
+
+def _traced_bytes(build: Callable[[], object]) -> tuple:
+    """Return (result, bytes allocated and still held by `build`)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def _mean_ms(run: Callable[[], object], repeats: int) -> float:
+    """Mean wall time of `run` in milliseconds."""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        run()
+    return (time.perf_counter() - start) * 1000 / repeats
+
+
+def run_benchmark(n: int, docs: int, repeats: int) -> None:
+    """Compare a dict of `Chunk` objects with `ChunkStore` over `n` chunks."""
+    print("\n=== Chunk Store Benchmark ===\n")
+    print(f"Chunks: {n:,}  Documents: {docs}  Words/chunk: {_WORDS}\n")
+
+    # Serialized payloads stand in for chunks arriving from ingestion
+    payloads = [chunk.model_dump_json() for chunk in synthetic_chunks(n, docs)]
+    text_bytes = sum(len(p) for p in payloads) / n
+
+    def build_objects() -> Dict[str, Chunk]:
+        chunks = (Chunk.model_validate_json(p) for p in payloads)
+        return {chunk.chunk_id: chunk for chunk in chunks}
+
+    def build_store() -> ChunkStore:
+        store = ChunkStore()
+        store.register(Chunk.model_validate_json(p) for p in payloads)
+        return store
+
+    objects, object_bytes = _traced_bytes(build_objects)
+    store, store_bytes = _traced_bytes(build_store)
+
+    print(f"Serialized chunk: {text_bytes:,.0f} B\n")
+    print(f"{'layout':>10} {'resident MB':>12} {'B/chunk':>9}")
+    print(f"{'objects':>10} {object_bytes / 1e6:>12.1f} {object_bytes / n:>9,.0f}")
+    print(
+        f"{'columnar':>10} {store_bytes / 1e6:>12.1f} {store_bytes / n:>9,.0f}"
+        f"  ({object_bytes / store_bytes:.1f}x smaller)\n"
+    )
+
+    rng = np.random.default_rng(0)
+    ids = list(objects)
+    sample = [ids[i] for i in rng.integers(0, n, _TOP_K)]
+    handles = store.handles(sample)
+
+    rows = [
+        (
+            f"top-{_TOP_K} lookup",
+            _mean_ms(lambda: [objects[c] for c in sample], repeats),
+            _mean_ms(lambda: store.hydrate_many(handles), repeats),
+        ),
+        (
+            "entity scan",
+            _mean_ms(lambda: [c.entities for c in objects.values()], 3),
+            _mean_ms(lambda: store.entity_lists(store.handles()), 3),
+        ),
+        (
+            "full hydrate",
+            _mean_ms(lambda: list(objects.values()), 3),
+            _mean_ms(lambda: store.hydrate_many(store.handles()), 3),
+        ),
+    ]
+
+    print(f"{'operation':>16} {'objects ms':>11} {'columnar ms':>12}")
+    for name, object_ms, store_ms in rows:
+        print(f"{name:>16} {object_ms:>11.3f} {store_ms:>12.3f}")
+
+    print("\nBenchmark complete.\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    run_benchmark(args.n, args.docs, args.repeats)
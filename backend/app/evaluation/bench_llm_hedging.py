@@ -0,0 +1,135 @@
+"""Tail latency of LLM calls with and without hedging, against the fake server.
+
+Starts app.evaluation.fake_llm_server in-process, with a model whose
+latency has a slow tail, and sends the same calls under each policy:
+no hedging, a hedge to the same model, a hedge to a faster model, and a
+failing primary with a fallback model.
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import httpx
+import numpy as np
+import uvicorn
+from app.config import settings
+from app.core.llm import llm_chat, llm_counters
+from app.evaluation.fake_llm_server import LatencyProfile, create_app
+
+_PORT = 8199
+
+
+def _start_server(profiles: Dict[str, LatencyProfile]) -> uvicorn.Server:
+    """Run the fake server on a background thread with per-model profiles."""
+    server = uvicorn.Server(
+        uvicorn.Config(
+            create_app(LatencyProfile(), seed=0),
+            port=_PORT,
+            log_level="warning",
+        )
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    for model, profile in profiles.items():
+        httpx.put(
+            f"http://127.0.0.1:{_PORT}/profiles/{model}",
+            json=profile.model_dump(),
+        ).raise_for_status()
+    return server
+
+
+def _run(model: str, calls: int, concurrency: int) -> List[float]:
+    """Latencies in ms of `calls` completions (NaN where a call failed)."""
+
+    def one(i: int) -> float:
+        start = time.perf_counter()
+        try:
+            llm_chat([{"role": "user", "content": f"question {i}"}], model=model)
+        except Exception:
+            return float("nan")
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(calls)))
+
+
+def run_benchmark(
+    calls: int,
+    concurrency: int,
+    median_ms: float,
+    tail_prob: float,
+    tail_ms: float,
+) -> None:
+    """Compare latency percentiles of each policy."""
+    print("\n=== LLM Hedging Benchmark ===\n")
+    print(
+        f"Calls: {calls}  Concurrency: {concurrency}  "
+        f"Body: {median_ms:.0f}ms  Tail: {tail_prob:.0%} at {tail_ms:.0f}ms\n"
+    )
+
+    slow = LatencyProfile(median_ms=median_ms, tail_prob=tail_prob, tail_ms=tail_ms)
+    fast = LatencyProfile(median_ms=median_ms * 0.6, sigma=0.15)
+    flaky = slow.model_copy(update={"error_rate": 0.2})
+
+    # One model name per policy, so each starts with its own latency history
+    policies = [
+        ("no hedge", "slow-a", {"llm_hedge_percentile": 0.0}),
+        ("hedge p95", "slow-b", {}),
+        ("hedge -> fast", "slow-c", {"llm_hedge_model": "fast"}),
+        ("fallback", "flaky", {"llm_fallback_models": ["fast"]}),
+    ]
+    profiles = {"fast": fast, "flaky": flaky}
+    profiles.update({model: slow for _, model, _ in policies if model != "flaky"})
+    server = _start_server(profiles)
+
+    settings.llm_base_url = f"http://127.0.0.1:{_PORT}"
+    settings.llm_hedge_delay_ms = median_ms * 2
+    defaults = {
+        "llm_hedge_percentile": 95.0,
+        "llm_hedge_model": "",
+        "llm_fallback_models": [],
+    }
+
+    print(
+        f"{'policy':>14} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'max ms':>8} {'failed':>7} {'hedged':>7} {'extra load':>11}"
+    )
+    for name, model, overrides in policies:
+        for key, value in {**defaults, **overrides}.items():
+            setattr(settings, key, value)
+
+        before = llm_counters()
+        latencies = np.array(_run(model, calls, concurrency))
+        after = llm_counters()
+
+        hedged = after["hedged"] - before["hedged"]
+        fallbacks = after["fallbacks"] - before["fallbacks"]
+        ok = latencies[~np.isnan(latencies)]
+        p50, p95, p99 = np.percentile(ok, [50, 95, 99]) if len(ok) else (0, 0, 0)
+        print(
+            f"{name:>14} {p50:>8.0f} {p95:>8.0f} {p99:>8.0f} "
+            f"{ok.max() if len(ok) else 0:>8.0f} {calls - len(ok):>7} "
+            f"{hedged / calls:>7.1%} {(hedged + fallbacks) / calls:>11.1%}"
+        )
+
+    server.should_exit = True
+    print("\nBenchmark complete.\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--median-ms", type=float, default=100.0)
+    parser.add_argument("--tail-prob", type=float, default=0.05)
+    parser.add_argument("--tail-ms", type=float, default=1500.0)
+    args = parser.parse_args()
+
+    run_benchmark(
+        args.calls, args.concurrency, args.median_ms, args.tail_prob, args.tail_ms
+    )
@@ -0,0 +1,58 @@
+"""Latency report: recall stages run one after another against side by side.
+
+Runs the recall stage over the ingested corpus for every test query,
+first with RECALL_PARALLEL off, then on, and prints per-stage wall time
+and the critical-path saving.
+"""
+
+import argparse
+
+from app.config import settings
+from app.evaluation.test_queries import TEST_QUERIES
+from app.retrieval.recall_stages import recall_stats, reset_recall_stats
+from app.retrieval.retrieve import recall_candidates
+
+_TOP_K = 5
+
+
+def run_benchmark(repeats: int) -> None:
+    """Recall every test query `repeats` times in each mode."""
+    print("\n=== Parallel Recall Benchmark ===\n")
+
+    queries = [item["query"] for item in TEST_QUERIES] * repeats
+    print(f"Queries: {len(queries)}  top_k={_TOP_K}\n")
+
+    # Warm up models, indexes and the stage pool
+    recall_candidates(queries[0], _TOP_K)
+
+    print(
+        f"{'mode':>10} {'wall ms':>8} {'serial ms':>10} {'saved ms':>9}  "
+        "stage p50/p95 ms"
+    )
+    for parallel in (False, True):
+        settings.recall_parallel = parallel
+        reset_recall_stats()
+        for query in queries:
+            recall_candidates(query, _TOP_K)
+
+        stats = recall_stats()
+        stages = "  ".join(
+            f"{s.stage} {s.p50_ms:.1f}/{s.p95_ms:.1f}"
+            + (f" ({s.timeouts} dropped)" if s.timeouts else "")
+            for s in stats.stages
+        )
+        print(
+            f"{'parallel' if parallel else 'serial':>10} "
+            f"{stats.wall_ms_mean:>8.1f} {stats.serial_ms_mean:>10.1f} "
+            f"{stats.saved_ms_mean:>9.1f}  {stages}"
+        )
+
+    print("\nBenchmark complete.\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    run_benchmark(args.repeats)
@@ -0,0 +1,91 @@
+"""Benchmark PDF extraction throughput (pages/sec) on generated PDFs."""
+
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import fitz  # PyMuPDF
+from app.ingestion.pdf_loader import _extract_range, extract_pages
+from app.models.ingestion import RawSegment
+
+_PAGE_COUNTS = (50, 200, 600)
+
+_PARAGRAPH = (
+    "Scaled dot-product attention computes weights from queries and keys, "
+    "then applies them to values. Multi-head attention runs several such "
+    "projections in parallel and concatenates the results."
+)
+
+
+def generate_pdf(path: Path, pages: int) -> None:
+    """Write a synthetic technical PDF with headings, styled spans and images."""
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 256, 256), False)
+    pixmap.clear_with(180)
+
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_htmlbox(
+            fitz.Rect(50, 50, 550, 500),
+            f"<h3>{i + 1}. Section {i + 1}</h3>"
+            f"<p>{_PARAGRAPH} <b>Bold term {i}</b> and <i>italic</i>.</p>"
+            f"<h3>{i + 1}.1 Details</h3><p>{_PARAGRAPH * 2}</p>",
+        )
+        page.insert_image(fitz.Rect(50, 520, 306, 776), pixmap=pixmap)
+    doc.save(path)
+    doc.close()
+
+
+def _legacy_extract(path: Path, doc_id: str) -> List[RawSegment]:
+    """Previous behaviour: serial full "dict" extraction including images."""
+    with fitz.open(path) as doc:
+        page_count = doc.page_count
+    return _extract_range(path, doc_id, 0, page_count, flags=fitz.TEXTFLAGS_DICT)
+
+
+def _pages_per_second(
+    extract: Callable[[], List[RawSegment]],
+    pages: int,
+) -> tuple[float, List[RawSegment]]:
+    """Time a single extraction run."""
+    start = time.perf_counter()
+    segments = extract()
+    return pages / (time.perf_counter() - start), segments
+
+
+def run_benchmark() -> None:
+    """Compare legacy, light serial and light page-parallel extraction."""
+    workers = os.cpu_count() or 1
+
+    print("\n=== PDF Extraction Benchmark (pages/sec) ===\n")
+    print(f"Parallel workers: {workers}\n")
+    print(f"{'pages':>6} {'legacy':>10} {'light':>10} {'parallel':>10} identical")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in _PAGE_COUNTS:
+            path = Path(tmp) / f"bench_{pages}.pdf"
+            generate_pdf(path, pages)
+
+            legacy, expected = _pages_per_second(
+                lambda p=path: _legacy_extract(p, "bench"), pages
+            )
+            light, serial = _pages_per_second(
+                lambda p=path: extract_pages(p, "bench", workers=1), pages
+            )
+            parallel, split = _pages_per_second(
+                lambda p=path: extract_pages(p, "bench", workers=workers), pages
+            )
+
+            identical = expected == serial == split
+            print(
+                f"{pages:>6} {legacy:>10.1f} {light:>10.1f} {parallel:>10.1f} "
+                f"{identical}"
+            )
+
+    print("\nBenchmark complete.\n")
+
+
+if __name__ == "__main__":
+    run_benchmark()
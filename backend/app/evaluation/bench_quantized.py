@@ -0,0 +1,69 @@
+"""Memory and recall report: quantized store against exact float search."""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from app.evaluation.bench_vector_backends import synthetic_embeddings
+from app.retrieval.quantized import QuantizedIndex
+
+_DIM = 384
+_K = 10
+_RESCORE_VALUES = (1, 2, 4, 8, 16)
+
+
+def run_benchmark(n: int, queries: int) -> None:
+    """Compare binary and int8 quantization over `n` vectors."""
+    print("\n=== Quantized Vector Store Benchmark ===\n")
+    print(f"Vectors: {n:,} x {_DIM}  Queries: {queries}  k={_K}\n")
+
+    data = synthetic_embeddings(n + queries, _DIM)
+    vectors, query_vectors = data[:n], data[n:]
+
+    start = time.perf_counter()
+    exact = [np.argsort(-(vectors @ q))[:_K] for q in query_vectors]
+    exact_ms = (time.perf_counter() - start) * 1000 / queries
+    truth = [set(ids.tolist()) for ids in exact]
+
+    float_mb = vectors.nbytes / 1e6
+    print(f"float32 resident: {float_mb:,.1f} MB  exact search: {exact_ms:.2f} ms\n")
+
+    print(
+        f"{'method':>16} {'resident MB':>12} {'saving':>7} "
+        f"{'recall@10':>10} {'mean ms':>8}"
+    )
+
+    for mode in ("binary", "int8"):
+        with tempfile.TemporaryDirectory() as tmp:
+            index = QuantizedIndex(Path(tmp), dim=_DIM, mode=mode)
+            index.add([str(i) for i in range(n)], vectors)
+            resident_mb = index.resident_bytes() / 1e6
+
+            for rescore in _RESCORE_VALUES:
+                index.rescore = rescore
+                latencies = []
+                recall = 0.0
+                for q, expected in zip(query_vectors, truth, strict=True):
+                    start = time.perf_counter()
+                    hits = index.search(q, _K)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    recall += len({int(label) for label, _ in hits} & expected) / _K
+
+                print(
+                    f"{f'{mode} x{rescore}':>16} {resident_mb:>12.1f} "
+                    f"{float_mb / resident_mb:>6.0f}x {recall / queries:>10.3f} "
+                    f"{np.mean(latencies):>8.2f}"
+                )
+
+    print("\nBenchmark complete.\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    run_benchmark(args.n, args.queries)
@@ -0,0 +1,145 @@
+"""Latency and recall report: Qdrant sparse+dense hybrid against Qdrant + rank_bm25.
+
+Known-item search over synthetic chunks: each query is a few words of a
+target chunk plus a noisy copy of its embedding, and recall@k counts how
+often the target comes back. Both paths fuse dense and BM25 rankings by
+reciprocal rank; they differ in where lexical search runs.
+
+Without --url the collection is a local in-memory Qdrant, whose sparse
+search is a brute-force scan: fine for checking recall, but compare
+latency against a Qdrant server.
+"""
+
+import argparse
+import random
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+from app.config import settings
+from app.core.text import tokenize
+from app.evaluation.bench_chunk_store import synthetic_chunks
+from app.evaluation.bench_vector_backends import synthetic_embeddings
+from app.retrieval.chunk_registry import register_chunks
+from app.retrieval.doc_router import document_router
+from app.retrieval.sparse import chunk_sparse_vector, query_sparse_vector
+from app.retrieval.vector_backends import QdrantVectorStore, VectorHit, _fuse
+from qdrant_client import QdrantClient
+from rank_bm25 import BM25Okapi
+
+_DIM = 384
+_K = 10
+_QUERY_WORDS = 6
+_UPSERT_BATCH = 512
+_COLLECTION = "bench_sparse_hybrid"
+
+
+def _two_path(
+    store: QdrantVectorStore,
+    bm25: BM25Okapi,
+    ids: List[str],
+    texts: List[str],
+    vectors: np.ndarray,
+) -> List[List[VectorHit]]:
+    """Dense batch search in Qdrant, BM25 in process, fused in Python."""
+    dense = store.search_batch(vectors, _K, with_payload=False)
+    fused = []
+    for text, hits in zip(texts, dense, strict=True):
+        scores = bm25.get_scores(tokenize(text))
+        top = np.argsort(-scores)[:_K]
+        lexical = [
+            VectorHit(id=ids[i], score=float(scores[i]), payload={})
+            for i in top
+            if scores[i] > 0
+        ]
+        fused.append(_fuse(hits, lexical))
+    return fused
+
+
+def _recall(results: List[List[VectorHit]], targets: List[str]) -> float:
+    """Fraction of queries whose target is in the fused top k."""
+    found = sum(
+        target in {hit.id for hit in hits[:_K]}
+        for hits, target in zip(results, targets, strict=True)
+    )
+    return found / len(targets)
+
+
+def run_benchmark(n: int, queries: int, batch: int, url: Optional[str]) -> None:
+    """Index `n` chunks both ways and compare `queries` known-item lookups."""
+    print("\n=== Sparse + Dense Hybrid Benchmark ===\n")
+    print(f"Chunks: {n:,}  Queries: {queries}  Batch: {batch}  k={_K}\n")
+
+    chunks = synthetic_chunks(n, docs=max(n // 100, 1))
+    vectors = synthetic_embeddings(n, _DIM)
+    ids = [chunk.chunk_id for chunk in chunks]
+
+    # Document-level IDF for sparse queries comes from the routing stats
+    register_chunks(chunks)
+    document_router.add_chunks(chunks)
+
+    settings.lexical_backend = "qdrant"
+    client = QdrantClient(url) if url else QdrantClient(":memory:")
+    client.delete_collection(_COLLECTION)
+    store = QdrantVectorStore(client, _COLLECTION)
+    start = time.perf_counter()
+    for i in range(0, n, _UPSERT_BATCH):
+        part = slice(i, i + _UPSERT_BATCH)
+        store.upsert(
+            ids[part],
+            vectors[part],
+            [{"doc_id": chunk.doc_id} for chunk in chunks[part]],
+            sparse=[chunk_sparse_vector(chunk.text) for chunk in chunks[part]],
+        )
+    print(f"Qdrant upsert (dense + sparse): {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    bm25 = BM25Okapi([tokenize(chunk.text) for chunk in chunks])
+    print(f"rank_bm25 build: {time.perf_counter() - start:.1f}s\n")
+
+    rng = random.Random(1)
+    picks = [rng.randrange(n) for _ in range(queries)]
+    targets = [ids[i] for i in picks]
+    texts = [" ".join(rng.sample(chunks[i].text.split(), _QUERY_WORDS)) for i in picks]
+    noise = np.random.default_rng(1).standard_normal((queries, _DIM)) * 0.08
+    query_vectors = vectors[picks] + noise.astype(np.float32)
+
+    def native(part: slice) -> List[List[VectorHit]]:
+        sparse = [query_sparse_vector(text) for text in texts[part]]
+        return store.hybrid_search_batch(
+            query_vectors[part], sparse, _K, with_payload=False
+        )
+
+    def two_path(part: slice) -> List[List[VectorHit]]:
+        return _two_path(store, bm25, ids, texts[part], query_vectors[part])
+
+    print(f"{'path':>10} {'recall@10':>10} {'ms/query':>9} {'p95 batch ms':>13}")
+    for name, run in (("two-path", two_path), ("native", native)):
+        results: List[List[VectorHit]] = []
+        latencies: Dict[int, float] = {}
+        for i in range(0, queries, batch):
+            start = time.perf_counter()
+            results += run(slice(i, i + batch))
+            latencies[i] = (time.perf_counter() - start) * 1000
+
+        total = sum(latencies.values())
+        print(
+            f"{name:>10} {_recall(results, targets):>10.3f} "
+            f"{total / queries:>9.2f} "
+            f"{np.percentile(list(latencies.values()), 95):>13.1f}"
+        )
+
+    if url:
+        client.delete_collection(_COLLECTION)
+    print("\nBenchmark complete.\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--url", help="Qdrant server URL (default: in-memory)")
+    args = parser.parse_args()
+
+    run_benchmark(args.n, args.queries, args.batch, args.url)
@@ -0,0 +1,85 @@
+"""Recall-vs-latency report: built-in HNSW index against exact search."""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from app.retrieval.hnsw import HNSWIndex
+
+_DIM = 384
+_K = 10
+_EF_VALUES = (16, 32, 64, 128, 256)
+
+
+def synthetic_embeddings(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """Generate normalized vectors with topic/subtopic cluster structure."""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((max(n // 1000, 8), dim))
+    subtopics = topics[rng.integers(0, len(topics), max(n // 50, 32))]
+    subtopics += 0.5 * rng.standard_normal(subtopics.shape)
+    vectors = subtopics[rng.integers(0, len(subtopics), n)]
+    vectors += 0.8 * rng.standard_normal(vectors.shape)
+    vectors = vectors.astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def run_benchmark(n: int, queries: int, m: int, ef_construction: int) -> None:
+    """Build an HNSW index over `n` vectors and sweep `ef`."""
+    print("\n=== Vector Backend Benchmark ===\n")
+    print(f"Vectors: {n:,} x {_DIM}  Queries: {queries}  k={_K}")
+    print(f"M={m}  ef_construction={ef_construction}\n")
+
+    data = synthetic_embeddings(n + queries, _DIM)
+    vectors, query_vectors = data[:n], data[n:]
+
+    index = HNSWIndex(_DIM, m=m, ef_construction=ef_construction)
+    start = time.perf_counter()
+    for i, vector in enumerate(vectors):
+        index.add(str(i), vector)
+    build_seconds = time.perf_counter() - start
+    print(f"HNSW build: {build_seconds:.1f}s ({n / build_seconds:,.0f} inserts/s)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        index.save(Path(tmp))
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        HNSWIndex.load(Path(tmp))
+        print(f"Persist: save {saved:.2f}s, load {time.perf_counter() - start:.2f}s\n")
+
+    start = time.perf_counter()
+    exact = [np.argsort(-(vectors @ q))[:_K] for q in query_vectors]
+    exact_ms = (time.perf_counter() - start) * 1000 / queries
+    truth = [set(ids.tolist()) for ids in exact]
+
+    print(f"{'method':>12} {'recall@10':>10} {'mean ms':>9} {'p95 ms':>8}")
+    print(f"{'exact':>12} {1.0:>10.3f} {exact_ms:>9.2f} {'-':>8}")
+
+    for ef in _EF_VALUES:
+        latencies = []
+        recall = 0.0
+        for q, expected in zip(query_vectors, truth, strict=True):
+            start = time.perf_counter()
+            hits = index.search(q, _K, ef=ef)
+            latencies.append((time.perf_counter() - start) * 1000)
+            recall += len({int(label) for label, _ in hits} & expected) / _K
+
+        print(
+            f"{f'hnsw ef={ef}':>12} {recall / queries:>10.3f} "
+            f"{np.mean(latencies):>9.2f} {np.percentile(latencies, 95):>8.2f}"
+        )
+
+    print("\nBenchmark complete.\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=100)
+    args = parser.parse_args()
+
+    run_benchmark(args.n, args.queries, args.m, args.ef_construction)
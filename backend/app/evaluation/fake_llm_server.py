@@ -0,0 +1,123 @@
+"""Local Groq/OpenAI-compatible chat server with injectable latency.
+
+Exercises hedging, timeouts, fallbacks and the circuit breaker offline:
+point LLM_BASE_URL at it. Each model answers after a latency drawn from
+its profile (a lognormal body, an optional slow tail) and fails at its
+error rate. Profiles are set on the command line for every model, or
+per model at runtime with PUT /profiles/{model}.
+
+    python -m app.evaluation.fake_llm_server --tail-prob 0.05 --tail-ms 5000
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+import uuid
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class LatencyProfile(BaseModel):
+    """Response latency distribution and error rate of a fake model."""
+
+    median_ms: float = 200.0
+    sigma: float = 0.3  # lognormal spread of the body
+    tail_prob: float = 0.0  # chance of a slow response
+    tail_ms: float = 5000.0
+    error_rate: float = 0.0
+
+    def sample_ms(self, rng: random.Random) -> float:
+        """Draw one response latency."""
+        if rng.random() < self.tail_prob:
+            return self.tail_ms * rng.uniform(0.8, 1.2)
+        return rng.lognormvariate(math.log(self.median_ms), self.sigma)
+
+
+def create_app(default: LatencyProfile, seed: Optional[int] = None) -> FastAPI:
+    """Build the fake server; models without a profile use `default`."""
+    app = FastAPI(title="Fake LLM")
+    profiles: Dict[str, LatencyProfile] = {}
+    stats = {"requests": 0, "completed": 0, "errors": 0}
+    rng = random.Random(seed)
+
+    @app.put("/profiles/{model:path}", response_model=LatencyProfile)
+    def set_profile(model: str, profile: LatencyProfile) -> LatencyProfile:
+        """Set one model's latency profile."""
+        profiles[model] = profile
+        return profile
+
+    @app.get("/stats")
+    def get_stats() -> Dict[str, int]:
+        """Return request, completion and error counts."""
+        return stats
+
+    @app.post("/openai/v1/chat/completions")
+    async def complete(request: Request) -> JSONResponse:
+        """Answer a chat completion after a sampled delay."""
+        body = await request.json()
+        model = body.get("model", "")
+        profile = profiles.get(model, default)
+        stats["requests"] += 1
+
+        await asyncio.sleep(profile.sample_ms(rng) / 1000)
+        if rng.random() < profile.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "injected failure"}},
+            )
+
+        stats["completed"] += 1
+        question = body["messages"][-1]["content"] if body.get("messages") else ""
+        content = f"[{model}] {question[:80]}"
+        return JSONResponse(
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                        "logprobs": {"content": None},
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": len(question.split()),
+                    "completion_tokens": len(content.split()),
+                    "total_tokens": len(question.split()) + len(content.split()),
+                },
+            }
+        )
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--median-ms", type=float, default=200.0)
+    parser.add_argument("--sigma", type=float, default=0.3)
+    parser.add_argument("--tail-prob", type=float, default=0.0)
+    parser.add_argument("--tail-ms", type=float, default=5000.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    profile = LatencyProfile(
+        median_ms=args.median_ms,
+        sigma=args.sigma,
+        tail_prob=args.tail_prob,
+        tail_ms=args.tail_ms,
+        error_rate=args.error_rate,
+    )
+    uvicorn.run(create_app(profile, args.seed), host=args.host, port=args.port)
@@ -0,0 +1,137 @@
+"""Document catalog: per-document statistics recorded at ingest time.
+
+Listing documents, reporting token counts and pre-checking summary size
+read the catalog instead of scanning every chunk, so they cost one entry
+per document.
+
+Note:
+- Counts cover every chunk the document produced, including ones
+  folded into a near-duplicate from another document
+- Token counts leave out the overlap each chunk repeats from the one
+  before it, as summaries send it once (`join_chunks`)
+- Entries live in the ingesting process (the one owning the writer),
+  and in shared state when workers share it
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.core.metrics import (
+    ingest_document_seconds,
+    ingested_chunks,
+    ingested_pages,
+)
+from app.core.shared_state import SharedState, shared_state
+from app.core.tokens import count_tokens
+from app.ingestion.pdf_loader import count_pages
+from app.models.ingestion import Chunk, DocumentStats
+from app.retrieval.context_packer import unshared_text
+
+
+class _Pending:
+    """Running totals for a document being ingested."""
+
+    __slots__ = ("stats", "entities", "started", "last")
+
+    def __init__(self, doc_id: str) -> None:
+        self.stats = DocumentStats(doc_id=doc_id)
+        self.entities: Set[str] = set()
+        self.started = time.perf_counter()
+        self.last: Optional[Chunk] = None  # overlaps the next chunk
+
+
+class DocumentCatalog:
+    """Per-document chunk, page, token, byte and entity counts."""
+
+    def __init__(self, state: Optional[SharedState] = None) -> None:
+        """Initialize an empty catalog, optionally backed by shared state."""
+        self.state = state
+        self._documents: Dict[str, DocumentStats] = {}
+        self._pending: Dict[str, _Pending] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, doc_id: str) -> None:
+        """Start recording a document's ingestion."""
+        with self._lock:
+            self._pending[doc_id] = _Pending(doc_id)
+
+    def add_chunks(self, chunks: Iterable[Chunk], folded: Set[str]) -> None:
+        """Count a written batch towards the documents being ingested.
+
+        Args:
+            chunks: Chunks as prepared, before near-duplicate folding.
+            folded: IDs of chunks that were folded into a canonical.
+        """
+        with self._lock:
+            for chunk in chunks:
+                pending = self._pending.get(chunk.doc_id)
+                if pending is None:
+                    continue
+                stats = pending.stats
+                stats.chunks += 1
+                stats.duplicates += chunk.chunk_id in folded
+                stats.tokens += count_tokens(unshared_text(pending.last, chunk))
+                pending.last = chunk
+                stats.text_bytes += len(chunk.text.encode())
+                pending.entities.update(chunk.entities)
+
+    def finish(self, doc_id: str, file_path: Path) -> Optional[DocumentStats]:
+        """Complete a document's entry once all its batches are written."""
+        with self._lock:
+            pending = self._pending.pop(doc_id, None)
+        if pending is None:
+            return None
+
+        stats = pending.stats
+        stats.pages = count_pages(file_path)
+        stats.file_bytes = file_path.stat().st_size
+        stats.entities = len(pending.entities)
+        stats.ingest_seconds = round(time.perf_counter() - pending.started, 3)
+        stats.ingested_at = time.time()
+        ingested_pages.inc(stats.pages)
+        ingested_chunks.inc(stats.chunks)
+        ingest_document_seconds.observe(stats.ingest_seconds)
+
+        with self._lock:
+            self._documents[doc_id] = stats
+        if self.state is not None:
+            self.state.publish_document(stats)
+        return stats
+
+    def discard(self, doc_id: str) -> None:
+        """Drop the partial entry of a document whose ingestion failed."""
+        with self._lock:
+            self._pending.pop(doc_id, None)
+
+    def remove(self, doc_id: str) -> None:
+        """Remove a document's entry."""
+        with self._lock:
+            self._pending.pop(doc_id, None)
+            self._documents.pop(doc_id, None)
+        if self.state is not None:
+            self.state.delete_document(doc_id)
+
+    def list(self) -> List[DocumentStats]:
+        """Return every ingested document's entry."""
+        if self.state is not None:
+            return self.state.load_documents()
+        with self._lock:
+            return list(self._documents.values())
+
+    def total_tokens(self, doc_ids: Optional[Iterable[str]] = None) -> Optional[int]:
+        """Sum token counts over documents (all when `doc_ids` is None).
+
+        Returns None if any selected document has no entry, e.g. one
+        ingested before the catalog existed.
+        """
+        documents = {stats.doc_id: stats for stats in self.list()}
+        selected = list(documents) if doc_ids is None else list(doc_ids)
+        if any(doc_id not in documents for doc_id in selected):
+            return None
+        return sum(documents[doc_id].tokens for doc_id in selected)
+
+
+# Global singleton instance
+document_catalog = DocumentCatalog(shared_state)
@@ -1,7 +1,7 @@
 """Chunking logic."""
 
 import uuid
-from typing import List
+from typing import Iterable, Iterator, List
 
 from app.models.ingestion import Chunk, RawSegment
 
@@ -11,8 +11,11 @@ OVERLAP_CHARS = 200
 
 def chunk_segments(segments: List[RawSegment]) -> List[Chunk]:
     """Convert RawSegments into size-bounded chunks."""
-    chunks: List[Chunk] = []
+    return list(iter_chunks(segments))
 
+
+def iter_chunks(segments: Iterable[RawSegment]) -> Iterator[Chunk]:
+    """Lazily convert RawSegments into size-bounded chunks."""
     for seg in segments:
         text = seg.text.strip()
         start = 0
@@ -21,17 +24,13 @@ def chunk_segments(segments: List[RawSegment]) -> List[Chunk]:
             end = start + MAX_CHARS
             chunk_text = text[start:end]
 
-            chunks.append(
-                Chunk(
-                    chunk_id=str(uuid.uuid4()),
-                    doc_id=seg.doc_id,
-                    page_start=seg.page,
-                    page_end=seg.page,
-                    text=chunk_text.strip(),
-                )
+            yield Chunk(
+                chunk_id=str(uuid.uuid4()),
+                doc_id=seg.doc_id,
+                page_start=seg.page,
+                page_end=seg.page,
+                text=chunk_text.strip(),
             )
 
             # move forward with overlap
             start = end - OVERLAP_CHARS
-
-    return chunks
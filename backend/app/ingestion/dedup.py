@@ -0,0 +1,196 @@
+"""Near-duplicate chunk detection (MinHash + LSH).
+
+Chunks whose word-shingle Jaccard similarity with an already indexed
+chunk reaches the threshold are folded into that canonical chunk as an
+extra source reference instead of being embedded and indexed again.
+
+Note:
+- In-memory, like the chunk registry it mirrors
+- Not thread-safe; callers hold the pipeline index lock
+"""
+
+import re
+import zlib
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from app.config import settings
+from app.models.ingestion import Chunk, ChunkSource
+
+_NUM_PERM = 128
+_BANDS = 16  # 16 bands x 8 rows: candidate threshold ≈ (1/16)^(1/8) ≈ 0.71
+_ROWS = _NUM_PERM // _BANDS
+_SHINGLE_WORDS = 3
+_PRIME = (1 << 31) - 1  # keeps a*x + b inside uint64
+
+_rng = np.random.default_rng(seed=1)
+_A = _rng.integers(1, _PRIME, size=_NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, size=_NUM_PERM, dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def minhash(text: str) -> np.ndarray:
+    """Compute the MinHash signature of a text's word shingles."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= _SHINGLE_WORDS:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {
+            " ".join(words[i : i + _SHINGLE_WORDS])
+            for i in range(len(words) - _SHINGLE_WORDS + 1)
+        }
+
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode()) % _PRIME for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+    return ((_A[:, None] * hashes[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def _band_keys(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+    """Return the LSH bucket key of every band of a signature."""
+    return [
+        (band, signature[band * _ROWS : (band + 1) * _ROWS].tobytes())
+        for band in range(_BANDS)
+    ]
+
+
+class NearDuplicateIndex:
+    """LSH index over MinHash signatures of canonical chunks."""
+
+    def __init__(self, threshold: float = 0.85) -> None:
+        """Initialize an empty index."""
+        self.threshold = threshold
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        """Return the number of canonical chunks indexed."""
+        return len(self._signatures)
+
+    def find(self, signature: np.ndarray) -> Optional[str]:
+        """Return the most similar canonical chunk above the threshold."""
+        candidates: Set[str] = set()
+        for key in _band_keys(signature):
+            candidates |= self._buckets.get(key, set())
+
+        best_id, best_score = None, self.threshold
+        for chunk_id in candidates:
+            score = float(np.mean(self._signatures[chunk_id] == signature))
+            if score >= best_score:
+                best_id, best_score = chunk_id, score
+
+        return best_id
+
+    def add(self, chunk_id: str, signature: np.ndarray) -> None:
+        """Index a canonical chunk."""
+        self._signatures[chunk_id] = signature
+        for key in _band_keys(signature):
+            self._buckets[key].add(chunk_id)
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        """Drop canonical chunks from the index."""
+        for chunk_id in chunk_ids:
+            signature = self._signatures.pop(chunk_id, None)
+            if signature is None:
+                continue
+            for key in _band_keys(signature):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(chunk_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def clear(self) -> None:
+        """Drop everything (useful for tests)."""
+        self._signatures.clear()
+        self._buckets.clear()
+
+
+near_duplicate_index = NearDuplicateIndex(threshold=settings.dedup_threshold)
+
+
+def fold_duplicates(
+    chunks: List[Chunk],
+    lookup: Callable[[str], Optional[Chunk]],
+    index: NearDuplicateIndex,
+) -> Tuple[List[Chunk], List[Chunk]]:
+    """Split a batch into new canonical chunks and updated canonicals.
+
+    Near-duplicates (against the index or earlier chunks of the same
+    batch) are appended to their canonical chunk's `sources`.
+
+    Returns:
+        (unique chunks to index, already indexed canonicals that gained sources)
+    """
+    unique: Dict[str, Chunk] = {}
+    updated: Dict[str, Chunk] = {}
+
+    for chunk in chunks:
+        signature = minhash(chunk.text)
+        canonical_id = index.find(signature)
+
+        if canonical_id is None:
+            index.add(chunk.chunk_id, signature)
+            unique[chunk.chunk_id] = chunk
+            continue
+
+        canonical = unique.get(canonical_id) or lookup(canonical_id)
+        if canonical is None:
+            # Stale signature of a chunk no longer registered
+            index.remove([canonical_id])
+            index.add(chunk.chunk_id, signature)
+            unique[chunk.chunk_id] = chunk
+            continue
+
+        canonical.sources.append(
+            ChunkSource(
+                doc_id=chunk.doc_id,
+                page_start=chunk.page_start,
+                page_end=chunk.page_end,
+            )
+        )
+        if canonical_id not in unique:
+            updated[canonical_id] = canonical
+
+    return list(unique.values()), list(updated.values())
+
+
+def release_document(
+    doc_id: str,
+    chunks: Iterable[Chunk],
+    index: NearDuplicateIndex,
+) -> Tuple[List[str], List[Chunk]]:
+    """Detach a document from canonical chunks before it is removed.
+
+    Canonical chunks owned by the document are promoted to their first
+    remaining source when other documents still reference them.
+
+    Returns:
+        (chunk IDs to delete, surviving chunks whose sources changed)
+    """
+    removed: List[str] = []
+    updated: List[Chunk] = []
+
+    for chunk in chunks:
+        remaining = [s for s in chunk.sources if s.doc_id != doc_id]
+
+        if chunk.doc_id == doc_id:
+            if not remaining:
+                removed.append(chunk.chunk_id)
+                continue
+            owner, remaining = remaining[0], remaining[1:]
+            chunk.doc_id = owner.doc_id
+            chunk.page_start = owner.page_start
+            chunk.page_end = owner.page_end
+        elif len(remaining) == len(chunk.sources):
+            continue
+
+        chunk.sources = remaining
+        updated.append(chunk)
+
+    index.remove(removed)
+    return removed, updated
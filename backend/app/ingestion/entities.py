@@ -7,6 +7,7 @@ used to build the knowledge graph.
 from typing import List, Set
 
 import spacy
+from app.core.concepts import normalize_concept
 
 NLP = spacy.load("en_core_web_sm")
 
@@ -25,12 +26,28 @@ def extract_entities(text: str) -> List[str]:
     Strategy:
     - spaCy named entities (filtered)
     - noun chunks (2–4 tokens)
-    - deduplicated, normalized
+    - deduplicated, normalized with `normalize_concept`
     """
     if not text.strip():
         return []
 
-    doc = NLP(text)
+    return _doc_concepts(NLP(text))
+
+
+def extract_entities_batch(texts: List[str]) -> List[List[str]]:
+    """Extract concepts for many texts with a single `NLP.pipe` pass."""
+    results: List[List[str]] = [[] for _ in texts]
+    indices = [i for i, text in enumerate(texts) if text.strip()]
+
+    docs = NLP.pipe(texts[i] for i in indices)
+    for i, doc in zip(indices, docs, strict=True):
+        results[i] = _doc_concepts(doc)
+
+    return results
+
+
+def _doc_concepts(doc) -> List[str]:
+    """Collect filtered entities and noun-chunk concepts from a parsed doc."""
     concepts: Set[str] = set()
 
     # 1. Named entities
@@ -38,7 +55,7 @@ def extract_entities(text: str) -> List[str]:
         if ent.label_ in _ALLOWED_LABELS:
             value = ent.text.strip()
             if 3 <= len(value) <= 60:
-                concepts.add(value)
+                concepts.add(normalize_concept(value))
 
     # 2. Noun chunks (technical phrases)
     for chunk in doc.noun_chunks:
@@ -46,6 +63,7 @@ def extract_entities(text: str) -> List[str]:
         word_count = len(value.split())
 
         if 2 <= word_count <= 4 and value[0].isupper() and not value.isnumeric():
-            concepts.add(value)
+            concepts.add(normalize_concept(value))
 
+    concepts.discard("")
     return sorted(concepts)
@@ -1,58 +1,80 @@
-"""Index document chunks into Qdrant."""
+"""Index document chunks into the configured vector store."""
 
-from typing import List
+from typing import List, Optional
 
 from app.config import settings
 from app.core.embeddings import embed_texts
+from app.core.metrics import ingested_embeddings
 from app.models.ingestion import Chunk
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
+from app.retrieval.sparse import chunk_sparse_vector
+from app.retrieval.vector_backends import get_vector_store
 
-COLLECTION_NAME = "atlasrag_chunks"
+# Payload fields beyond `doc_id`, omitted in "ids" payload mode
+CHUNK_FIELDS = ["page_start", "page_end", "text", "entities", "sources"]
 
 
-def get_qdrant_client() -> QdrantClient:
-    """Create a Qdrant client."""
-    return QdrantClient(path=settings.qdrant_path)
+def chunk_payload(chunk: Chunk, mode: Optional[str] = None) -> dict:
+    """Return the vector payload of a chunk ("full" or "ids" mode).
 
+    `mode` defaults to `settings.vector_payload`.
+    """
+    if (mode or settings.vector_payload) == "ids":
+        return {"doc_id": chunk.doc_id}
 
-def index_chunks(chunks: List[Chunk]) -> None:
-    """Embed and index chunks into Qdrant."""
-    if not chunks:
-        return
+    return {
+        "doc_id": chunk.doc_id,
+        "page_start": chunk.page_start,
+        "page_end": chunk.page_end,
+        "text": chunk.text,
+        "entities": chunk.entities,
+        "sources": [source.model_dump() for source in chunk.sources],
+    }
+
+
+def index_chunks(chunks: List[Chunk]) -> List[list[float]]:
+    """Embed and index chunks into the vector store.
 
-    client = get_qdrant_client()
+    Returns:
+        The chunk embeddings, in input order.
+    """
+    if not chunks:
+        return []
 
     texts = [chunk.text for chunk in chunks]
     vectors = embed_texts(texts)
+    ingested_embeddings.inc(len(vectors))
 
-    # Create collection if it doesn't exist
-    if not client.collection_exists(COLLECTION_NAME):
-        client.create_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(
-                size=len(vectors[0]),
-                distance=Distance.COSINE,
-            ),
-        )
-
-    points: List[PointStruct] = []
-    for chunk, vector in zip(chunks, vectors):
-        points.append(
-            PointStruct(
-                id=chunk.chunk_id,
-                vector=vector,
-                payload={
-                    "doc_id": chunk.doc_id,
-                    "page_start": chunk.page_start,
-                    "page_end": chunk.page_end,
-                    "text": chunk.text,
-                    "entities": chunk.entities,
-                },
-            )
-        )
-
-    client.upsert(
-        collection_name=COLLECTION_NAME,
-        points=points,
+    store = get_vector_store()
+    store.upsert(
+        ids=[chunk.chunk_id for chunk in chunks],
+        vectors=vectors,
+        payloads=[chunk_payload(chunk) for chunk in chunks],
+        sparse=(
+            [chunk_sparse_vector(text) for text in texts]
+            if settings.lexical_backend == "qdrant"
+            else None
+        ),
     )
+    return vectors
+
+
+def update_chunk_payloads(chunks: List[Chunk]) -> None:
+    """Refresh ownership and source references of indexed chunks."""
+    store = get_vector_store()
+
+    for chunk in chunks:
+        payload = chunk_payload(chunk)
+        # Text and entities never change for an indexed chunk
+        payload.pop("text", None)
+        payload.pop("entities", None)
+        store.set_payload(chunk.chunk_id, payload)
+
+
+def delete_points(chunk_ids: List[str]) -> None:
+    """Delete indexed points by chunk ID."""
+    get_vector_store().delete(chunk_ids)
+
+
+def delete_doc_points(doc_id: str) -> None:
+    """Delete every indexed point belonging to a document."""
+    get_vector_store().delete_doc(doc_id)
@@ -0,0 +1,315 @@
+"""Background ingestion job queue.
+
+Uploads enqueue jobs into a bounded local work queue that is drained
+by a fixed pool of worker threads, each handing its document to the
+parallel ingestor (process pool + single batched index writer).
+
+Note:
+- Job state is persisted as one JSON file per job
+- Jobs left queued or running by a restart are resumed on startup
+- With several API workers, jobs are read back from disk so any worker
+  can report them, and only one worker resumes interrupted jobs
+"""
+
+import fcntl
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.core.admission import BULK, register_stage
+from app.ingestion.parallel import ParallelIngestor
+from app.ingestion.pipeline import INGEST_STAGES, purge_document
+from app.models.ingestion import IngestionJob
+
+_QUEUE_FULL = "Ingestion queue is full, please retry later."
+
+
+class QueueFullError(Exception):
+    """Raised when the ingestion queue cannot accept more jobs."""
+
+
+class IngestionQueue:
+    """Bounded ingestion work queue with a pool of worker threads."""
+
+    def __init__(
+        self,
+        docs_dir: Path,
+        jobs_dir: Path,
+        ingestor: ParallelIngestor,
+        max_size: int = 32,
+        shared: bool = False,
+    ) -> None:
+        """Initialize the queue (workers start on `start`)."""
+        self.docs_dir = docs_dir
+        self.jobs_dir = jobs_dir
+        self.ingestor = ingestor
+        # One waiting thread per worker process keeps every core busy
+        self.workers = ingestor.processes
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=max_size)
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._resumed: Set[str] = set()
+        self.shared = shared
+        self._resume_lock = None
+        # Running jobs are admission-controlled, below the worker count if set
+        self.stage = register_stage(
+            "ingest", settings.ingest_concurrency or self.workers
+        )
+
+    def start(self) -> None:
+        """Start worker threads and resume interrupted jobs."""
+        if self._threads:
+            return
+
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self.ingestor.start()
+
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker,
+                name=f"ingest-worker-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+        if self._claim_resume():
+            self._resume()
+
+    def shutdown(self) -> None:
+        """Stop the ingestor; unfinished jobs resume on next start."""
+        self.ingestor.shutdown()
+
+    def check(self, count: int = 1) -> None:
+        """Reject `count` new jobs the queue cannot take, before any is stored.
+
+        Raises:
+            OverloadedError: If the last job would wait longer than the limit.
+            QueueFullError: If the queue has room for fewer than `count` jobs.
+        """
+        self.stage.check(BULK, extra=self._queue.qsize() + count - 1)
+        if not self._has_room(count):
+            raise QueueFullError(_QUEUE_FULL)
+
+    def submit(self, doc_id: str, filename: str) -> IngestionJob:
+        """Enqueue ingestion of an already stored PDF.
+
+        Raises:
+            OverloadedError: If the job would wait longer than the limit.
+            QueueFullError: If the queue is at capacity.
+        """
+        return self.submit_many([(doc_id, filename)])[0]
+
+    def submit_many(self, uploads: List[Tuple[str, str]]) -> List[IngestionJob]:
+        """Enqueue ingestion of already stored PDFs: all of them or none.
+
+        Args:
+            uploads: (doc_id, filename) of each stored PDF.
+
+        Raises:
+            OverloadedError: If the last job would wait longer than the limit.
+            QueueFullError: If the queue cannot take every job.
+        """
+        self.check(len(uploads))
+
+        now = time.time()
+        jobs = [
+            IngestionJob(
+                job_id=str(uuid.uuid4()),
+                doc_id=doc_id,
+                filename=filename,
+                progress={stage: 0.0 for stage in INGEST_STAGES},
+                created_at=now,
+                updated_at=now,
+            )
+            for doc_id, filename in uploads
+        ]
+
+        with self._lock:
+            # Submissions hold the lock, so the room checked here stays free
+            if not self._has_room(len(jobs)):
+                raise QueueFullError(_QUEUE_FULL)
+            for job in jobs:
+                self._queue.put_nowait(job.job_id)
+                self._jobs[job.job_id] = job
+                self._persist(job)
+            return [job.model_copy(deep=True) for job in jobs]
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        """Return a snapshot of a job, if known."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.model_copy(deep=True)
+
+        # Possibly submitted to another worker process
+        return self._load(self.jobs_dir / f"{job_id}.json") if self.shared else None
+
+    def list_jobs(self) -> List[IngestionJob]:
+        """Return snapshots of all known jobs, newest first."""
+        with self._lock:
+            jobs = [job.model_copy(deep=True) for job in self._jobs.values()]
+
+        if self.shared:
+            known = {job.job_id for job in jobs}
+            for path in self.jobs_dir.glob("*.json"):
+                if path.stem not in known and (job := self._load(path)) is not None:
+                    jobs.append(job)
+
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def _has_room(self, count: int) -> bool:
+        """Whether the queue can take `count` more jobs (0 = unbounded)."""
+        maxsize = self._queue.maxsize
+        return maxsize <= 0 or self._queue.qsize() + count <= maxsize
+
+    def pending(self) -> int:
+        """Return the number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def _worker(self) -> None:
+        """Drain the queue forever."""
+        while True:
+            job_id = self._queue.get()
+            try:
+                self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id: str) -> None:
+        """Run the ingestion pipeline for one job."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            resumed = job_id in self._resumed
+            self._resumed.discard(job_id)
+            self._update(job, status="running")
+
+        def on_progress(stage: str, fraction: float) -> None:
+            with self._lock:
+                job.progress[stage] = round(fraction, 4)
+                # Entity extraction reports per chunk; persist only stage edges
+                persist = job.stage != stage or fraction >= 1.0
+                job.stage = stage
+                job.updated_at = time.time()
+                if persist:
+                    self._persist(job)
+
+        file_path = self.docs_dir / f"{job.doc_id}.pdf"
+
+        try:
+            if resumed:
+                # Drop points a previous, interrupted run may have written
+                purge_document(job.doc_id)
+            # Admitted at submission; queue-wait time counts from then
+            queued_since = time.monotonic() - (time.time() - job.created_at)
+            with self.stage.slot(BULK, queued_since, force=True):
+                count, duplicates = self.ingestor.ingest(
+                    file_path,
+                    job.doc_id,
+                    progress=on_progress,
+                )
+        except Exception as e:
+            with self._lock:
+                self._update(job, status="failed", error=str(e))
+            return
+
+        with self._lock:
+            job.progress = {stage: 1.0 for stage in INGEST_STAGES}
+            self._update(
+                job,
+                status="completed",
+                chunks=count,
+                duplicates=duplicates,
+                dedup_ratio=round(duplicates / count, 4) if count else 0.0,
+            )
+
+    def _update(self, job: IngestionJob, **fields) -> None:
+        """Apply field updates and persist (caller holds the lock)."""
+        for name, value in fields.items():
+            setattr(job, name, value)
+        job.updated_at = time.time()
+        self._persist(job)
+
+    def _persist(self, job: IngestionJob) -> None:
+        """Atomically write job state to disk."""
+        path = self.jobs_dir / f"{job.job_id}.json"
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(job.model_dump_json())
+        tmp_path.replace(path)
+
+    def _claim_resume(self) -> bool:
+        """Return whether this process should resume interrupted jobs.
+
+        With several worker processes, the first to take an exclusive
+        lock on the jobs directory resumes and holds it for its lifetime.
+        """
+        if not self.shared:
+            return True
+
+        handle = (self.jobs_dir / ".resume.lock").open("w")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+
+        self._resume_lock = handle
+        return True
+
+    def _load(self, path: Path) -> Optional[IngestionJob]:
+        """Read a persisted job, or None if missing or unreadable."""
+        try:
+            return IngestionJob.model_validate_json(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _resume(self) -> None:
+        """Reload persisted jobs and re-enqueue unfinished ones."""
+        resumed: List[IngestionJob] = []
+
+        for path in sorted(self.jobs_dir.glob("*.json")):
+            job = self._load(path)
+            if job is None:
+                continue
+
+            if job.status in ("queued", "running"):
+                if not (self.docs_dir / f"{job.doc_id}.pdf").exists():
+                    job.status = "failed"
+                    job.error = "Uploaded file missing after restart."
+                else:
+                    # Stages are not idempotent; restart from the beginning
+                    job.status = "queued"
+                    job.stage = None
+                    job.progress = {stage: 0.0 for stage in INGEST_STAGES}
+                    resumed.append(job)
+
+            with self._lock:
+                if job.status == "queued":
+                    self._resumed.add(job.job_id)
+                self._jobs[job.job_id] = job
+                self._persist(job)
+
+        resumed.sort(key=lambda job: job.created_at)
+        for job in resumed:
+            # Blocking put: workers are already draining the queue
+            self._queue.put(job.job_id)
+
+
+ingestion_queue = IngestionQueue(
+    docs_dir=Path(settings.docs_path),
+    jobs_dir=Path(settings.jobs_path),
+    ingestor=ParallelIngestor(
+        processes=settings.ingest_workers,
+        batch_size=settings.ingest_batch_chunks,
+        batch_chunks=settings.index_batch_chunks,
+    ),
+    max_size=settings.ingest_queue_size,
+    shared=settings.shared_state,
+)
@@ -0,0 +1,79 @@
+"""Migrate stored vector payloads between "full" and "ids" mode.
+
+"ids" mode keeps only `doc_id` in each vector payload; chunk text and
+metadata then come from the chunk registry, which is repopulated from
+the shared state database on startup. Migrating to "ids" therefore
+first copies every full payload into the shared state, then strips the
+payloads; migrating back rewrites full payloads from the shared state.
+
+Run with the target mode's settings (VECTOR_BACKEND, QDRANT_URL or
+QDRANT_PATH, SHARED_STATE=true, STATE_PATH) while no worker is writing:
+
+    python -m app.ingestion.migrate_payloads --to ids
+
+Note:
+- Set VECTOR_PAYLOAD to the same mode afterwards, or new chunks are
+  written in the old one
+- Routing centroids need published vectors; documents never published
+  with them route on their lexical signature until re-ingested
+"""
+
+import argparse
+import sys
+import time
+
+from app.core.shared_state import shared_state
+from app.ingestion.indexing import CHUNK_FIELDS, chunk_payload
+from app.retrieval.vector_backends import get_vector_store
+from app.retrieval.vector_store import chunks_from_payloads
+
+_BATCH = 256
+
+
+def migrate_to_ids() -> None:
+    """Publish full payloads to the shared state, then strip them."""
+    store = get_vector_store()
+    published = 0
+
+    for payloads in store.scroll_payloads(_BATCH):
+        chunks = list(chunks_from_payloads(payloads).values())
+        shared_state.publish_chunks(chunks)
+        published += len(chunks)
+
+    store.drop_payload_fields(CHUNK_FIELDS)
+    store.flush()
+    print(f"Published {published:,} chunks; payloads reduced to doc_id")
+
+
+def migrate_to_full() -> None:
+    """Rewrite full payloads from the chunks kept in the shared state."""
+    store = get_vector_store()
+    chunks = [item.chunk for item in shared_state.load_chunks()]
+    restored = 0
+
+    for start in range(0, len(chunks), _BATCH):
+        batch = chunks[start : start + _BATCH]
+        indexed = store.get_payloads([chunk.chunk_id for chunk in batch])
+        for chunk in batch:
+            if chunk.chunk_id in indexed:
+                store.set_payload(chunk.chunk_id, chunk_payload(chunk, mode="full"))
+                restored += 1
+
+    store.flush()
+    print(f"Restored full payloads of {restored:,} chunks")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--to", choices=("ids", "full"), required=True)
+    args = parser.parse_args()
+
+    if shared_state is None:
+        sys.exit("Payload migration needs SHARED_STATE=true to keep chunk text.")
+
+    start = time.perf_counter()
+    if args.to == "ids":
+        migrate_to_ids()
+    else:
+        migrate_to_full()
+    print(f"Done in {time.perf_counter() - start:.1f}s")
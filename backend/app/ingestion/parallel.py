@@ -0,0 +1,276 @@
+"""Parallel multi-document ingestion.
+
+Document preparation (parsing, cleaning, chunking, concept extraction)
+runs on a process pool so several PDFs use several cores. Workers
+stream prepared chunk batches back over a bounded channel to a single
+writer thread that embeds and indexes them, merging batches of several
+documents, so Qdrant upserts and index rebuilds never contend.
+
+Note:
+- If a worker dies (e.g. OOM-killed), the documents its pool had in
+  flight fail and the pool is replaced for the ones that follow
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import threading
+import uuid
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.ingestion.catalog import document_catalog
+from app.ingestion.pipeline import abort_document, refresh_lexical_index, write_batch
+from app.ingestion.prepare import ProgressCallback, init_worker, prepare_in_worker
+from app.models.ingestion import Chunk
+
+# Pending write: (key, chunks or None for end-of-document, fraction or count)
+_WriteRequest = Tuple[str, Optional[List[Chunk]], float]
+
+# Channel slots per worker process before workers block
+_CHANNEL_SLOTS_PER_WORKER = 4
+
+# Spawn: forking a process that holds model threads is unsafe
+_SPAWN = mp.get_context("spawn")
+
+
+class ParallelIngestor:
+    """Process-pool document preparation with one batched index writer."""
+
+    def __init__(
+        self,
+        processes: int = 0,
+        batch_size: int = 64,
+        batch_chunks: int = 512,
+    ) -> None:
+        """Initialize the ingestor (pool starts on `start`).
+
+        Args:
+            processes: Worker process count, 0 for one per CPU core.
+            batch_size: Chunks per batch streamed from a worker.
+            batch_chunks: Soft cap on chunks embedded per writer batch.
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.batch_chunks = batch_chunks
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._channel = None
+        self._callbacks: Dict[str, ProgressCallback] = {}
+        self._pending: Dict[str, Future] = {}
+        self._folded: Dict[str, int] = {}
+        self._writes: "queue.Queue[_WriteRequest]" = queue.Queue(
+            maxsize=self.processes * _CHANNEL_SLOTS_PER_WORKER
+        )
+        self._lock = threading.Lock()
+        # Held by the writer per batch, so an aborted document's removal
+        # cannot interleave with a write of its batches already underway
+        self._write_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start the process pool, channel relay and writer thread.
+
+        The channel and threads outlive `shutdown`; starting again only
+        brings up a new pool.
+        """
+        with self._lock:
+            if self._pool is not None:
+                return
+
+            if self._channel is None:
+                self._channel = _SPAWN.Queue(
+                    maxsize=self.processes * _CHANNEL_SLOTS_PER_WORKER
+                )
+                threading.Thread(
+                    target=self._relay, name="ingest-relay", daemon=True
+                ).start()
+                threading.Thread(
+                    target=self._write_batches, name="ingest-writer", daemon=True
+                ).start()
+
+            self._pool = self._new_pool()
+
+    def shutdown(self) -> None:
+        """Stop the process pool, cancelling documents not yet started."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        """Create a worker pool feeding the channel (under the lock)."""
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=_SPAWN,
+            initializer=init_worker,
+            initargs=(self._channel,),
+        )
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Swap a pool whose worker died for a fresh one."""
+        with self._lock:
+            if self._pool is not broken:
+                # Already replaced, or shut down
+                return
+            self._pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, *args: object) -> Tuple[ProcessPoolExecutor, Future]:
+        """Hand a document to a worker, replacing a broken pool first.
+
+        Returns:
+            The pool the document went to, and its future.
+        """
+        if self._pool is None:
+            self.start()
+        pool = self._pool
+        try:
+            return pool, pool.submit(prepare_in_worker, *args)
+        except BrokenProcessPool:
+            # Broken by an earlier document; this one never reached it
+            self._replace_pool(pool)
+            pool = self._pool
+            return pool, pool.submit(prepare_in_worker, *args)
+
+    def ingest(
+        self,
+        file_path: Path,
+        doc_id: str,
+        progress: Optional[ProgressCallback] = None,
+    ) -> Tuple[int, int]:
+        """Prepare a PDF in a worker process and index it as it streams.
+
+        Blocks until every batch of the document has been indexed.
+
+        Returns:
+            (chunks produced, chunks folded into near-duplicates)
+        """
+        key = str(uuid.uuid4())
+        written: Future = Future()
+        self._pending[key] = written
+        self._folded[key] = 0
+        if progress is not None:
+            self._callbacks[key] = progress
+        document_catalog.begin(doc_id)
+
+        try:
+            pool, prepared = self._submit(key, file_path, doc_id, self.batch_size)
+            try:
+                prepared.result()
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM-killed): the documents the pool
+                # had in flight fail, later ones get a new pool
+                self._replace_pool(pool)
+                raise
+            result = written.result()
+            document_catalog.finish(doc_id, file_path)
+            return result
+        except Exception as e:
+            # Let the writer drop batches still in flight for this document,
+            # then remove the ones it already wrote
+            _resolve(written, error=e)
+            with self._write_lock:
+                abort_document(doc_id)
+            raise
+        finally:
+            self._callbacks.pop(key, None)
+            self._pending.pop(key, None)
+            self._folded.pop(key, None)
+
+    def _report(self, key: str, stage: str, fraction: float) -> None:
+        """Invoke the progress callback registered for a document."""
+        callback = self._callbacks.get(key)
+        if callback is not None:
+            callback(stage, fraction)
+
+    def _relay(self) -> None:
+        """Dispatch channel messages from worker processes."""
+        while True:
+            try:
+                message = self._channel.get()
+            except (EOFError, OSError):
+                # Channel closed at interpreter exit
+                return
+            kind, key = message[0], message[1]
+
+            if kind == "progress":
+                self._report(key, message[2], message[3])
+            elif kind == "batch":
+                self._writes.put((key, message[2], message[3]))
+            elif kind == "done":
+                self._writes.put((key, None, message[2]))
+
+    def _write_batches(self) -> None:
+        """Drain pending writes, indexing several documents per batch."""
+        while True:
+            requests = [self._writes.get()]
+            size = len(requests[0][1] or ())
+
+            while size < self.batch_chunks:
+                try:
+                    request = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                requests.append(request)
+                size += len(request[1] or ())
+
+            with self._write_lock:
+                live = [
+                    request
+                    for request in requests
+                    if request[0] in self._pending
+                    and not self._pending[request[0]].done()
+                ]
+                batches = [request for request in live if request[1] is not None]
+                finished = [request for request in live if request[1] is None]
+
+                try:
+                    if batches:
+                        written = [
+                            chunk for _, chunks, _ in batches for chunk in chunks
+                        ]
+                        folded = write_batch(written)
+                        document_catalog.add_chunks(written, folded)
+                        for key, chunks, fraction in batches:
+                            self._folded[key] = self._folded.get(key, 0) + sum(
+                                chunk.chunk_id in folded for chunk in chunks
+                            )
+                            self._report(key, "index", fraction)
+
+                    if finished:
+                        refresh_lexical_index()
+                except Exception as e:
+                    for key, _, _ in live:
+                        self._fail(key, e)
+                    continue
+
+            for key, _, count in finished:
+                self._report(key, "index", 1.0)
+                self._report(key, "bm25", 1.0)
+                _resolve(
+                    self._pending.get(key),
+                    result=(int(count), self._folded.get(key, 0)),
+                )
+
+    def _fail(self, key: str, error: Exception) -> None:
+        """Fail a document's pending write."""
+        _resolve(self._pending.get(key), error=error)
+
+
+def _resolve(
+    future: Optional[Future],
+    result: object = None,
+    error: Optional[Exception] = None,
+) -> None:
+    """Complete a future unless the other side already did."""
+    if future is None:
+        return
+    try:
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
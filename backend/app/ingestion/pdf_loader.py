@@ -1,16 +1,30 @@
 """Layout-aware PDF loading utilities."""
 
+import multiprocessing as mp
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional
 
 import fitz  # PyMuPDF
+from app.config import settings
 from app.models.ingestion import RawSegment
 
 HEADING_REGEX = re.compile(r"^\d+\.\s+[A-Z].+")
 
+# "dict" extraction without TEXT_PRESERVE_IMAGES: image blocks are skipped
+# below anyway, so decoding their pixel data is wasted work
+_TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
 
-def extract_pages(file_path: Path, doc_id: str) -> List[RawSegment]:
+# Below this size, process start-up costs more than it saves
+_PARALLEL_MIN_PAGES = 64
+
+
+def extract_pages(
+    file_path: Path,
+    doc_id: str,
+    workers: Optional[int] = None,
+) -> List[RawSegment]:
     """Extract semantic text blocks from a PDF.
 
     This loader is layout-aware and heading-preserving.
@@ -19,49 +33,142 @@ def extract_pages(file_path: Path, doc_id: str) -> List[RawSegment]:
     Args:
         file_path: Path to the PDF file.
         doc_id: Unique document identifier.
+        workers: Worker processes, defaults to `settings.pdf_extract_workers`.
 
     Returns:
         List of RawSegment objects.
     """
-    doc = fitz.open(file_path)
+    return list(iter_segments(file_path, doc_id, workers=workers))
+
+
+def iter_segments(
+    file_path: Path,
+    doc_id: str,
+    workers: Optional[int] = None,
+) -> Iterator[RawSegment]:
+    """Lazily extract semantic text blocks from a PDF, in page order.
+
+    Segments never span pages, so large documents are split into
+    contiguous page ranges extracted in parallel worker processes, each
+    opening the document independently. Output is identical to a
+    serial pass.
+
+    Args:
+        file_path: Path to the PDF file.
+        doc_id: Unique document identifier.
+        workers: Worker processes, defaults to `settings.pdf_extract_workers`.
+
+    Yields:
+        RawSegment objects.
+    """
+    workers = workers or settings.pdf_extract_workers
+
+    with fitz.open(file_path) as doc:
+        page_count = doc.page_count
+        if workers <= 1 or page_count < _PARALLEL_MIN_PAGES:
+            for page_index in range(page_count):
+                yield from _page_segments(doc[page_index], doc_id, _TEXT_FLAGS)
+            return
+
+    ranges = _page_ranges(page_count, workers)
+
+    with ProcessPoolExecutor(
+        max_workers=len(ranges),
+        mp_context=mp.get_context("spawn"),
+    ) as pool:
+        futures = [
+            pool.submit(_extract_range, file_path, doc_id, start, stop)
+            for start, stop in ranges
+        ]
+        for future in futures:
+            yield from future.result()
+
+
+def count_pages(file_path: Path) -> int:
+    """Return the number of pages in a PDF."""
+    with fitz.open(file_path) as doc:
+        return doc.page_count
+
+
+def _page_ranges(page_count: int, parts: int) -> List[tuple[int, int]]:
+    """Split [0, page_count) into at most `parts` contiguous ranges."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+
+    return ranges
+
+
+def _extract_range(
+    file_path: Path,
+    doc_id: str,
+    start: int,
+    stop: int,
+    flags: int = _TEXT_FLAGS,
+) -> List[RawSegment]:
+    """Open a PDF and extract segments for pages [start, stop)."""
+    with fitz.open(file_path) as doc:
+        return _extract_doc_range(doc, doc_id, start, stop, flags)
+
+
+def _extract_doc_range(
+    doc: fitz.Document,
+    doc_id: str,
+    start: int,
+    stop: int,
+    flags: int = _TEXT_FLAGS,
+) -> List[RawSegment]:
+    """Extract segments for pages [start, stop) of an open document."""
     segments: List[RawSegment] = []
-    for page_index, page in enumerate(doc):
-        blocks = page.get_text("dict")["blocks"]
-        current_block: list[str] = []
-        page_number = page_index + 1
-
-        for block in blocks:
-            # Skip non-text blocks (images, drawings, etc.)
-            if block["type"] != 0:
-                continue
+    for page_index in range(start, stop):
+        segments.extend(_page_segments(doc[page_index], doc_id, flags))
+    return segments
+
 
-            for line in block["lines"]:
-                line_text = " ".join(span["text"] for span in line["spans"]).strip()
+def _page_segments(page: fitz.Page, doc_id: str, flags: int) -> List[RawSegment]:
+    """Extract heading-delimited segments from a single page."""
+    segments: List[RawSegment] = []
+    blocks = page.get_text("dict", flags=flags)["blocks"]
+    current_block: list[str] = []
+    page_number = page.number + 1
 
-                if not line_text:
-                    continue
+    for block in blocks:
+        # Skip non-text blocks (images, drawings, etc.)
+        if block["type"] != 0:
+            continue
 
-                # New heading → flush previous block
-                if HEADING_REGEX.match(line_text) and current_block:
-                    segments.append(
-                        RawSegment(
-                            doc_id=doc_id,
-                            page=page_number,
-                            text="\n".join(current_block),
-                        )
-                    )
-                    current_block = []
+        for line in block["lines"]:
+            line_text = " ".join(span["text"] for span in line["spans"]).strip()
 
-                current_block.append(line_text)
+            if not line_text:
+                continue
 
-        if current_block:
-            segments.append(
-                RawSegment(
-                    doc_id=doc_id,
-                    page=page_number,
-                    text="\n".join(current_block),
+            # New heading → flush previous block
+            if HEADING_REGEX.match(line_text) and current_block:
+                segments.append(
+                    RawSegment(
+                        doc_id=doc_id,
+                        page=page_number,
+                        text="\n".join(current_block),
+                    )
                 )
+                current_block = []
+
+            current_block.append(line_text)
+
+    if current_block:
+        segments.append(
+            RawSegment(
+                doc_id=doc_id,
+                page=page_number,
+                text="\n".join(current_block),
             )
+        )
 
-    doc.close()
     return segments
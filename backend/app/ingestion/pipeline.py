@@ -1,43 +1,307 @@
 """High-level document ingestion pipeline."""
 
+import queue
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List
+from typing import Iterator, List, Optional, Set, Tuple
 
-from app.ingestion.chunking import chunk_segments
-from app.ingestion.cleaning import clean_text
-from app.ingestion.entities import extract_entities
-from app.ingestion.indexing import index_chunks
-from app.ingestion.pdf_loader import extract_pages
-from app.models.ingestion import Chunk, RawSegment
-from app.retrieval.chunk_registry import register_chunks
-from app.retrieval.graph_utils import index_entities
-from app.retrieval.keyword_index import build_bm25_index
+from app.config import settings
+from app.core.shared_state import Change, StoredChunk, shared_state
+from app.ingestion.catalog import document_catalog
+from app.ingestion.dedup import (
+    fold_duplicates,
+    minhash,
+    near_duplicate_index,
+    release_document,
+)
+from app.ingestion.indexing import (
+    delete_doc_points,
+    delete_points,
+    index_chunks,
+    update_chunk_payloads,
+)
+from app.ingestion.prepare import ProgressCallback, iter_prepared_batches
+from app.models.ingestion import Chunk
+from app.retrieval.chunk_registry import (
+    chunk_store,
+    clear_chunks,
+    get_chunk,
+    register_chunks,
+    remove_chunks,
+)
+from app.retrieval.doc_router import document_router
+from app.retrieval.graph_utils import clear_entities, index_entities, unindex_entities
+from app.retrieval.keyword_index import build_bm25_index, clear_bm25_index
+from app.retrieval.sharding import shard_coordinator
 
+# Ordered pipeline stages, reported through the progress callback
+INGEST_STAGES = ("extract", "clean", "chunk", "entities", "index", "bm25")
 
-def ingest_pdf(file_path: Path, doc_id: str) -> List[Chunk]:
-    """Ingest a PDF document."""
-    raw_segments = extract_pages(file_path, doc_id)
-    cleaned_segments = _clean_segments(raw_segments)
+# Prepared batches buffered between parsing and embedding
+_PREFETCH_BATCHES = 2
 
-    chunks = chunk_segments(cleaned_segments)
+# Serializes writes to the shared in-memory indexes and Qdrant
+_INDEX_LOCK = threading.Lock()
 
-    for chunk in chunks:
-        chunk.entities = extract_entities(chunk.text)
 
+def ingest_pdf(
+    file_path: Path,
+    doc_id: str,
+    progress: Optional[ProgressCallback] = None,
+) -> Tuple[int, int]:
+    """Ingest a PDF document.
+
+    Preparation runs on a background thread feeding a small bounded
+    queue, so embedding and indexing one batch overlaps with parsing
+    the next, and only a few batches are ever in flight. If ingestion
+    fails, the batches already written are removed again.
+
+    Args:
+        file_path: Path to the stored PDF.
+        doc_id: Unique document identifier.
+        progress: Optional callback receiving per-stage progress.
+
+    Returns:
+        (chunks produced, chunks folded into near-duplicates)
+    """
+    report = progress or _no_progress
+    batches: queue.Queue = queue.Queue(maxsize=_PREFETCH_BATCHES)
+    stop = threading.Event()
+
+    def produce() -> None:
+        try:
+            for item in iter_prepared_batches(
+                file_path,
+                doc_id,
+                settings.ingest_batch_chunks,
+                progress=report,
+            ):
+                if not _put_until(batches, item, stop):
+                    return
+            _put_until(batches, None, stop)
+        except Exception as e:
+            _put_until(batches, e, stop)
+
+    threading.Thread(target=produce, name=f"ingest-{doc_id}", daemon=True).start()
+    document_catalog.begin(doc_id)
+
+    produced = folded_count = 0
+    try:
+        while (item := batches.get()) is not None:
+            if isinstance(item, Exception):
+                raise item
+
+            batch, fraction = item
+            folded = write_batch(batch)
+            document_catalog.add_chunks(batch, folded)
+            report("index", fraction)
+            produced += len(batch)
+            folded_count += len(folded)
+    except Exception:
+        abort_document(doc_id)
+        raise
+    finally:
+        stop.set()
+
+    report("index", 1.0)
+    refresh_lexical_index()
+    report("bm25", 1.0)
+    document_catalog.finish(doc_id, file_path)
+    return produced, folded_count
+
+
+def write_batch(chunks: List[Chunk]) -> Set[str]:
+    """Register, embed and index a batch of prepared chunks.
+
+    Chunks of several documents may be written in one call so that
+    embedding and the Qdrant upsert run as a single batch. Near-duplicate
+    chunks are folded into their canonical chunk and not indexed.
+
+    Returns:
+        IDs of the chunks that were folded.
+    """
+    if shard_coordinator.enabled:
+        return shard_coordinator.write_batch(chunks)
+
+    with _INDEX_LOCK, _exclusive_write():
+        unique, updated = chunks, []
+        if settings.dedup_enabled:
+            unique, updated = fold_duplicates(chunks, get_chunk, near_duplicate_index)
+
+        # Canonicals come back from the store as copies; write them back
+        register_chunks(unique + updated)
+        index_entities(unique)
+        vectors = index_chunks(unique)
+        update_chunk_payloads(updated)
+        document_router.add_chunks(unique, vectors)
+        document_router.add_chunks(updated)
+
+        if shared_state is not None:
+            shared_state.publish_chunks(unique, vectors)
+            shared_state.publish_chunks(updated)
+
+    kept = {chunk.chunk_id for chunk in unique}
+    return {chunk.chunk_id for chunk in chunks if chunk.chunk_id not in kept}
+
+
+def remove_document(doc_id: str) -> int:
+    """Remove a document from the registry and every index.
+
+    Canonical chunks shared with other documents survive, re-owned by
+    one of their remaining sources.
+
+    Returns:
+        Number of chunks removed.
+    """
+    document_catalog.remove(doc_id)
+    if shard_coordinator.enabled:
+        return shard_coordinator.remove_document(doc_id)
+
+    with _INDEX_LOCK, _exclusive_write():
+        # Only chunks the document owns or is a source of are affected
+        chunks = chunk_store.hydrate_many(
+            document_router.handles([doc_id]), touch=False
+        )
+        removed, updated = release_document(doc_id, chunks, near_duplicate_index)
+        unindex_entities(chunk_store.handles(removed))
+        remove_chunks(removed)
+        register_chunks(updated)
+        delete_points(removed)
+        update_chunk_payloads(updated)
+        document_router.remove_document(doc_id)
+        build_bm25_index(chunk_store.handles())
+
+        if shared_state is not None:
+            shared_state.publish_removal(doc_id, removed, updated)
+
+    return len(removed)
+
+
+def abort_document(doc_id: str) -> None:
+    """Undo a failed ingestion: drop its catalog entry and written batches.
+
+    Batches written before the failure would otherwise stay searchable
+    by vector but not by BM25, which is only refreshed once a document
+    completes.
+    """
+    document_catalog.discard(doc_id)
+    remove_document(doc_id)
+
+
+def refresh_lexical_index() -> None:
+    """Bring BM25 up to date with every registered chunk.
+
+    Only chunks not indexed yet are tokenized, but the idf statistics
+    are corpus-wide, so this runs once per document rather than once
+    per batch.
+    """
+    if shard_coordinator.enabled:
+        shard_coordinator.refresh_lexical_index()
+        return
+
+    with _INDEX_LOCK:
+        build_bm25_index(chunk_store.handles())
+
+
+def purge_document(doc_id: str) -> None:
+    """Delete a document's vectors without consulting the chunk registry.
+
+    Used before re-ingesting after a restart, when the registry no longer
+    knows which points an interrupted run wrote.
+    """
+    document_catalog.remove(doc_id)
+    if shard_coordinator.enabled:
+        shard_coordinator.purge_document(doc_id)
+        return
+
+    if shared_state is not None:
+        # Shared chunk state survives restarts; drop what was published too
+        remove_document(doc_id)
+    delete_doc_points(doc_id)
+
+
+def sync_shared_state() -> None:
+    """Apply index changes published by other worker processes."""
+    if shared_state is None or not shared_state.has_changes():
+        return
+
+    with _INDEX_LOCK:
+        _apply_changes()
+
+
+@contextmanager
+def _exclusive_write() -> Iterator[None]:
+    """Keep other workers from writing until this write is published.
+
+    Changes they published before are applied first, so near-duplicate
+    folding and removals work on the current chunks (`_INDEX_LOCK` held).
+    """
+    if shared_state is None:
+        yield
+        return
+
+    with shared_state.write_lock():
+        _apply_changes()
+        yield
+
+
+def _apply_changes() -> None:
+    """Apply published changes not seen yet (lock held)."""
+    changes = shared_state.poll()
+    for change in changes:
+        _apply_change(change)
+    if changes:
+        build_bm25_index(chunk_store.handles())
+
+
+def _apply_change(change: Change) -> None:
+    """Apply one published change to the local indexes (lock held)."""
+    if change.kind == "remove":
+        unindex_entities(chunk_store.handles(change.removed))
+        remove_chunks(change.removed)
+        near_duplicate_index.remove(change.removed)
+        document_router.remove_document(change.doc_id)
+        return
+
+    if change.kind == "reload":
+        clear_chunks()
+        clear_entities()
+        clear_bm25_index()
+        near_duplicate_index.clear()
+        document_router.clear()
+
+    _apply_chunks(change.chunks)
+
+
+def _apply_chunks(stored: List[StoredChunk]) -> None:
+    """Register published chunks in the local indexes."""
+    chunks = [item.chunk for item in stored]
     register_chunks(chunks)
     index_entities(chunks)
-    index_chunks(chunks)
-    build_bm25_index(chunks)
-    return chunks
-
-
-def _clean_segments(segments: List[RawSegment]) -> List[RawSegment]:
-    """Apply text cleaning."""
-    return [
-        RawSegment(
-            doc_id=s.doc_id,
-            page=s.page,
-            text=clean_text(s.text),
-        )
-        for s in segments
-    ]
+
+    with_vectors = [item for item in stored if item.vector is not None]
+    document_router.add_chunks(
+        [item.chunk for item in with_vectors],
+        [item.vector for item in with_vectors],
+    )
+    document_router.add_chunks([item.chunk for item in stored if item.vector is None])
+
+    if settings.dedup_enabled:
+        for chunk in chunks:
+            near_duplicate_index.add(chunk.chunk_id, minhash(chunk.text))
+
+
+def _put_until(target: queue.Queue, item: object, stop: threading.Event) -> bool:
+    """Put onto a bounded queue, giving up once `stop` is set."""
+    while not stop.is_set():
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _no_progress(stage: str, fraction: float) -> None:
+    """Discard progress updates."""
@@ -0,0 +1,139 @@
+"""CPU-bound document preparation stages.
+
+Parsing, cleaning, chunking and concept extraction need no shared
+state, so they can run in worker processes. This module deliberately
+avoids importing the embedding model and the in-memory indexes to keep
+worker start-up cheap.
+
+Stages are generators (extract → clean → chunk → entities) and chunks
+leave in fixed-size batches, so memory held by a document in flight is
+bounded by the batch size rather than the document size.
+"""
+
+from itertools import islice
+from multiprocessing.queues import Queue
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from app.ingestion.chunking import iter_chunks
+from app.ingestion.cleaning import clean_text
+from app.ingestion.entities import extract_entities_batch
+from app.ingestion.pdf_loader import count_pages, iter_segments
+from app.models.ingestion import Chunk, RawSegment
+
+# (stage, fraction complete in [0, 1])
+ProgressCallback = Callable[[str, float], None]
+
+# (chunks, fraction of pages they cover through)
+PreparedBatch = Tuple[List[Chunk], float]
+
+# Minimum progress delta forwarded from worker processes
+_PROGRESS_STEP = 0.05
+
+_channel: Optional[Queue] = None
+
+
+def iter_prepared_batches(
+    file_path: Path,
+    doc_id: str,
+    batch_size: int,
+    progress: Optional[ProgressCallback] = None,
+) -> Iterator[PreparedBatch]:
+    """Stream a PDF through extract → clean → chunk → entities in batches.
+
+    Stage progress is measured in pages: a stage is at `p / page_count`
+    once it has emitted output for page `p`.
+
+    Yields:
+        Annotated chunk batches of at most `batch_size` chunks, together
+        with the fraction of pages they complete.
+    """
+    report = progress or _no_progress
+    page_count = max(count_pages(file_path), 1)
+
+    def track(stage: str, segments: Iterable[RawSegment]) -> Iterator[RawSegment]:
+        for segment in segments:
+            report(stage, segment.page / page_count)
+            yield segment
+
+    segments = track("extract", iter_segments(file_path, doc_id))
+    cleaned = track("clean", _clean_segments(segments))
+    chunks = iter_chunks(cleaned)
+
+    for batch in _batched(chunks, batch_size):
+        fraction = batch[-1].page_end / page_count
+        report("chunk", fraction)
+
+        for chunk, entities in zip(
+            batch,
+            extract_entities_batch([chunk.text for chunk in batch]),
+            strict=True,
+        ):
+            chunk.entities = entities
+        report("entities", fraction)
+
+        yield batch, fraction
+
+    for stage in ("extract", "clean", "chunk", "entities"):
+        report(stage, 1.0)
+
+
+def init_worker(channel: Queue) -> None:
+    """Process pool initializer: keep the channel back to the parent."""
+    global _channel
+    _channel = channel
+
+
+def prepare_in_worker(
+    key: str,
+    file_path: Path,
+    doc_id: str,
+    batch_size: int,
+) -> int:
+    """Process pool entry point streaming batches back over the channel.
+
+    Messages are `("progress", key, stage, fraction)`,
+    `("batch", key, chunks, fraction)` and a final `("done", key, count)`.
+    The channel is bounded, so a slow indexer applies backpressure here.
+
+    Returns:
+        Number of chunks produced.
+    """
+    last: dict = {}
+
+    def forward(stage: str, fraction: float) -> None:
+        previous = last.get(stage)
+        if previous is None or fraction >= 1.0 or fraction - previous >= _PROGRESS_STEP:
+            last[stage] = fraction
+            _channel.put(("progress", key, stage, fraction))
+
+    count = 0
+    for batch, fraction in iter_prepared_batches(
+        file_path, doc_id, batch_size, progress=forward
+    ):
+        _channel.put(("batch", key, batch, fraction))
+        count += len(batch)
+
+    _channel.put(("done", key, count))
+    return count
+
+
+def _batched(items: Iterable[Chunk], size: int) -> Iterator[List[Chunk]]:
+    """Group an iterable into lists of at most `size` items."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _no_progress(stage: str, fraction: float) -> None:
+    """Discard progress updates."""
+
+
+def _clean_segments(segments: Iterable[RawSegment]) -> Iterator[RawSegment]:
+    """Apply text cleaning."""
+    for s in segments:
+        yield RawSegment(
+            doc_id=s.doc_id,
+            page=s.page,
+            text=clean_text(s.text),
+        )
@@ -1,15 +1,51 @@
 """Main FastAPI application for AtlasRAG backend."""
 
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from app.api.routes_chat import router as chat_router
 from app.api.routes_chat_langchain import router as chat_langchain_router
 from app.api.routes_docs import router as docs_router
-from fastapi import FastAPI
+from app.api.routes_retrieve import router as retrieve_router
+from app.core.admission import OverloadedError
+from app.core.llm import LLMUnavailableError
+from app.core.metrics import render, request_seconds, start_publisher, stop_publisher
+from app.core.shared_state import shared_state
+from app.ingestion.jobs import ingestion_queue
+from app.ingestion.pipeline import sync_shared_state
+from app.retrieval.chunk_registry import chunk_store
+from app.retrieval.sharding import ShardError, shard_coordinator
+from app.retrieval.vector_backends import get_vector_store
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start background services for the lifetime of the app."""
+    chunk_store.open()
+    sync_shared_state()
+    shard_coordinator.start()
+    ingestion_queue.start()
+    start_publisher()
+    yield
+    stop_publisher()
+    ingestion_queue.shutdown()
+    shard_coordinator.shutdown()
+    get_vector_store().flush()
+    chunk_store.close()
+
 
 app = FastAPI(
     title="AtlasRAG Backend",
     version="0.0.0",
     description="Backend API for AtlasRAG multi-document research assistant.",
+    lifespan=lifespan,
 )
 
 # CORS enabled for all origins
@@ -21,7 +57,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def apply_shared_changes(request: Request, call_next) -> Response:
+    """Catch up with uploads and deletes made through other workers."""
+    if shared_state is not None:
+        await run_in_threadpool(sync_shared_state)
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next) -> Response:
+    """Record request latency by route template (not raw path).
+
+    The time runs until the last body chunk is sent, so streamed answers
+    are timed to completion rather than to their headers.
+    """
+    start = time.perf_counter()
+
+    def observe(status: int) -> None:
+        route = request.scope.get("route")
+        request_seconds.labels(
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(status),
+        ).observe(time.perf_counter() - start)
+
+    try:
+        response = await call_next(request)
+    except Exception:
+        observe(500)
+        raise
+
+    async def timed_body(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            observe(response.status_code)
+
+    response.body_iterator = timed_body(response.body_iterator)
+    return response
+
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable(request: Request, exc: LLMUnavailableError) -> Response:
+    """Answer 503 while every LLM is failing or has an open circuit."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, round(exc.retry_after_s)))},
+    )
+
+
+@app.exception_handler(OverloadedError)
+async def overloaded(request: Request, exc: OverloadedError) -> Response:
+    """Answer 429 when a stage's queue cannot take the request in time."""
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "stage": exc.stage},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after_s)))},
+    )
+
+
+@app.exception_handler(ShardError)
+async def shard_unavailable(request: Request, exc: ShardError) -> Response:
+    """Answer 503 when the shards a request needs are down."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    """Prometheus metrics, aggregated over workers in multiprocess mode."""
+    return Response(render(), media_type=CONTENT_TYPE_LATEST)
+
+
 # Include routers
 app.include_router(chat_router, prefix="/chat")
 app.include_router(docs_router, prefix="/docs")
 app.include_router(chat_langchain_router, prefix="/chat")
+app.include_router(retrieve_router, prefix="/retrieve")
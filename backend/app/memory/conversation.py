@@ -1,40 +1,237 @@
-"""Short-term conversation memory."""
+"""Short-term conversation memory.
 
-from collections import defaultdict, deque
-from typing import Deque, Dict, List, Tuple
+Sessions keep their last `max_turns` turns verbatim; older messages are
+compacted into a short rolling summary rather than dropped, so query
+rewriting keeps earlier context at a bounded token cost. Idle sessions
+expire after SESSION_TTL_S, and the least recently used are evicted
+beyond SESSION_MAX (in shared state, checked every few seconds rather
+than on every message).
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Iterable, List, Tuple
+
+from app.config import settings
+from app.core.shared_state import SharedState, shared_state
+from app.core.tokens import count_tokens, truncate_tokens
+from app.models.api import SessionStats
 
 # Each message: (role, content)
 Message = Tuple[str, str]
 
 _MAX_TURNS = 4
 
+# Role under which the rolling summary is prepended to the history
+SUMMARY_ROLE = "summary"
+
+# Tokens kept from each compacted message
+_LINE_TOKENS = 40
+
+# Minimum seconds between expiry sweeps of the shared session store
+_EXPIRE_INTERVAL_S = 10.0
+
+
+def compact_messages(summary: str, messages: Iterable[Message]) -> str:
+    """Fold messages into a rolling summary, oldest lines dropped first.
+
+    Each message is reduced to its first sentence (capped at a few dozen
+    tokens); the summary is capped at SESSION_SUMMARY_TOKENS.
+    """
+    lines = summary.splitlines() if summary else []
+    for role, content in messages:
+        first = re.split(r"(?<=[.!?])\s+", content.strip(), maxsplit=1)[0]
+        lines.append(f"{role}: {truncate_tokens(first, _LINE_TOKENS)}")
+
+    while lines and count_tokens("\n".join(lines)) > settings.session_summary_tokens:
+        lines.pop(0)
+
+    return "\n".join(lines)
+
+
+class _Session:
+    """One session's recent messages and compacted summary."""
+
+    __slots__ = ("messages", "summary", "last_active", "nbytes")
+
+    def __init__(self, max_messages: int) -> None:
+        self.messages: Deque[Message] = deque(maxlen=max_messages)
+        self.summary = ""
+        self.last_active = time.monotonic()
+        self.nbytes = 0
+
+    def history(self) -> List[Message]:
+        history = list(self.messages)
+        if self.summary:
+            history.insert(0, (SUMMARY_ROLE, self.summary))
+        return history
+
 
 class ConversationMemory:
-    """In-memory short-term conversation history."""
+    """In-memory short-term conversation history, bounded and thread-safe."""
 
-    def __init__(self, max_turns: int = _MAX_TURNS) -> None:
+    def __init__(
+        self,
+        max_turns: int = _MAX_TURNS,
+        max_sessions: int = settings.session_max,
+        ttl_s: int = settings.session_ttl_s,
+    ) -> None:
         """Initialize conversation memory store."""
         self.max_turns = max_turns
-        self._store: Dict[str, Deque[Message]] = defaultdict(
-            lambda: deque(maxlen=max_turns * 2),
-        )
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self._store: "OrderedDict[str, _Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._expired = 0
+        self._evicted = 0
+        self._compacted = 0
+
+    def add_user_message(self, session_id: str, content: str) -> None:
+        """Add a user message to memory."""
+        self._append(session_id, ("user", content))
+
+    def add_assistant_message(self, session_id: str, content: str) -> None:
+        """Add an assistant message to memory."""
+        self._append(session_id, ("assistant", content))
+
+    def get_history(self, session_id: str) -> List[Message]:
+        """Return conversation history for a session.
+
+        A compacted summary of older turns, if any, comes first.
+        """
+        with self._lock:
+            self._expire()
+            session = self._store.get(session_id)
+            if session is None:
+                return []
+            self._store.move_to_end(session_id)
+            session.last_active = time.monotonic()
+            return session.history()
+
+    def clear(self, session_id: str) -> None:
+        """Clear conversation history for a session."""
+        with self._lock:
+            self._store.pop(session_id, None)
+
+    def stats(self) -> SessionStats:
+        """Return live session counts, memory use and eviction counts."""
+        with self._lock:
+            self._expire()
+            return SessionStats(
+                sessions=len(self._store),
+                messages=sum(len(s.messages) for s in self._store.values()),
+                memory_bytes=sum(s.nbytes for s in self._store.values()),
+                max_sessions=self.max_sessions,
+                ttl_s=self.ttl_s,
+                expired=self._expired,
+                evicted=self._evicted,
+                compacted=self._compacted,
+            )
+
+    def _append(self, session_id: str, message: Message) -> None:
+        """Append a message, compacting the one it pushes out."""
+        with self._lock:
+            self._expire()
+            session = self._store.get(session_id)
+            if session is None:
+                session = self._store[session_id] = _Session(self.max_turns * 2)
+                while len(self._store) > self.max_sessions:
+                    self._store.popitem(last=False)
+                    self._evicted += 1
+            else:
+                self._store.move_to_end(session_id)
+
+            if len(session.messages) == session.messages.maxlen:
+                session.summary = compact_messages(
+                    session.summary, [session.messages[0]]
+                )
+                self._compacted += 1
+
+            session.messages.append(message)
+            session.last_active = time.monotonic()
+            session.nbytes = len(session.summary.encode()) + sum(
+                len(content.encode()) for _, content in session.messages
+            )
+
+    def _expire(self) -> None:
+        """Drop sessions idle past the TTL (oldest first; under the lock)."""
+        deadline = time.monotonic() - self.ttl_s
+        while self._store:
+            session_id, session = next(iter(self._store.items()))
+            if session.last_active > deadline:
+                break
+            del self._store[session_id]
+            self._expired += 1
+
+
+class SharedConversationMemory(ConversationMemory):
+    """Conversation history kept in shared state, visible to every worker."""
+
+    def __init__(self, state: SharedState, max_turns: int = _MAX_TURNS) -> None:
+        """Initialize memory on top of a shared state store."""
+        super().__init__(max_turns)
+        self.state = state
+        self._swept_at = float("-inf")
 
     def add_user_message(self, session_id: str, content: str) -> None:
         """Add a user message to memory."""
-        self._store[session_id].append(("user", content))
+        self._append_shared(session_id, "user", content)
 
     def add_assistant_message(self, session_id: str, content: str) -> None:
         """Add an assistant message to memory."""
-        self._store[session_id].append(("assistant", content))
+        self._append_shared(session_id, "assistant", content)
 
     def get_history(self, session_id: str) -> List[Message]:
-        """Return conversation history for a session."""
-        return list(self._store.get(session_id, []))
+        """Return conversation history for a session.
+
+        A compacted summary of older turns, if any, comes first.
+        """
+        summary, history = self.state.get_session(session_id)
+        if summary:
+            history.insert(0, (SUMMARY_ROLE, summary))
+        return history
 
     def clear(self, session_id: str) -> None:
         """Clear conversation history for a session."""
-        self._store.pop(session_id, None)
+        self.state.clear_session(session_id)
+
+    def stats(self) -> SessionStats:
+        """Return live session counts, memory use and eviction counts."""
+        sessions, messages, nbytes = self.state.session_stats()
+        return SessionStats(
+            sessions=sessions,
+            messages=messages,
+            memory_bytes=nbytes,
+            max_sessions=self.max_sessions,
+            ttl_s=self.ttl_s,
+            expired=self._expired,
+            evicted=self._evicted,
+            compacted=self._compacted,
+        )
+
+    def _append_shared(self, session_id: str, role: str, content: str) -> None:
+        """Append a message, compacting the ones trimmed from the window."""
+        trimmed = self.state.append_message(
+            session_id, role, content, self.max_turns * 2, compact_messages
+        )
+        with self._lock:
+            self._compacted += trimmed
+            now = time.monotonic()
+            if now - self._swept_at < _EXPIRE_INTERVAL_S:
+                return
+            self._swept_at = now
+
+        expired, evicted = self.state.expire_sessions(self.max_sessions, self.ttl_s)
+        with self._lock:
+            self._expired += expired
+            self._evicted += evicted
 
 
 # Global singleton instance
-conversation_memory = ConversationMemory()
+conversation_memory = (
+    SharedConversationMemory(shared_state)
+    if shared_state is not None
+    else ConversationMemory()
+)
@@ -1,6 +1,6 @@
 """Pydantic models for API request and response bodies."""
 
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel
 
@@ -23,8 +23,59 @@ class Citation(BaseModel):
     snippet: str
 
 
+class ContextStats(BaseModel):
+    """Schema for how retrieved passages were packed into the prompt."""
+
+    tokens: int
+    raw_tokens: int
+    tokens_saved: int
+    passages: int
+    dropped: int
+
+
+class SpanTiming(BaseModel):
+    """Schema for one traced span, flattened depth-first."""
+
+    name: str
+    depth: int
+    start_ms: float  # offset from the start of the request
+    duration_ms: float
+    status: str
+    attributes: Dict[str, Union[bool, int, float, str]] = {}
+
+
 class ChatResponse(BaseModel):
     """Schema for LLM-generated assistant response."""
 
     answer: str
     citations: list[Citation]
+    context: Optional[ContextStats] = None
+    timings: Optional[List[SpanTiming]] = None  # with debug=timings
+
+
+class StageStats(BaseModel):
+    """Schema for one admission-controlled stage's load and queue waits."""
+
+    stage: str
+    limit: int
+    active: int
+    queued: int
+    admitted: int
+    rejected: int
+    wait_ms_mean: float
+    wait_ms_p95: float
+    hold_ms: float
+    estimated_wait_ms: float
+
+
+class SessionStats(BaseModel):
+    """Schema for conversation session store size and eviction counts."""
+
+    sessions: int
+    messages: int
+    memory_bytes: int
+    max_sessions: int
+    ttl_s: int
+    expired: int
+    evicted: int
+    compacted: int
@@ -1,6 +1,6 @@
 """Pydantic models for ingestion artifacts."""
 
-from typing import List
+from typing import Dict, List, Literal, Optional, Set
 
 from pydantic import BaseModel, Field
 
@@ -13,6 +13,14 @@ class RawSegment(BaseModel):
     text: str
 
 
+class ChunkSource(BaseModel):
+    """A further location whose text was folded into a canonical chunk."""
+
+    doc_id: str
+    page_start: int
+    page_end: int
+
+
 class Chunk(BaseModel):
     """Represents a semantically meaningful chunk of a document."""
 
@@ -22,3 +30,40 @@ class Chunk(BaseModel):
     page_end: int
     text: str
     entities: List[str] = Field(default_factory=list)
+    sources: List[ChunkSource] = Field(default_factory=list)
+
+    def source_doc_ids(self) -> Set[str]:
+        """Return every document this chunk's text appears in."""
+        return {self.doc_id, *(source.doc_id for source in self.sources)}
+
+
+class IngestionJob(BaseModel):
+    """Represents a queued background ingestion of one uploaded document."""
+
+    job_id: str
+    doc_id: str
+    filename: str
+    status: Literal["queued", "running", "completed", "failed"] = "queued"
+    stage: Optional[str] = None
+    progress: Dict[str, float] = Field(default_factory=dict)
+    chunks: int = 0
+    duplicates: int = 0
+    dedup_ratio: float = 0.0
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+
+class DocumentStats(BaseModel):
+    """Per-document statistics recorded when the document is ingested."""
+
+    doc_id: str
+    chunks: int = 0
+    duplicates: int = 0
+    pages: int = 0
+    tokens: int = 0
+    text_bytes: int = 0
+    file_bytes: int = 0
+    entities: int = 0
+    ingest_seconds: float = 0.0
+    ingested_at: Optional[float] = None
@@ -1,7 +1,13 @@
 """Pydantic models for API request and response bodies."""
 
+from typing import List, Literal, Optional
+
 from app.models.ingestion import Chunk
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, conlist
+
+# Bounds of one batch retrieval request (queries, final chunks per query)
+MAX_BATCH_QUERIES = 256
+MAX_BATCH_TOP_K = 50
 
 
 class KeywordSearchRequest(BaseModel):
@@ -16,3 +22,65 @@ class ScoredChunk(BaseModel):
 
     chunk: Chunk
     score: float
+
+
+class BatchRetrieveRequest(BaseModel):
+    """Schema for a multi-query retrieval request body."""
+
+    queries: conlist(str, min_length=1, max_length=MAX_BATCH_QUERIES)
+    top_k: int = Field(5, ge=1, le=MAX_BATCH_TOP_K)
+    doc_ids: Optional[List[str]] = None
+
+
+class BatchRetrieveResponse(BaseModel):
+    """Schema for multi-query retrieval results, in query order."""
+
+    results: List[List[ScoredChunk]]
+
+
+class RecallStageStats(BaseModel):
+    """Schema for one recall stage's wall time and timeouts."""
+
+    stage: str
+    runs: int
+    timeouts: int
+    p50_ms: float
+    p95_ms: float
+
+
+class RecallStats(BaseModel):
+    """Schema for recall stage timings and the critical-path saving."""
+
+    parallel: bool
+    passes: int
+    wall_ms_mean: float
+    serial_ms_mean: float  # sum of stage times
+    saved_ms_mean: float
+    stages: List[RecallStageStats]
+
+
+class ShardStats(BaseModel):
+    """Schema for one retrieval shard's size and recall latency."""
+
+    shard: int
+    alive: bool
+    documents: int
+    chunks: int
+    queries: int
+    recall_p50_ms: float
+    recall_p95_ms: float
+    recall_max_ms: float
+    round_trip_p95_ms: float
+
+
+class DocumentMemory(BaseModel):
+    """Schema for one document's resident and offloaded chunk storage."""
+
+    doc_id: str
+    chunks: int
+    tier: Literal["hot", "cold"]
+    resident_bytes: int
+    offloaded_bytes: int
+    index_bytes: int = 0  # BM25 and concept index entries; never offloaded
+    accesses: int
+    idle_s: Optional[float] = None  # seconds since last query access
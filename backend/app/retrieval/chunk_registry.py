@@ -3,29 +3,608 @@
 Single source of truth for all ingested chunks.
 Used by graph-based retrieval to map entities back to chunks.
 
+Chunks are stored column-wise rather than as one pydantic object each:
+
+- every chunk gets a stable integer handle, used by the other indexes
+- doc index, page_start and page_end live in typed arrays
+- all text sits in one UTF-8 buffer addressed by offset and length
+- doc IDs and entity strings are interned once
+
+`Chunk` objects are only materialized (`hydrate`) at the API boundary.
+
+With a memory budget, chunk text is tiered per document: documents are
+kept in least-recently-used order, and once resident text exceeds the
+budget the coldest documents' text moves to a memory-mapped file under
+`tier_path`. Reads go through the mapping transparently; a query-path
+access (`hydrate`, `lookup`) loads the document back into RAM.
+Offloading runs on a background thread that writes tier files without
+holding the store lock, so queries never wait on disk writes.
+
 Note:
-- Ephemeral by design (non-persistent)
+- Ephemeral by design (non-persistent); tier files are scratch space
 - Rebuilt on each ingestion cycle
+- Handles are never reused; removed chunks leave a tombstone
+- Columns and entities stay resident; only text is offloaded
+- The keyword and concept indexes are outside the budget too; their
+  per-document share is passed in to `memory_usage`
 """
 
-from typing import Dict, List
+import itertools
+import mmap
+import os
+import shutil
+import threading
+import time
+from array import array
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import settings
+from app.core.metrics import register_cache, register_index
+from app.models.ingestion import Chunk, ChunkSource
+from app.models.retrieval import DocumentMemory
+
+# Compact the buffers once this fraction of their bytes is garbage
+_COMPACT_RATIO = 0.3
+
+# Resident column bytes per chunk (doc, pages, text and entity offsets)
+_COLUMN_BYTES = 4 + 4 + 4 + 8 + 4 + 8 + 4
+
+# (doc index, page_start, page_end) of a folded-in source
+_Source = Tuple[int, int, int]
+
+
+class ChunkStore:
+    """Columnar chunk storage addressed by integer handles."""
+
+    def __init__(self, budget_bytes: int = 0, path: Optional[Path] = None) -> None:
+        """Initialize an empty store.
+
+        Args:
+            budget_bytes: Resident text budget; 0 keeps everything in RAM.
+            path: Directory for offloaded text (required with a budget).
+        """
+        self.budget_bytes = budget_bytes
+        self.path = path
+        self._lock = threading.RLock()
+        self._cold: Dict[int, mmap.mmap] = {}
+        self._tier_hits = 0  # accesses to documents resident in RAM
+        self._tier_misses = 0  # accesses that reloaded an offloaded document
+        self._versions = itertools.count(1)  # never reset, unlike doc indexes
+        self._offloading = False  # a background offload is running
+        self._clear()
+
+    def _clear(self) -> None:
+        """Drop every chunk and interned string."""
+        self._drop_tier_files()
+        self._ids: List[Optional[str]] = []
+        self._handles: Dict[str, int] = {}
+
+        self._doc_names: List[str] = []
+        self._doc_index: Dict[str, int] = {}
+        self._docs = array("i")
+        self._page_start = array("i")
+        self._page_end = array("i")
+
+        self._text = bytearray()
+        self._text_offset = array("q")
+        self._text_length = array("i")
+
+        self._entity_names: List[str] = []
+        self._entity_index: Dict[str, int] = {}
+        self._entity_pool = array("i")
+        self._entity_offset = array("q")
+        self._entity_count = array("i")
+
+        # Only the few canonical chunks with folded duplicates have sources
+        self._sources: Dict[int, List[_Source]] = {}
+        self._garbage = 0
+
+        # Per-document tiering state, keyed by doc index
+        self._doc_handles: Dict[int, Set[int]] = defaultdict(set)
+        self._doc_bytes: Dict[int, int] = defaultdict(int)
+        self._recency: OrderedDict = OrderedDict()  # least recently used first
+        self._accesses: Dict[int, int] = defaultdict(int)
+        self._last_access: Dict[int, float] = {}
+        self._resident = 0  # text bytes of documents kept in RAM
+        self._version: Dict[int, int] = {}  # changes when a doc's chunks do
+        self._keep: Set[int] = set()  # just written or read; not offloaded
+
+    def __len__(self) -> int:
+        """Return the number of live chunks."""
+        return len(self._handles)
+
+    def register(self, chunks: Iterable[Chunk]) -> List[int]:
+        """Add or replace chunks; returns their handles."""
+        with self._lock:
+            handles = [self._register(chunk) for chunk in chunks]
+            self._enforce_budget({self._docs[h] for h in handles})
+            return handles
+
+    def remove(self, chunk_ids: Iterable[str]) -> None:
+        """Remove chunks, leaving tombstoned handles."""
+        with self._lock:
+            for chunk_id in chunk_ids:
+                handle = self._handles.pop(chunk_id, None)
+                if handle is None:
+                    continue
+                self._ids[handle] = None
+                self._sources.pop(handle, None)
+                if self._docs[handle] not in self._cold:
+                    self._garbage += self._text_length[handle]
+                self._detach(handle)
+                self._text_length[handle] = 0
+                self._entity_count[handle] = 0
+
+            if self._garbage > _COMPACT_RATIO * max(len(self._text), 1 << 16):
+                self._compact()
+
+    def clear(self) -> None:
+        """Drop everything."""
+        with self._lock:
+            self._clear()
+
+    def open(self) -> None:
+        """Prepare the tier directory (on startup).
+
+        Deletes files left over from an earlier process with the same PID.
+        """
+        with self._lock:
+            if self.path is not None:
+                shutil.rmtree(self.path, ignore_errors=True)
+
+    def close(self) -> None:
+        """Release offloaded text files (on shutdown)."""
+        with self._lock:
+            self._clear()
+            if self.path is not None:
+                shutil.rmtree(self.path, ignore_errors=True)
+
+    def handle(self, chunk_id: str) -> Optional[int]:
+        """Return a chunk's handle, or None if not registered."""
+        return self._handles.get(chunk_id)
+
+    def handles(self, chunk_ids: Optional[Iterable[str]] = None) -> List[int]:
+        """Return handles of registered chunks (all live ones by default)."""
+        with self._lock:
+            if chunk_ids is None:
+                return list(self._handles.values())
+            return [h for c in chunk_ids if (h := self._handles.get(c)) is not None]
+
+    def alive(self, handle: int) -> bool:
+        """Whether a handle still refers to a registered chunk."""
+        return 0 <= handle < len(self._ids) and self._ids[handle] is not None
+
+    def chunk_id(self, handle: int) -> str:
+        """Return the chunk ID of a live handle."""
+        return self._ids[handle]
+
+    def doc_id(self, handle: int) -> str:
+        """Return the owning document of a chunk."""
+        return self._doc_names[self._docs[handle]]
+
+    def doc_ids(self, handle: int) -> Set[str]:
+        """Return every document a chunk's text appears in."""
+        with self._lock:
+            docs = {self._doc_names[self._docs[handle]]}
+            for doc, _, _ in self._sources.get(handle, ()):
+                docs.add(self._doc_names[doc])
+            return docs
+
+    def text(self, handle: int) -> str:
+        """Return a chunk's text, reading offloaded text in place."""
+        with self._lock:
+            return self._text_bytes(handle).decode()
+
+    def entities(self, handle: int) -> List[str]:
+        """Return a chunk's entities."""
+        with self._lock:
+            start = self._entity_offset[handle]
+            pool = self._entity_pool[start : start + self._entity_count[handle]]
+            return [self._entity_names[i] for i in pool]
+
+    def entity_lists(self, handles: Iterable[int]) -> List[List[str]]:
+        """Return the entities of many chunks under one lock."""
+        with self._lock:
+            names, pool = self._entity_names, self._entity_pool
+            offsets, counts = self._entity_offset, self._entity_count
+            return [
+                [names[i] for i in pool[offsets[h] : offsets[h] + counts[h]]]
+                for h in handles
+            ]
+
+    def hydrate(self, handle: int, touch: bool = True) -> Chunk:
+        """Materialize a `Chunk` for a live handle.
+
+        With `touch`, the access counts towards the document's recency
+        and reloads it into RAM if it was offloaded.
+        """
+        with self._lock:
+            if touch:
+                self._touch(self._docs[handle])
+            return Chunk(
+                chunk_id=self._ids[handle],
+                doc_id=self._doc_names[self._docs[handle]],
+                page_start=self._page_start[handle],
+                page_end=self._page_end[handle],
+                text=self.text(handle),
+                entities=self.entities(handle),
+                sources=[
+                    ChunkSource(
+                        doc_id=self._doc_names[doc],
+                        page_start=page_start,
+                        page_end=page_end,
+                    )
+                    for doc, page_start, page_end in self._sources.get(handle, ())
+                ],
+            )
+
+    def hydrate_many(self, handles: Iterable[int], touch: bool = True) -> List[Chunk]:
+        """Materialize `Chunk` objects for live handles."""
+        with self._lock:
+            return [self.hydrate(h, touch) for h in handles if self.alive(h)]
+
+    def lookup(self, chunk_ids: Iterable[str]) -> Dict[str, Chunk]:
+        """Materialize registered chunks by ID in one pass, skipping unknown IDs."""
+        with self._lock:
+            return {
+                chunk_id: self.hydrate(handle)
+                for chunk_id in chunk_ids
+                if (handle := self._handles.get(chunk_id)) is not None
+            }
+
+    def memory_usage(
+        self, index_bytes: Optional[Callable[[int], int]] = None
+    ) -> List[DocumentMemory]:
+        """Report resident and offloaded bytes per document, hottest first.
+
+        Args:
+            index_bytes: Resident bytes other indexes hold for a handle.
+        """
+        now = time.monotonic()
+        with self._lock:
+            usage = []
+            for doc in reversed(self._recency):
+                handles = self._doc_handles[doc]
+                columns = sum(
+                    _COLUMN_BYTES + 4 * self._entity_count[h] for h in handles
+                )
+                cold = doc in self._cold
+                text = self._doc_bytes[doc]
+                last = self._last_access.get(doc)
+                index = sum(map(index_bytes, handles)) if index_bytes else 0
+                usage.append(
+                    DocumentMemory(
+                        doc_id=self._doc_names[doc],
+                        chunks=len(handles),
+                        tier="cold" if cold else "hot",
+                        resident_bytes=columns + (0 if cold else text),
+                        offloaded_bytes=text if cold else 0,
+                        index_bytes=index,
+                        accesses=self._accesses[doc],
+                        idle_s=None if last is None else round(now - last, 1),
+                    )
+                )
+            return usage
+
+    def tier_counts(self) -> Tuple[int, int]:
+        """Return document accesses served from RAM and from offloaded text."""
+        with self._lock:
+            return self._tier_hits, self._tier_misses
 
-from app.models.ingestion import Chunk
+    def nbytes(self) -> int:
+        """Approximate bytes held by the columnar buffers."""
+        arrays = (
+            self._docs,
+            self._page_start,
+            self._page_end,
+            self._text_offset,
+            self._text_length,
+            self._entity_pool,
+            self._entity_offset,
+            self._entity_count,
+        )
+        return len(self._text) + sum(a.itemsize * len(a) for a in arrays)
 
-_CHUNKS: Dict[str, Chunk] = {}
+    def _register(self, chunk: Chunk) -> int:
+        """Store one chunk (lock held)."""
+        handle = self._handles.get(chunk.chunk_id)
+        text = chunk.text.encode()
+        doc = self._intern_doc(chunk.doc_id)
+        if doc in self._cold:
+            self._promote(doc)
+        entities = [self._intern_entity(e) for e in chunk.entities]
+
+        if handle is None:
+            handle = len(self._ids)
+            self._ids.append(chunk.chunk_id)
+            self._handles[chunk.chunk_id] = handle
+            for column in (
+                self._docs,
+                self._page_start,
+                self._page_end,
+                self._text_length,
+                self._entity_count,
+            ):
+                column.append(0)
+            self._text_offset.append(0)
+            self._entity_offset.append(0)
+            self._write_text(handle, text)
+            self._write_entities(handle, entities)
+        else:
+            # Re-registered after dedup changed ownership or sources
+            if self._docs[handle] in self._cold:
+                self._promote(self._docs[handle])
+            self._detach(handle)
+            if text != self._text_bytes(handle):
+                self._garbage += self._text_length[handle]
+                self._write_text(handle, text)
+            if entities != self._entity_ids(handle):
+                self._write_entities(handle, entities)
+
+        self._docs[handle] = doc
+        self._attach(handle)
+        self._page_start[handle] = chunk.page_start
+        self._page_end[handle] = chunk.page_end
+
+        if chunk.sources:
+            self._sources[handle] = [
+                (self._intern_doc(s.doc_id), s.page_start, s.page_end)
+                for s in chunk.sources
+            ]
+        else:
+            self._sources.pop(handle, None)
+
+        return handle
+
+    def _write_text(self, handle: int, text: bytes) -> None:
+        """Append text to the buffer and point the handle at it."""
+        self._text_offset[handle] = len(self._text)
+        self._text_length[handle] = len(text)
+        self._text += text
+
+    def _write_entities(self, handle: int, entities: List[int]) -> None:
+        """Append entity IDs to the pool and point the handle at them."""
+        self._entity_offset[handle] = len(self._entity_pool)
+        self._entity_count[handle] = len(entities)
+        self._entity_pool.extend(entities)
+
+    def _text_bytes(self, handle: int) -> bytes:
+        """Return a chunk's raw text bytes, from RAM or its tier file."""
+        start = self._text_offset[handle]
+        buffer = self._cold.get(self._docs[handle], self._text)
+        return bytes(buffer[start : start + self._text_length[handle]])
+
+    def _entity_ids(self, handle: int) -> List[int]:
+        """Return a chunk's interned entity IDs."""
+        start = self._entity_offset[handle]
+        return self._entity_pool[start : start + self._entity_count[handle]].tolist()
+
+    def _intern_doc(self, doc_id: str) -> int:
+        """Return the interned index of a document ID."""
+        index = self._doc_index.get(doc_id)
+        if index is None:
+            index = self._doc_index[doc_id] = len(self._doc_names)
+            self._doc_names.append(doc_id)
+        return index
+
+    def _intern_entity(self, entity: str) -> int:
+        """Return the interned index of an entity string."""
+        index = self._entity_index.get(entity)
+        if index is None:
+            index = self._entity_index[entity] = len(self._entity_names)
+            self._entity_names.append(entity)
+        return index
+
+    def _attach(self, handle: int) -> None:
+        """Account a chunk's text to its (resident) document."""
+        doc = self._docs[handle]
+        self._doc_handles[doc].add(handle)
+        self._doc_bytes[doc] += self._text_length[handle]
+        self._resident += self._text_length[handle]
+        self._version[doc] = next(self._versions)
+        if doc not in self._recency:
+            self._recency[doc] = None
+
+    def _detach(self, handle: int) -> None:
+        """Remove a chunk's text from its document's accounting."""
+        doc = self._docs[handle]
+        handles = self._doc_handles[doc]
+        if handle not in handles:
+            return
+
+        handles.discard(handle)
+        self._version[doc] = next(self._versions)
+        self._doc_bytes[doc] -= self._text_length[handle]
+        if doc not in self._cold:
+            self._resident -= self._text_length[handle]
+        if not handles:
+            self._forget_doc(doc)
+
+    def _forget_doc(self, doc: int) -> None:
+        """Drop the tiering state of a document without chunks."""
+        mapped = self._cold.pop(doc, None)
+        if mapped is not None:
+            mapped.close()
+            self._tier_file(doc).unlink(missing_ok=True)
+        for state in (self._doc_handles, self._doc_bytes, self._accesses):
+            state.pop(doc, None)
+        self._version.pop(doc, None)
+        self._recency.pop(doc, None)
+        self._last_access.pop(doc, None)
+
+    def _touch(self, doc: int) -> None:
+        """Record an access; reload the document if it was offloaded."""
+        self._accesses[doc] += 1
+        self._last_access[doc] = time.monotonic()
+        if doc in self._recency:
+            self._recency.move_to_end(doc)
+        if doc in self._cold:
+            self._tier_misses += 1
+            self._promote(doc)
+            self._enforce_budget({doc})
+        else:
+            self._tier_hits += 1
+
+    def _enforce_budget(self, keep: Set[int]) -> None:
+        """Start offloading in the background if over budget (lock held)."""
+        self._keep = keep
+        if self._offloading or self._coldest() is None:
+            return
+
+        self._offloading = True
+        threading.Thread(
+            target=self._offload,
+            name="chunk-tier-offload",
+            daemon=True,
+        ).start()
+
+    def _coldest(self) -> Optional[int]:
+        """Least recently used resident document to offload, if over budget."""
+        if self.budget_bytes <= 0 or self._resident <= self.budget_bytes:
+            return None
+        for doc in self._recency:
+            if doc not in self._keep and doc not in self._cold and self._doc_bytes[doc]:
+                return doc
+        return None
+
+    def _offload(self) -> None:
+        """Offload the coldest documents until under budget.
+
+        Each document's text is copied under the lock, written to its tier
+        file without it, and mapped in only if the document is unchanged.
+        """
+        try:
+            while True:
+                with self._lock:
+                    doc = self._coldest()
+                    if doc is None:
+                        self._offloading = False
+                        return
+                    version = self._version[doc], self._last_access.get(doc)
+                    handles = list(self._doc_handles[doc])
+                    texts = [self._text_bytes(handle) for handle in handles]
+                    path = self._tier_file(doc)
+
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with path.open("wb") as f:
+                    for text in texts:
+                        f.write(text)
+
+                with self._lock:
+                    current = self._version.get(doc), self._last_access.get(doc)
+                    if current != version:
+                        # Written to or read meanwhile
+                        path.unlink(missing_ok=True)
+                        continue
+                    self._map(doc, handles, path)
+        except BaseException:
+            with self._lock:
+                self._offloading = False
+            raise
+
+    def _map(self, doc: int, handles: List[int], path: Path) -> None:
+        """Point a document's chunks at its written tier file (lock held)."""
+        offset = 0
+        for handle in handles:
+            self._text_offset[handle] = offset
+            offset += self._text_length[handle]
+
+        with path.open("rb") as f:
+            self._cold[doc] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._garbage += offset
+        self._resident -= offset
+
+        if self._garbage > _COMPACT_RATIO * max(len(self._text), 1 << 16):
+            self._compact_text()
+
+    def _promote(self, doc: int) -> None:
+        """Load an offloaded document's text back into RAM."""
+        mapped = self._cold.pop(doc)
+        for handle in self._doc_handles[doc]:
+            start = self._text_offset[handle]
+            self._text_offset[handle] = len(self._text)
+            self._text += mapped[start : start + self._text_length[handle]]
+
+        mapped.close()
+        self._tier_file(doc).unlink(missing_ok=True)
+        self._resident += self._doc_bytes[doc]
+
+    def _tier_file(self, doc: int) -> Path:
+        """Return the tier file of a document."""
+        if self.path is None:
+            msg = "ChunkStore needs a path to offload text"
+            raise RuntimeError(msg)
+        return self.path / f"doc-{doc}.bin"
+
+    def _drop_tier_files(self) -> None:
+        """Unmap and delete every tier file."""
+        for doc in list(self._cold):
+            self._cold.pop(doc).close()
+            self._tier_file(doc).unlink(missing_ok=True)
+
+    def _compact(self) -> None:
+        """Rewrite text and entity buffers without dead ranges (lock held)."""
+        self._compact_text()
+
+        pool = array("i")
+        for handle in self._handles.values():
+            start = self._entity_offset[handle]
+            self._entity_offset[handle] = len(pool)
+            pool.extend(self._entity_pool[start : start + self._entity_count[handle]])
+        self._entity_pool = pool
+
+    def _compact_text(self) -> None:
+        """Rewrite the resident text buffer without dead ranges."""
+        text = bytearray()
+        for doc, handles in self._doc_handles.items():
+            if doc in self._cold:
+                continue
+            for handle in handles:
+                start = self._text_offset[handle]
+                self._text_offset[handle] = len(text)
+                text += self._text[start : start + self._text_length[handle]]
+
+        self._text = text
+        self._garbage = 0
+
+
+chunk_store = ChunkStore(
+    settings.memory_budget_mb * 1024 * 1024,
+    # Per-process scratch directory for offloaded text
+    Path(settings.tier_path) / str(os.getpid()),
+)
+register_cache("chunk_text_tier", chunk_store.tier_counts)
+register_index("chunks", lambda: len(chunk_store))
 
 
 def register_chunks(chunks: List[Chunk]) -> None:
-    """Register chunks in memory."""
-    for chunk in chunks:
-        _CHUNKS[chunk.chunk_id] = chunk
+    """Register chunks in memory (replacing same-ID chunks)."""
+    chunk_store.register(chunks)
 
 
 def get_chunks() -> List[Chunk]:
-    """Return all registered chunks."""
-    return list(_CHUNKS.values())
+    """Return all registered chunks, materialized (without reloading any)."""
+    return chunk_store.hydrate_many(chunk_store.handles(), touch=False)
+
+
+def get_chunk(chunk_id: str) -> Optional[Chunk]:
+    """Return a registered chunk by ID, materialized."""
+    handle = chunk_store.handle(chunk_id)
+    return chunk_store.hydrate(handle) if handle is not None else None
+
+
+def get_chunks_by_id(chunk_ids: Iterable[str]) -> Dict[str, Chunk]:
+    """Return registered chunks by ID (one batched lookup)."""
+    return chunk_store.lookup(chunk_ids)
+
+
+def remove_chunks(chunk_ids: Iterable[str]) -> None:
+    """Remove chunks from the registry."""
+    chunk_store.remove(chunk_ids)
 
 
 def clear_chunks() -> None:
     """Clear registry (useful for tests)."""
-    _CHUNKS.clear()
+    chunk_store.clear()
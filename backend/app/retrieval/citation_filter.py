@@ -7,6 +7,8 @@ directly support the generated answer.
 import re
 from typing import List
 
+from app.core.metrics import inference
+from app.core.tracing import annotate, span
 from app.models.api import Citation
 from app.models.retrieval import ScoredChunk
 from sentence_transformers import SentenceTransformer, util
@@ -33,10 +35,22 @@ def filter_citations(
     
     sentences, returning unique results.
     """
+    with span("citation_filter", chunks=len(chunks)):
+        citations = _filter_citations(answer, chunks)
+        annotate(citations=len(citations))
+    return citations
+
+
+def _filter_citations(
+    answer: str,
+    chunks: List[ScoredChunk],
+) -> List[Citation]:
+    """Keep the sentences of each chunk most similar to the answer."""
     if not answer.strip():
         return []
 
-    answer_embedding = _SENTENCE_MODEL.encode(answer, normalize_embeddings=True)
+    with inference("citation_embedding", 1):
+        answer_embedding = _SENTENCE_MODEL.encode(answer, normalize_embeddings=True)
 
     filtered: List[Citation] = []
     seen_snippets = set()  # Track unique snippets
@@ -46,15 +60,16 @@ def filter_citations(
         if not sentences:
             continue
 
-        sentence_embeddings = _SENTENCE_MODEL.encode(
-            sentences,
-            normalize_embeddings=True,
-        )
+        with inference("citation_embedding", len(sentences)):
+            sentence_embeddings = _SENTENCE_MODEL.encode(
+                sentences,
+                normalize_embeddings=True,
+            )
 
         similarities = util.cos_sim(answer_embedding, sentence_embeddings)[0]
 
         selected_sentences: List[str] = []
-        for sent, score in zip(sentences, similarities):
+        for sent, score in zip(sentences, similarities, strict=True):
             if float(score) >= _SIMILARITY_THRESHOLD:
                 selected_sentences.append(sent)
 
@@ -0,0 +1,271 @@
+"""Token-budgeted prompt context assembly.
+
+Neighbouring chunks share up to OVERLAP_CHARS of text, and retrieved
+chunks often repeat each other. Packing:
+1. Picks passages MMR-style: rerank order traded off against lexical
+   similarity to passages already picked
+2. Strips text a passage shares with a picked neighbour from the same
+   document, and sentences that near-repeat picked ones
+3. Skips passages that no longer fit the model's token budget
+4. Orders picked passages by document and page, neighbours back to back
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.config import settings
+from app.core.tokens import context_budget, count_tokens, truncate_tokens
+from app.ingestion.chunking import OVERLAP_CHARS
+from app.models.api import ContextStats
+from app.models.ingestion import Chunk
+from app.models.retrieval import ScoredChunk
+
+_SEPARATOR = "\n\n"
+
+# Shortest shared edge treated as chunk overlap (and the search probe)
+_MIN_OVERLAP = 20
+
+# Sentences shorter than this (in words) are never dropped as repeats
+_MIN_SENTENCE_WORDS = 5
+
+
+class PackedContext(NamedTuple):
+    """Prompt context and the chunks it was built from, in prompt order.
+
+    Each chunk's text is its passage as packed (overlaps and repeats
+    stripped, possibly truncated), so citations quote what the LLM saw.
+    """
+
+    text: str
+    chunks: List[ScoredChunk]
+    stats: ContextStats
+
+
+def pack_context(
+    results: List[ScoredChunk],
+    model: str = settings.default_model,
+    budget: Optional[int] = None,
+) -> PackedContext:
+    """Pack reranked results into a prompt context within a token budget.
+
+    Args:
+        results: Retrieved chunks, best first.
+        model: Model the prompt is for (tokenizer and default budget).
+        budget: Token budget, overriding the model's.
+    """
+    budget = context_budget(model) if budget is None else budget
+    raw_tokens = count_tokens(_SEPARATOR.join(sc.chunk.text for sc in results), model)
+
+    words = [_words(sc.chunk.text) for sc in results]
+    remaining = list(range(len(results)))
+    picked: Dict[int, str] = {}
+    after: Dict[int, int] = {}
+    seen_sentences: List[Set[str]] = []
+    used = 0
+
+    while remaining:
+        best = max(remaining, key=lambda i: _mmr(i, len(results), words, picked))
+        remaining.remove(best)
+
+        chunk = results[best].chunk
+        text, follows = _strip_overlaps(chunk, [(j, results[j].chunk) for j in picked])
+        text = _drop_repeats(text, seen_sentences)
+        if not text:
+            continue
+
+        tokens = count_tokens(text + _SEPARATOR, model)
+        if used + tokens > budget:
+            if picked:
+                # A shorter passage may still fit
+                continue
+            text = truncate_tokens(text, budget, model)
+            tokens = count_tokens(text + _SEPARATOR, model)
+
+        used += tokens
+        picked[best] = text
+        seen_sentences.extend(_words(s) for s in _split_sentences(text))
+        for j, before in follows:
+            # after[x] = y: passage x continues passage y
+            if before:
+                after.setdefault(j, best)
+            else:
+                after.setdefault(best, j)
+
+    order = _reading_order(results, list(picked), after)
+    text = _SEPARATOR.join(picked[i] for i in order)
+    tokens = count_tokens(text, model)
+
+    return PackedContext(
+        text=text,
+        chunks=[_as_packed(results[i], picked[i]) for i in order],
+        stats=ContextStats(
+            tokens=tokens,
+            raw_tokens=raw_tokens,
+            tokens_saved=max(raw_tokens - tokens, 0),
+            passages=len(order),
+            dropped=len(results) - len(order),
+        ),
+    )
+
+
+def _as_packed(result: ScoredChunk, text: str) -> ScoredChunk:
+    """Copy of a result whose chunk holds its packed passage."""
+    chunk = result.chunk.model_copy(update={"text": text})
+    return ScoredChunk(chunk=chunk, score=result.score)
+
+
+def join_chunks(chunks: List[Chunk]) -> str:
+    """Join chunks in order, dropping text shared with the previous one."""
+    parts: List[str] = []
+    previous: Optional[Chunk] = None
+
+    for chunk in chunks:
+        text = unshared_text(previous, chunk)
+        if text:
+            parts.append(text)
+        previous = chunk
+
+    return _SEPARATOR.join(parts)
+
+
+def unshared_text(previous: Optional[Chunk], chunk: Chunk) -> str:
+    """Text of `chunk` without the edge it shares with the chunk before it."""
+    text = chunk.text
+    if previous is not None and previous.doc_id == chunk.doc_id:
+        text = text[_shared_edge(previous.text, text) :].strip()
+    return text
+
+
+def _mmr(
+    index: int,
+    total: int,
+    words: List[Set[str]],
+    picked: Dict[int, str],
+) -> float:
+    """MMR score: rank-based relevance minus similarity to picked passages."""
+    relevance = 1.0 - index / total
+    similarity = max((_jaccard(words[index], words[j]) for j in picked), default=0.0)
+    lam = settings.context_mmr_lambda
+    return lam * relevance - (1 - lam) * similarity
+
+
+def _strip_overlaps(
+    chunk: Chunk,
+    picked: List[Tuple[int, Chunk]],
+) -> Tuple[str, List[Tuple[int, bool]]]:
+    """Remove edges `chunk` shares with picked chunks of the same document.
+
+    Returns the remaining text and, per stripped edge, the index of the
+    picked chunk it overlaps and whether `chunk` reads before it.
+    """
+    text = chunk.text
+    follows: List[Tuple[int, bool]] = []
+
+    for index, other in picked:
+        if other.doc_id != chunk.doc_id:
+            continue
+
+        head = _shared_edge(other.text, text)
+        if head:
+            text = text[head:]
+            follows.append((index, False))
+            continue
+
+        tail = _shared_edge(text, other.text)
+        if tail:
+            text = text[: len(text) - tail]
+            follows.append((index, True))
+
+    return text.strip(), follows
+
+
+def _shared_edge(first: str, second: str) -> int:
+    """Length of the longest suffix of `first` that starts `second`."""
+    probe = second[:_MIN_OVERLAP]
+    if len(probe) < _MIN_OVERLAP:
+        return 0
+
+    start = max(len(first) - OVERLAP_CHARS - _MIN_OVERLAP, 0)
+    position = first.find(probe, start)
+    while position != -1:
+        if second.startswith(first[position:]):
+            return len(first) - position
+        position = first.find(probe, position + 1)
+    return 0
+
+
+def _drop_repeats(text: str, seen: List[Set[str]]) -> str:
+    """Remove sentences that near-repeat an already picked sentence."""
+    if not seen:
+        return text
+
+    kept = [
+        sentence
+        for sentence in _split_sentences(text)
+        if len(words := _words(sentence)) < _MIN_SENTENCE_WORDS
+        or all(_jaccard(words, other) < settings.context_redundancy for other in seen)
+    ]
+    return " ".join(kept)
+
+
+def _reading_order(
+    results: List[ScoredChunk],
+    picked: List[int],
+    after: Dict[int, int],
+) -> List[int]:
+    """Order passages by document and page, continuations right after."""
+    doc_rank: Dict[str, int] = {}
+    for i in sorted(picked):
+        doc_rank.setdefault(results[i].chunk.doc_id, i)
+
+    ordered = sorted(
+        picked,
+        key=lambda i: (
+            doc_rank[results[i].chunk.doc_id],
+            results[i].chunk.page_start,
+            results[i].chunk.page_end,
+            i,
+        ),
+    )
+
+    continuations: Dict[int, List[int]] = {}
+    for i in ordered:
+        if after.get(i) in picked:
+            continuations.setdefault(after[i], []).append(i)
+
+    order: List[int] = []
+    emitted: Set[int] = set()
+
+    def emit(i: int) -> None:
+        if i in emitted:
+            return
+        emitted.add(i)
+        order.append(i)
+        for j in continuations.get(i, []):
+            emit(j)
+
+    for i in ordered:
+        if after.get(i) not in picked:
+            emit(i)
+    for i in ordered:
+        # Passages caught in a continuation cycle
+        emit(i)
+
+    return order
+
+
+def _split_sentences(text: str) -> List[str]:
+    """Split text into sentences."""
+    return [s for s in re.split(r"(?<=[.!?])\s+", text) if s]
+
+
+def _words(text: str) -> Set[str]:
+    """Lower-cased word set of a text."""
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    """Jaccard similarity of two word sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
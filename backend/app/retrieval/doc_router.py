@@ -0,0 +1,225 @@
+"""Coarse-to-fine document routing.
+
+Keeps a small summary per document, updated at ingest and remove:
+
+- centroid: sum of the document's chunk embeddings
+- lexical signature: term frequencies over the document's chunks
+
+A query is first scored against these summaries, and chunk-level
+recall (vector, BM25, graph) is then restricted to the chunks of the
+best `fan_out` documents, so its cost follows the number of relevant
+documents rather than the corpus size. Documents selected explicitly
+by the caller are never routed: recall covers all of them.
+
+Note:
+- In-memory, like the chunk registry it mirrors
+- Chunks folded from several documents count towards each of them
+"""
+
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+from app.core.text import tokenize
+from app.models.ingestion import Chunk
+from app.retrieval.chunk_registry import chunk_store
+
+# BM25 parameters for document-level lexical scoring
+_K1 = 1.2
+_B = 0.75
+
+# Reciprocal rank fusion constant for combining the two rankings
+_RRF_K = 60
+
+
+class _DocumentSummary:
+    """Routing statistics of one document."""
+
+    __slots__ = ("handles", "vector_sum", "terms", "length")
+
+    def __init__(self) -> None:
+        self.handles: Set[int] = set()
+        self.vector_sum: Optional[np.ndarray] = None
+        self.terms: Counter = Counter()
+        self.length = 0
+
+
+class DocumentRouter:
+    """Per-document summaries and query-to-document routing."""
+
+    def __init__(self) -> None:
+        """Initialize an empty router."""
+        self._docs: Dict[str, _DocumentSummary] = defaultdict(_DocumentSummary)
+        # Number of documents containing each term
+        self._doc_freq: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Return the number of routed documents."""
+        return len(self._docs)
+
+    def add_chunks(
+        self,
+        chunks: List[Chunk],
+        vectors: Optional[Sequence[Sequence[float]]] = None,
+    ) -> None:
+        """Add chunks to the summaries of every document they appear in.
+
+        Already-counted (document, chunk) pairs are skipped, so canonical
+        chunks that gained sources can simply be passed again. Vectors are
+        optional; chunks without one only update lexical signatures.
+        Chunks must already be registered in the chunk store.
+        """
+        with self._lock:
+            for i, chunk in enumerate(chunks):
+                handle = chunk_store.handle(chunk.chunk_id)
+                if handle is None:
+                    continue
+                terms = Counter(tokenize(chunk.text))
+                vector = None if vectors is None else np.asarray(vectors[i], np.float32)
+
+                for doc_id in chunk.source_doc_ids():
+                    summary = self._docs[doc_id]
+                    if handle in summary.handles:
+                        continue
+
+                    summary.handles.add(handle)
+                    self._doc_freq.update(t for t in terms if t not in summary.terms)
+                    summary.terms.update(terms)
+                    summary.length += sum(terms.values())
+
+                    if vector is not None:
+                        if summary.vector_sum is None:
+                            summary.vector_sum = np.zeros_like(vector)
+                        summary.vector_sum += vector
+
+    def remove_document(self, doc_id: str) -> None:
+        """Drop a document's summary."""
+        with self._lock:
+            summary = self._docs.pop(doc_id, None)
+            if summary is None:
+                return
+
+            self._doc_freq.subtract(summary.terms.keys())
+            for term in summary.terms:
+                if self._doc_freq[term] <= 0:
+                    del self._doc_freq[term]
+
+    def handles(self, doc_ids: Iterable[str]) -> Set[int]:
+        """Return the chunk handles of documents."""
+        with self._lock:
+            handles: Set[int] = set()
+            for doc_id in doc_ids:
+                summary = self._docs.get(doc_id)
+                if summary is not None:
+                    handles |= summary.handles
+            return handles
+
+    def route(
+        self,
+        query: str,
+        query_vector: Sequence[float],
+        fan_out: int,
+    ) -> List[str]:
+        """Return the `fan_out` documents most relevant to a query.
+
+        Args:
+            query: Query text, for the lexical ranking.
+            query_vector: Normalized query embedding, for the centroid ranking.
+            fan_out: Number of documents to keep.
+
+        Returns:
+            Document IDs, best first.
+        """
+        with self._lock:
+            names = list(self._docs)
+            if len(names) <= fan_out:
+                return names
+
+            summaries = [self._docs[name] for name in names]
+            dense = self._dense_scores(summaries, query_vector)
+            lexical = self._lexical_scores(summaries, tokenize(query))
+
+        # Reciprocal rank fusion; a document only earns rank credit for a
+        # signal it actually has (a centroid, a lexical match), averaged
+        # over the signals available to it
+        has_dense = np.isfinite(dense)
+        fused = _rrf(dense, has_dense) + _rrf(lexical, lexical > 0)
+        fused /= 1.0 + has_dense
+
+        best = np.argsort(-fused, kind="stable")[:fan_out]
+        return [names[i] for i in best]
+
+    def idf(self, tokens: Iterable[str]) -> Dict[str, float]:
+        """Document-level BM25 IDF of the tokens that occur anywhere."""
+        with self._lock:
+            n_docs = len(self._docs)
+            weights: Dict[str, float] = {}
+            for token in tokens:
+                df = self._doc_freq.get(token, 0)
+                if df:
+                    weights[token] = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            return weights
+
+    def clear(self) -> None:
+        """Drop everything (useful for tests)."""
+        with self._lock:
+            self._docs.clear()
+            self._doc_freq.clear()
+
+    def _dense_scores(
+        self,
+        summaries: List[_DocumentSummary],
+        query_vector: Sequence[float],
+    ) -> np.ndarray:
+        """Cosine similarity between the query and document centroids."""
+        query = np.asarray(query_vector, dtype=np.float32)
+        scores = np.full(len(summaries), -np.inf)
+
+        for i, summary in enumerate(summaries):
+            if summary.vector_sum is None:
+                continue
+            norm = float(np.linalg.norm(summary.vector_sum))
+            if norm > 0:
+                scores[i] = float(summary.vector_sum @ query) / norm
+
+        return scores
+
+    def _lexical_scores(
+        self,
+        summaries: List[_DocumentSummary],
+        tokens: List[str],
+    ) -> np.ndarray:
+        """BM25 over whole documents, with document-level IDF."""
+        scores = np.zeros(len(summaries))
+        if not tokens:
+            return scores
+
+        n_docs = len(self._docs)
+        avg_length = sum(s.length for s in self._docs.values()) / n_docs or 1.0
+
+        for token in set(tokens):
+            df = self._doc_freq.get(token, 0)
+            if not df:
+                continue
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+
+            for i, summary in enumerate(summaries):
+                tf = summary.terms.get(token, 0)
+                if tf:
+                    norm = _K1 * (1 - _B + _B * summary.length / avg_length)
+                    scores[i] += idf * tf * (_K1 + 1) / (tf + norm)
+
+        return scores
+
+
+def _rrf(scores: np.ndarray, present: np.ndarray) -> np.ndarray:
+    """Reciprocal-rank credit of each score, zero where not `present`."""
+    ranks = np.empty(len(scores))
+    ranks[np.argsort(-scores, kind="stable")] = np.arange(len(scores))
+    return np.where(present, 1.0 / (_RRF_K + ranks), 0.0)
+
+
+document_router = DocumentRouter()
@@ -1,28 +1,101 @@
 """Graph utilities for adaptive Graph-RAG."""
 
+import threading
 from collections import defaultdict
-from typing import Dict, Iterable, List, Set
+from typing import Collection, Dict, Iterable, List, Optional, Set, Tuple
 
 import networkx as nx
+from app.core.concepts import ConceptTrie, normalize_concept
+from app.core.metrics import query_graph_size, register_index
 from app.models.ingestion import Chunk
+from app.retrieval.chunk_registry import chunk_store
 
-_ENTITY_TO_CHUNKS: Dict[str, Set[str]] = defaultdict(set)
+# Normalized concept -> handles of the chunks mentioning it
+_ENTITY_TO_CHUNKS: Dict[str, Set[int]] = defaultdict(set)
 
+# Known concepts, matched against queries (mirrors _ENTITY_TO_CHUNKS keys)
+_VOCABULARY = ConceptTrie()
 
-def index_entities(chunks: List[Chunk]) -> None:
-    """Index concepts to chunk IDs."""
-    for chunk in chunks:
-        for concept in chunk.entities:
-            _ENTITY_TO_CHUNKS[concept].add(chunk.chunk_id)
+# Concept graph over every chunk, with the concept index version it was
+# built from; rebuilt on first use after the index changes
+_CORPUS_GRAPH: Optional[Tuple[int, nx.Graph]] = None
+_INDEX_VERSION = 0
+_GRAPH_LOCK = threading.Lock()
 
+# Approximate resident bytes per (concept, chunk) link
+_LINK_BYTES = 32
 
-def build_graph(chunks: List[Chunk]) -> nx.Graph:
-    """Build a concept co-occurrence graph."""
-    graph = nx.Graph()
 
+def concept_links() -> int:
+    """Return the number of (concept, chunk) pairs in the concept index."""
+    return sum(len(handles) for handles in list(_ENTITY_TO_CHUNKS.values()))
+
+
+def concept_bytes(handle: int) -> int:
+    """Approximate resident bytes of one chunk's concept links."""
+    return _LINK_BYTES * len(chunk_store.entities(handle))
+
+
+register_index("graph_concepts", lambda: len(_ENTITY_TO_CHUNKS))
+register_index("graph_concept_links", concept_links, cached=True)
+
+
+def index_entities(chunks: List[Chunk]) -> None:
+    """Index concepts to the handles of registered chunks."""
+    added: List[str] = []
     for chunk in chunks:
-        concepts = chunk.entities
+        handle = chunk_store.handle(chunk.chunk_id)
+        if handle is None:
+            continue
+        for concept in _normalized(chunk.entities):
+            handles = _ENTITY_TO_CHUNKS[concept]
+            if not handles:
+                added.append(concept)
+            handles.add(handle)
+    _VOCABULARY.add(added)
+    _invalidate_graph()
+
+
+def unindex_entities(handles: Iterable[int]) -> None:
+    """Remove chunks from the concept index (before they are unregistered)."""
+    removed: List[str] = []
+    for handle in handles:
+        for concept in _normalized(chunk_store.entities(handle)):
+            ids = _ENTITY_TO_CHUNKS.get(concept)
+            if ids is None:
+                continue
+            ids.discard(handle)
+            if not ids:
+                del _ENTITY_TO_CHUNKS[concept]
+                removed.append(concept)
+    _VOCABULARY.remove(removed)
+    _invalidate_graph()
+
+
+def clear_entities() -> None:
+    """Clear the concept index (useful for tests and full reloads)."""
+    _ENTITY_TO_CHUNKS.clear()
+    _VOCABULARY.clear()
+    _invalidate_graph()
+
+
+def _invalidate_graph() -> None:
+    """Mark the cached corpus graph stale."""
+    global _INDEX_VERSION
+    _INDEX_VERSION += 1
+
+
+def match_query_concepts(queries: List[str]) -> List[Set[str]]:
+    """Known concepts mentioned in each query, found without an NLP pass."""
+    return _VOCABULARY.match_batch(queries)
+
+
+def build_graph(handles: Iterable[int]) -> nx.Graph:
+    """Build a concept co-occurrence graph over registered chunks."""
+    graph = nx.Graph()
 
+    for entities in chunk_store.entity_lists(handles):
+        concepts = _normalized(entities)
         for concept in concepts:
             graph.add_node(concept)
 
@@ -35,27 +108,36 @@ def build_graph(chunks: List[Chunk]) -> nx.Graph:
                     weight=current_weight + 1,
                 )
 
+    query_graph_size.labels("nodes").observe(graph.number_of_nodes())
+    query_graph_size.labels("edges").observe(graph.number_of_edges())
     return graph
 
 
-def extract_query_entities(text: str, nlp) -> Set[str]:
-    """Extract high-signal concepts from a user query."""
-    doc = nlp(text)
+def corpus_graph() -> nx.Graph:
+    """Return the concept graph over every registered chunk (cached).
 
-    concepts: Set[str] = set()
+    The graph is shared between queries and must not be modified.
+    """
+    global _CORPUS_GRAPH
+    cached = _CORPUS_GRAPH
+    if cached is not None and cached[0] == _INDEX_VERSION:
+        return cached[1]
 
-    # 1. Named entities (high precision)
-    for ent in doc.ents:
-        if ent.label_ in {"ORG", "PRODUCT", "WORK_OF_ART"}:
-            concepts.add(ent.text.lower())
+    with _GRAPH_LOCK:
+        # Another query may have rebuilt it meanwhile
+        cached = _CORPUS_GRAPH
+        if cached is not None and cached[0] == _INDEX_VERSION:
+            return cached[1]
+        # Invalidated during the build: the next call rebuilds again
+        version = _INDEX_VERSION
+        graph = build_graph(chunk_store.handles())
+        _CORPUS_GRAPH = (version, graph)
+        return graph
 
-    # 2. Noun-based keywords (controlled recall)
-    for token in doc:
-        if token.pos_ in {"NOUN", "PROPN"}:
-            if not token.is_stop and len(token.text) >= 4:
-                concepts.add(token.lemma_.lower())
 
-    return concepts
+def _normalized(entities: Iterable[str]) -> List[str]:
+    """Normalize stored entities (already normalized unless ingested earlier)."""
+    return list(dict.fromkeys(filter(None, map(normalize_concept, entities))))
 
 
 def adaptive_hops(num_entities: int) -> int:
@@ -85,14 +167,18 @@ def expand_entities(
     return expanded
 
 
-def chunks_from_entities(
-    chunks: List[Chunk],
+def handles_from_entities(
     entities: Set[str],
-) -> List[Chunk]:
-    """Recall chunks mentioning expanded entities."""
-    matched_ids: Set[str] = set()
+    handles: Optional[Collection[int]] = None,
+) -> List[int]:
+    """Recall chunks mentioning expanded entities, optionally within a subset."""
+    matched: Set[int] = set()
 
     for entity in entities:
-        matched_ids |= _ENTITY_TO_CHUNKS.get(entity, set())
+        matched |= _ENTITY_TO_CHUNKS.get(entity, set())
+
+    if handles is not None:
+        matched.intersection_update(handles)
 
-    return [chunk for chunk in chunks if chunk.chunk_id in matched_ids]
+    # Handles grow with registration, so this keeps ingestion order
+    return sorted(matched)
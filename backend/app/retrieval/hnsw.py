@@ -0,0 +1,369 @@
+"""In-process HNSW approximate nearest-neighbour index.
+
+A compact Hierarchical Navigable Small World graph (Malkov & Yashunin)
+over cosine similarity, implemented with NumPy. Supports incremental
+inserts, tombstone deletes, compaction, tunable `M` / `ef`, and on-disk
+persistence.
+
+Note:
+- Vectors are L2-normalized on insert, so cosine = inner product
+- Not thread-safe; callers serialize access. An insert is split into
+  `plan` (finding the neighbours, read-only) and `insert` (linking the
+  node in), so an owner can let searches run during the slow part
+- Deletes never rebuild the graph; once `needs_compaction`, the owner
+  rebuilds it (see `HNSWVectorStore`, which does so in the background)
+"""
+
+import heapq
+import math
+import pickle
+import random
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+# Graph worth rebuilding once this fraction of nodes are tombstones
+_COMPACT_RATIO = 0.3
+
+_VECTORS_FILE = "vectors.npy"
+_GRAPH_FILE = "graph.pkl"
+
+
+class PlannedInsert(NamedTuple):
+    """A vector's level and per-layer neighbours, ready to link in."""
+
+    label: str
+    vector: np.ndarray
+    level: int
+    links: List[List[int]]
+
+
+class HNSWIndex:
+    """HNSW graph index keyed by string labels."""
+
+    def __init__(
+        self,
+        dim: int,
+        m: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 64,
+        seed: int = 42,
+    ) -> None:
+        """Initialize an empty index.
+
+        Args:
+            dim: Vector dimensionality.
+            m: Links per node on upper layers (2*m on the base layer).
+            ef_construction: Candidate list size while inserting.
+            ef_search: Default candidate list size while searching.
+            seed: Seed for level assignment.
+        """
+        self.dim = dim
+        self.m = m
+        self.m0 = 2 * m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._ml = 1 / math.log(m)
+        self._reset(seed)
+
+    def _reset(self, seed: int) -> None:
+        """Drop all vectors and links."""
+        self._rng = random.Random(seed)
+        self._vectors = np.zeros((1024, self.dim), dtype=np.float32)
+        self._count = 0
+        self._levels: List[int] = []
+        # node -> level -> neighbour nodes
+        self._links: List[List[List[int]]] = []
+        self._labels: List[str] = []
+        self._label_to_node: Dict[str, int] = {}
+        self._deleted: Set[int] = set()
+        self._entry = -1
+        self._max_level = -1
+
+    def __len__(self) -> int:
+        """Return the number of live (non-deleted) vectors."""
+        return len(self._label_to_node)
+
+    def __contains__(self, label: str) -> bool:
+        """Return whether a label is indexed."""
+        return label in self._label_to_node
+
+    def add(self, label: str, vector: Sequence[float]) -> None:
+        """Insert a vector, replacing any previous vector for the label."""
+        self.insert(self.plan(label, vector))
+
+    def plan(self, label: str, vector: Sequence[float]) -> "PlannedInsert":
+        """Choose a new vector's level and neighbours, without changing the graph.
+
+        Searches may run alongside; no insert or delete may run between
+        this and the matching `insert`.
+        """
+        query = _normalize(vector)
+        level = int(-math.log(1.0 - self._rng.random()) * self._ml)
+        links: List[List[int]] = [[] for _ in range(level + 1)]
+
+        if self._entry >= 0:
+            entry = [self._entry]
+            for layer in range(self._max_level, level, -1):
+                entry = [self._search_layer(query, entry, 1, layer)[0][1]]
+
+            for layer in range(min(level, self._max_level), -1, -1):
+                found = self._search_layer(query, entry, self.ef_construction, layer)
+                links[layer] = self._select(found, self.m)
+                entry = [n for _, n in found]
+
+        return PlannedInsert(label, query, level, links)
+
+    def insert(self, planned: "PlannedInsert") -> None:
+        """Link a planned vector into the graph."""
+        if planned.label in self._label_to_node:
+            self.delete(planned.label)
+
+        node = self._allocate(planned.label, planned.vector)
+        level = planned.level
+        self._levels.append(level)
+        self._links.append(planned.links)
+
+        if self._entry < 0:
+            self._entry, self._max_level = node, level
+            return
+
+        for layer in range(min(level, self._max_level), -1, -1):
+            max_links = self.m0 if layer == 0 else self.m
+            for neighbour in planned.links[layer]:
+                links = self._links[neighbour][layer]
+                links.append(node)
+                if len(links) > max_links:
+                    self._links[neighbour][layer] = self._prune(
+                        neighbour, links, max_links
+                    )
+
+        if level > self._max_level:
+            self._entry, self._max_level = node, level
+
+    def delete(self, label: str) -> None:
+        """Tombstone a vector (it stays in the graph until compaction)."""
+        node = self._label_to_node.pop(label, None)
+        if node is not None:
+            self._deleted.add(node)
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Whether tombstones make up enough of the graph to rebuild it."""
+        return len(self._deleted) > max(64, _COMPACT_RATIO * self._count)
+
+    def vector(self, label: str) -> Optional[np.ndarray]:
+        """Return a copy of a live label's (normalized) vector."""
+        node = self._label_to_node.get(label)
+        return None if node is None else self._vectors[node].copy()
+
+    def items(self) -> List[Tuple[str, np.ndarray]]:
+        """Return copies of every live (label, vector) pair."""
+        return [
+            (label, self._vectors[node].copy())
+            for label, node in self._label_to_node.items()
+        ]
+
+    def search(
+        self,
+        vector: Sequence[float],
+        k: int,
+        ef: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return up to `k` (label, cosine similarity) pairs, best first."""
+        if not self._label_to_node:
+            return []
+
+        query = _normalize(vector)
+        entry = [self._entry]
+        for layer in range(self._max_level, 0, -1):
+            entry = [self._search_layer(query, entry, 1, layer)[0][1]]
+
+        ef = max(ef or self.ef_search, k)
+        found = self._search_layer(query, entry, ef, 0)
+
+        results: List[Tuple[str, float]] = []
+        for distance, node in found:
+            if node in self._deleted:
+                continue
+            results.append((self._labels[node], 1.0 - distance))
+            if len(results) >= k:
+                break
+
+        return results
+
+    def search_labels(
+        self,
+        vector: Sequence[float],
+        labels: Iterable[str],
+        k: int,
+    ) -> List[Tuple[str, float]]:
+        """Exact search restricted to `labels`; cost follows their count."""
+        known = [label for label in labels if label in self._label_to_node]
+        if not known:
+            return []
+
+        nodes = [self._label_to_node[label] for label in known]
+        scores = self._vectors[nodes] @ _normalize(vector)
+        order = np.argsort(-scores)[:k]
+        return [(known[i], float(scores[i])) for i in order]
+
+    def compact(self) -> None:
+        """Rebuild the graph from live vectors, dropping tombstones.
+
+        Costs a full re-insert; `HNSWVectorStore` builds the new graph
+        off its lock instead of calling this.
+        """
+        live = self.items()
+
+        self._reset(self._rng.randrange(1 << 30))
+        for label, vector in live:
+            self.add(label, vector)
+
+    def save(self, path: Path) -> None:
+        """Persist the index to a directory."""
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / _VECTORS_FILE, self._vectors[: self._count])
+
+        state = {
+            "params": (self.dim, self.m, self.ef_construction, self.ef_search),
+            "levels": self._levels,
+            "links": self._links,
+            "labels": self._labels,
+            "deleted": self._deleted,
+            "entry": self._entry,
+            "max_level": self._max_level,
+            "rng": self._rng.getstate(),
+        }
+        tmp_path = path / f"{_GRAPH_FILE}.tmp"
+        with tmp_path.open("wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path / _GRAPH_FILE)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["HNSWIndex"]:
+        """Load an index saved with `save`, or None if absent."""
+        if not (path / _GRAPH_FILE).exists():
+            return None
+
+        with (path / _GRAPH_FILE).open("rb") as f:
+            state = pickle.load(f)
+
+        dim, m, ef_construction, ef_search = state["params"]
+        index = cls(dim, m=m, ef_construction=ef_construction, ef_search=ef_search)
+        vectors = np.load(path / _VECTORS_FILE)
+
+        index._vectors = np.zeros((max(1024, len(vectors) * 2), dim), np.float32)
+        index._vectors[: len(vectors)] = vectors
+        index._count = len(vectors)
+        index._levels = state["levels"]
+        index._links = state["links"]
+        index._labels = state["labels"]
+        index._deleted = state["deleted"]
+        index._entry = state["entry"]
+        index._max_level = state["max_level"]
+        index._rng.setstate(state["rng"])
+        index._label_to_node = {
+            label: node
+            for node, label in enumerate(index._labels)
+            if node not in index._deleted
+        }
+        return index
+
+    def _allocate(self, label: str, vector: np.ndarray) -> int:
+        """Store a vector, growing the backing array when full."""
+        if self._count == len(self._vectors):
+            grown = np.zeros((len(self._vectors) * 2, self.dim), dtype=np.float32)
+            grown[: self._count] = self._vectors[: self._count]
+            self._vectors = grown
+
+        node = self._count
+        self._vectors[node] = vector
+        self._count += 1
+        self._labels.append(label)
+        self._label_to_node[label] = node
+        return node
+
+    def _distances(self, query: np.ndarray, nodes: List[int]) -> List[float]:
+        """Cosine distances from the query to nodes."""
+        return (1.0 - self._vectors[nodes] @ query).tolist()
+
+    def _search_layer(
+        self,
+        query: np.ndarray,
+        entry: List[int],
+        ef: int,
+        layer: int,
+    ) -> List[Tuple[float, int]]:
+        """Best-first search of one layer; returns (distance, node) sorted."""
+        visited = set(entry)
+        distances = self._distances(query, entry)
+        candidates = list(zip(distances, entry, strict=True))
+        heapq.heapify(candidates)
+        results = [(-d, n) for d, n in candidates]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            distance, node = heapq.heappop(candidates)
+            if distance > -results[0][0] and len(results) >= ef:
+                break
+
+            neighbours = [n for n in self._links[node][layer] if n not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+
+            for d, n in zip(
+                self._distances(query, neighbours), neighbours, strict=True
+            ):
+                if len(results) < ef or d < -results[0][0]:
+                    heapq.heappush(candidates, (d, n))
+                    heapq.heappush(results, (-d, n))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+
+        return sorted((-d, n) for d, n in results)
+
+    def _select(self, candidates: List[Tuple[float, int]], m: int) -> List[int]:
+        """Neighbour selection heuristic favouring diverse directions.
+
+        A candidate is kept only if it is closer to the base node than to
+        every neighbour already kept.
+        """
+        if len(candidates) <= m:
+            return [node for _, node in candidates]
+
+        nodes = [node for _, node in candidates]
+        vectors = self._vectors[nodes]
+        # Pairwise candidate distances in one product instead of per step
+        pairwise = (1.0 - vectors @ vectors.T).tolist()
+
+        selected: List[int] = []
+        skipped: List[int] = []
+
+        for i, (distance, _) in enumerate(candidates):
+            if len(selected) >= m:
+                break
+            row = pairwise[i]
+            if any(row[j] < distance for j in selected):
+                skipped.append(i)
+                continue
+            selected.append(i)
+
+        # Keep pruned connections so sparse regions stay reachable
+        return [nodes[i] for i in selected + skipped[: m - len(selected)]]
+
+    def _prune(self, node: int, links: List[int], max_links: int) -> List[int]:
+        """Shrink a node's link list back to `max_links`."""
+        distances = self._distances(self._vectors[node], links)
+        return self._select(sorted(zip(distances, links, strict=True)), max_links)
+
+
+def _normalize(vector: Sequence[float]) -> np.ndarray:
+    """Return a unit-length float32 copy of a vector."""
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm > 0 else array
@@ -1,38 +1,188 @@
-"""BM25 keyword-based retrieval."""
+"""BM25 keyword-based retrieval.
 
-from typing import List
+The index is kept as postings (term -> chunk handle -> term frequency)
+and updated incrementally: a rebuild tokenizes only the chunks it has
+not indexed yet and drops removed ones, so text offloaded by the chunk
+store is never read back in. Scores match `rank_bm25.BM25Okapi` with
+its default parameters.
 
-from app.models.ingestion import Chunk
+Note:
+- Postings stay resident; MEMORY_BUDGET_MB bounds chunk text only
+- `bm25_bytes` estimates a chunk's share, reported by /docs/memory
+- A chunk's text never changes under its ID, so cached terms stay valid
+"""
+
+import math
+import threading
+from collections import Counter
+from typing import Collection, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.metrics import register_index
+from app.core.text import tokenize
 from app.models.retrieval import ScoredChunk
-from rank_bm25 import BM25Okapi
+from app.retrieval.chunk_registry import chunk_store
+
+# BM25Okapi defaults; negative idfs are floored at EPSILON * average idf
+_K1 = 1.5
+_B = 0.75
+_EPSILON = 0.25
+
+# Approximate resident bytes per posting (dict entry plus term reference)
+_POSTING_BYTES = 48
+
+# term -> handle -> term frequency
+_postings: Dict[str, Dict[int, int]] = {}
+# handle -> (distinct terms, token count), to unindex without the text
+_docs: Dict[int, Tuple[Tuple[str, ...], int]] = {}
+_total_len = 0
+_idf: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def bm25_terms() -> int:
+    """Return the number of distinct terms in the BM25 index."""
+    return len(_postings)
+
+
+register_index("bm25_terms", bm25_terms)
+
+
+def bm25_bytes(handle: int) -> int:
+    """Approximate resident bytes of one chunk's postings."""
+    doc = _docs.get(handle)
+    return _POSTING_BYTES * len(doc[0]) if doc is not None else 0
+
+
+def build_bm25_index(handles: List[int]) -> None:
+    """Bring the in-memory BM25 index up to date with registered chunks.
+
+    Only chunks not indexed yet are tokenized; chunks missing from
+    `handles` are dropped. Skipped when lexical search runs on Qdrant
+    sparse vectors. Callers serialize rebuilds (the pipeline index lock).
+    """
+    global _idf
+
+    if settings.lexical_backend == "qdrant":
+        handles = []
+
+    live = set(handles)
+    new = [handle for handle in handles if handle not in _docs]
+    # Tokenized before taking the lock, so searches keep running
+    counts = [Counter(tokenize(chunk_store.text(handle))) for handle in new]
+
+    with _lock:
+        for handle in [handle for handle in _docs if handle not in live]:
+            _unindex(handle)
+        for handle, terms in zip(new, counts, strict=True):
+            _index(handle, terms)
+        _idf = _idf_table()
+
+
+def clear_bm25_index() -> None:
+    """Drop the BM25 index (when the chunk store is cleared)."""
+    global _total_len, _idf
+
+    with _lock:
+        _postings.clear()
+        _docs.clear()
+        _total_len = 0
+        _idf = {}
+
+
+def bm25_search(
+    query: str,
+    top_k: int = 10,
+    handles: Optional[Collection[int]] = None,
+) -> List[ScoredChunk]:
+    """Run BM25 keyword search, optionally over a subset of chunks.
+
+    Only the `top_k` hits are materialized as `Chunk` objects.
+    """
+    tokens = tokenize(query)
+
+    with _lock:
+        if not _docs:
+            return []
+        scores = _scores(tokens, handles)
+
+    ranked = sorted(scores.items(), key=lambda hit: (-hit[1], hit[0]))
+
+    scored: List[ScoredChunk] = []
+    for handle, score in ranked:
+        # Removed since the last rebuild
+        if not chunk_store.alive(handle):
+            continue
+        scored.append(ScoredChunk(chunk=chunk_store.hydrate(handle), score=score))
+        if len(scored) >= top_k:
+            break
+
+    return scored
+
+
+def _scores(tokens: List[str], handles: Optional[Collection[int]]) -> Dict[int, float]:
+    """Positive BM25 scores by handle, over all chunks or a subset (lock held).
+
+    Each query term walks its postings, or the subset when that is smaller,
+    so only chunks containing a query term are touched.
+    """
+    avgdl = _total_len / len(_docs)
+    subset = None if handles is None else set(handles)
+    scores: Dict[int, float] = {}
 
-_bm25: BM25Okapi | None = None
-_chunks: List[Chunk] = []
+    for token in tokens:
+        idf = _idf.get(token)
+        postings = _postings.get(token)
+        if not idf or not postings:
+            continue
+        if subset is None:
+            hits = postings.items()
+        elif len(subset) < len(postings):
+            hits = [(h, postings[h]) for h in subset if h in postings]
+        else:
+            hits = [(h, tf) for h, tf in postings.items() if h in subset]
+        for handle, tf in hits:
+            norm = _K1 * (1 - _B + _B * _docs[handle][1] / avgdl)
+            score = idf * tf * (_K1 + 1) / (tf + norm)
+            scores[handle] = scores.get(handle, 0.0) + score
 
+    return {handle: score for handle, score in scores.items() if score > 0}
 
-def build_bm25_index(chunks: List[Chunk]) -> None:
-    """Build an in-memory BM25 index."""
-    global _bm25, _chunks
 
-    _chunks = chunks
-    corpus = [chunk.text.lower().split() for chunk in chunks]
+def _index(handle: int, terms: Counter) -> None:
+    """Add one chunk's term counts to the postings (lock held)."""
+    global _total_len
 
-    _bm25 = BM25Okapi(corpus)
+    for term, tf in terms.items():
+        _postings.setdefault(term, {})[handle] = tf
+    length = sum(terms.values())
+    _docs[handle] = (tuple(terms), length)
+    _total_len += length
 
 
-def bm25_search(query: str, top_k: int = 10) -> List[ScoredChunk]:
-    """Run BM25 keyword search."""
-    if _bm25 is None:
-        return []
+def _unindex(handle: int) -> None:
+    """Remove one chunk from the postings (lock held)."""
+    global _total_len
 
-    tokens = query.lower().split()
-    scores = _bm25.get_scores(tokens)
+    terms, length = _docs.pop(handle)
+    for term in terms:
+        postings = _postings[term]
+        del postings[handle]
+        if not postings:
+            del _postings[term]
+    _total_len -= length
 
-    scored = [
-        ScoredChunk(chunk=_chunks[i], score=float(score))
-        for i, score in enumerate(scores)
-        if score > 0
-    ]
 
-    scored.sort(key=lambda x: x.score, reverse=True)
-    return scored[:top_k]
+def _idf_table() -> Dict[str, float]:
+    """Okapi idf per term, with the epsilon floor (lock held)."""
+    size = len(_docs)
+    idf = {
+        term: math.log(size - len(postings) + 0.5) - math.log(len(postings) + 0.5)
+        for term, postings in _postings.items()
+    }
+    if idf:
+        floor = _EPSILON * sum(idf.values()) / len(idf)
+        for term, value in idf.items():
+            if value < 0:
+                idf[term] = floor
+    return idf
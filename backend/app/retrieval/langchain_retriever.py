@@ -1,35 +1,153 @@
 """LangChain retriever wrapper for AtlasRAG."""
 
-from typing import List
+import asyncio
+from typing import Any, Coroutine, Dict, List, Optional, Set, Tuple
 
-from app.retrieval.retrieve import hybrid_graph_search
+from app.config import settings
+from app.models.retrieval import ScoredChunk
+from app.retrieval.retrieve import hybrid_graph_search, hybrid_graph_search_batch
 from langchain_core.documents import Document
 from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import RunnableConfig
+
+
+class _QueryCoalescer:
+    """Groups concurrent async queries into shared batch retrievals.
+
+    The first query for a given top_k opens a short window; queries
+    arriving during it join the same `hybrid_graph_search_batch` call,
+    which runs in a worker thread so the event loop stays free.
+    """
+
+    def __init__(self) -> None:
+        self._pending: Dict[int, List[Tuple[str, asyncio.Future]]] = {}
+        # The loop only keeps weak references to tasks
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def search(self, query: str, top_k: int) -> List[ScoredChunk]:
+        """Retrieve for one query as part of the current batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._pending.get(top_k)
+        if batch is None:
+            batch = self._pending[top_k] = []
+            self._spawn(loop, self._flush_later(top_k, batch))
+        batch.append((query, future))
+
+        if len(batch) >= settings.retrieval_batch_max:
+            # Full: close the window now; the timer finds it gone
+            del self._pending[top_k]
+            self._spawn(loop, self._run(top_k, batch))
+
+        return await future
+
+    def _spawn(self, loop: asyncio.AbstractEventLoop, coro: Coroutine) -> None:
+        """Run a coroutine as a task, referenced until it completes."""
+        task = loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush_later(
+        self,
+        top_k: int,
+        batch: List[Tuple[str, asyncio.Future]],
+    ) -> None:
+        await asyncio.sleep(settings.retrieval_batch_window_ms / 1000)
+        if self._pending.get(top_k) is batch:
+            del self._pending[top_k]
+            await self._run(top_k, batch)
+
+    async def _run(
+        self,
+        top_k: int,
+        batch: List[Tuple[str, asyncio.Future]],
+    ) -> None:
+        queries = [query for query, _ in batch]
+        try:
+            results = await asyncio.to_thread(hybrid_graph_search_batch, queries, top_k)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), result in zip(batch, results, strict=True):
+            if not future.done():
+                future.set_result(result)
+
+
+_coalescer = _QueryCoalescer()
+
+
+def to_documents(results: List[ScoredChunk]) -> List[Document]:
+    """Convert retrieval results to LangChain documents."""
+    return [
+        Document(
+            page_content=sc.chunk.text,
+            metadata={
+                "doc_id": sc.chunk.doc_id,
+                "page_start": sc.chunk.page_start,
+                "page_end": sc.chunk.page_end,
+                "chunk": sc.chunk,
+                "score": sc.score,
+            },
+        )
+        for sc in results
+    ]
 
 
 class AtlasGraphRetriever(BaseRetriever):
-    """LangChain-compatible retriever wrapping hybrid Graph-RAG."""
+    """LangChain-compatible retriever wrapping hybrid Graph-RAG.
+
+    Async retrieval coalesces concurrent queries into batches, and
+    `batch`/`abatch` retrieve all inputs with one batched pass.
+    """
 
     top_k: int = 5
 
     def _get_relevant_documents(self, query: str) -> List[Document]:
         """Retrieve documents for LangChain."""
-        results = hybrid_graph_search(query, self.top_k)
-
-        documents: List[Document] = []
-
-        for sc in results:
-            documents.append(
-                Document(
-                    page_content=sc.chunk.text,
-                    metadata={
-                        "doc_id": sc.chunk.doc_id,
-                        "page_start": sc.chunk.page_start,
-                        "page_end": sc.chunk.page_end,
-                        "chunk": sc.chunk,
-                        "score": sc.score,
-                    },
-                )
-            )
-
-        return documents
+        return to_documents(hybrid_graph_search(query, self.top_k))
+
+    async def _aget_relevant_documents(self, query: str) -> List[Document]:
+        """Retrieve documents without blocking the event loop."""
+        return to_documents(await _coalescer.search(query, self.top_k))
+
+    def batch(
+        self,
+        inputs: List[str],
+        config: Optional[RunnableConfig | List[RunnableConfig]] = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[List[Document]]:
+        """Retrieve for many queries in one batched pass.
+
+        Per-query callbacks are not fired on this path.
+        """
+        if not inputs:
+            return []
+        try:
+            results = hybrid_graph_search_batch(list(inputs), self.top_k)
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            return [exc] * len(inputs)
+        return [to_documents(result) for result in results]
+
+    async def abatch(
+        self,
+        inputs: List[str],
+        config: Optional[RunnableConfig | List[RunnableConfig]] = None,
+        *,
+        return_exceptions: bool = False,
+        **kwargs: Any,
+    ) -> List[List[Document]]:
+        """Async `batch`, run in a worker thread."""
+        return await asyncio.to_thread(
+            self.batch,
+            inputs,
+            config,
+            return_exceptions=return_exceptions,
+        )
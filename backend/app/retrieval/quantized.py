@@ -0,0 +1,318 @@
+"""Quantized vector index with exact rescoring.
+
+Keeps only compact codes in RAM:
+
+- "binary": one sign bit per dimension, compared by Hamming distance
+  over 64-bit words stored column-major (one contiguous array per word)
+- "int8": per-vector scaled int8 components, compared by dot product;
+  it saves 4x memory but its first pass is no faster than exact float
+  search (bench_quantized: ~27 ms vs ~24 ms at 100k x 384), so prefer
+  "binary" when latency matters
+
+A first pass over the compact codes picks `rescore * k` candidates,
+which are rescored exactly against float32 vectors read from a
+memory-mapped file, so full-precision vectors are paged in on demand
+rather than held resident.
+
+Note:
+- Vectors are L2-normalized on insert, so cosine = inner product
+- Not thread-safe; callers serialize access
+"""
+
+import pickle
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# SWAR popcount masks for 64-bit words
+_M1 = np.uint64(0x5555555555555555)
+_M2 = np.uint64(0x3333333333333333)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_H01 = np.uint64(0x0101010101010101)
+# The horizontal sum keeps one byte: at most 64 bits a word, so it holds
+# the counts of 3 words (192) and wraps at the 4th (256)
+_WORDS_PER_SUM = 3
+
+# Rows converted to float32 at a time for int8 scoring
+_INT8_BLOCK = 8192
+
+_FLOATS_FILE = "vectors.f32"
+_CODES_FILE = "codes.npy"
+_SCALES_FILE = "scales.npy"
+_META_FILE = "meta.pkl"
+
+# Rewrite storage once this fraction of rows are deleted
+_COMPACT_RATIO = 0.3
+
+
+class QuantizedIndex:
+    """Compact-code first pass with memory-mapped exact rescoring."""
+
+    def __init__(
+        self,
+        path: Path,
+        dim: int,
+        mode: str = "binary",
+        rescore: int = 8,
+    ) -> None:
+        """Initialize an empty index stored under `path`.
+
+        Args:
+            path: Directory holding the float file and code snapshots.
+            dim: Vector dimensionality.
+            mode: "binary" or "int8".
+            rescore: Candidates rescored exactly, as a multiple of k.
+        """
+        if mode not in ("binary", "int8"):
+            msg = f"Unknown quantization mode: {mode}"
+            raise ValueError(msg)
+        if mode == "binary" and dim % 64:
+            msg = "Binary quantization needs a dimension divisible by 64."
+            raise ValueError(msg)
+
+        self.path = path
+        self.dim = dim
+        self.mode = mode
+        self.rescore = rescore
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        (self.path / _FLOATS_FILE).write_bytes(b"")
+        self._floats: Optional[np.memmap] = None
+
+        if mode == "binary":
+            self._codes = np.zeros((dim // 64, 0), dtype=np.uint64)
+        else:
+            self._codes = np.zeros((0, dim), dtype=np.int8)
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._alive = np.zeros(0, dtype=bool)
+        self._labels: List[str] = []
+        self._label_to_row: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Return the number of live vectors."""
+        return len(self._label_to_row)
+
+    def resident_bytes(self) -> int:
+        """Bytes of vector data held in RAM (codes, scales, liveness)."""
+        return self._codes.nbytes + self._scales.nbytes + self._alive.nbytes
+
+    def add(self, labels: List[str], vectors: Sequence[Sequence[float]]) -> None:
+        """Append vectors, replacing earlier vectors with the same labels."""
+        if not labels:
+            return
+
+        self.delete([label for label in labels if label in self._label_to_row])
+
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms > 0, norms, 1.0)
+
+        codes, scales = self._quantize(matrix)
+        start = len(self._labels)
+
+        with (self.path / _FLOATS_FILE).open("ab") as f:
+            f.write(matrix.tobytes())
+        self._floats = None  # remapped lazily at the new size
+
+        self._codes = np.concatenate([self._codes, codes], axis=self._row_axis)
+        self._scales = np.concatenate([self._scales, scales])
+        self._alive = np.concatenate([self._alive, np.ones(len(labels), dtype=bool)])
+        for offset, label in enumerate(labels):
+            self._labels.append(label)
+            self._label_to_row[label] = start + offset
+
+    def delete(self, labels: List[str]) -> None:
+        """Delete vectors by label."""
+        for label in labels:
+            row = self._label_to_row.pop(label, None)
+            if row is not None:
+                self._alive[row] = False
+
+        dead = len(self._labels) - len(self._label_to_row)
+        if dead > max(64, _COMPACT_RATIO * len(self._labels)):
+            self.compact()
+
+    def search(self, vector: Sequence[float], k: int) -> List[Tuple[str, float]]:
+        """Return up to `k` (label, cosine similarity) pairs, best first."""
+        if not self._label_to_row:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (float(np.linalg.norm(query)) or 1.0)
+
+        approx = self._approximate_scores(query)
+        approx[~self._alive] = -np.inf
+
+        n_candidates = min(len(self._label_to_row), max(k, k * self.rescore))
+        candidates = np.argpartition(-approx, n_candidates - 1)[:n_candidates]
+        candidates = candidates[np.isfinite(approx[candidates])]
+
+        # Exact rescoring from the memory-mapped float vectors
+        rows = np.sort(candidates)
+        exact = self._float_rows()[rows] @ query
+        order = np.argsort(-exact)[:k]
+
+        return [(self._labels[rows[i]], float(exact[i])) for i in order]
+
+    def search_labels(
+        self,
+        vector: Sequence[float],
+        labels: Iterable[str],
+        k: int,
+    ) -> List[Tuple[str, float]]:
+        """Exact search restricted to `labels`; cost follows their count."""
+        rows = np.sort(
+            np.fromiter(
+                (self._label_to_row[x] for x in labels if x in self._label_to_row),
+                dtype=np.int64,
+            )
+        )
+        if not len(rows):
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (float(np.linalg.norm(query)) or 1.0)
+        exact = self._float_rows()[rows] @ query
+        order = np.argsort(-exact)[:k]
+        return [(self._labels[rows[i]], float(exact[i])) for i in order]
+
+    def compact(self) -> None:
+        """Rewrite the float file and codes without deleted rows."""
+        keep = np.flatnonzero(self._alive)
+        floats = np.array(self._float_rows()[keep])
+
+        self._codes = np.take(self._codes, keep, axis=self._row_axis)
+        self._scales = self._scales[keep]
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._labels = [self._labels[row] for row in keep]
+        self._label_to_row = {label: row for row, label in enumerate(self._labels)}
+
+        self._floats = None
+        tmp_path = self.path / f"{_FLOATS_FILE}.tmp"
+        tmp_path.write_bytes(floats.tobytes())
+        tmp_path.replace(self.path / _FLOATS_FILE)
+        # Row numbers changed; the old snapshot no longer matches the file
+        self.save()
+
+    def save(self) -> None:
+        """Snapshot codes and labels (floats are already on disk)."""
+        np.save(self.path / _CODES_FILE, self._codes)
+        np.save(self.path / _SCALES_FILE, self._scales)
+
+        state = {
+            "params": (self.dim, self.mode),
+            "alive": self._alive,
+            "labels": self._labels,
+        }
+        tmp_path = self.path / f"{_META_FILE}.tmp"
+        with tmp_path.open("wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(self.path / _META_FILE)
+
+    @classmethod
+    def load(cls, path: Path, rescore: int = 8) -> Optional["QuantizedIndex"]:
+        """Load an index saved with `save`, or None if absent."""
+        if not (path / _META_FILE).exists():
+            return None
+
+        with (path / _META_FILE).open("rb") as f:
+            state = pickle.load(f)
+
+        dim, mode = state["params"]
+        index = cls.__new__(cls)
+        index.path, index.dim, index.mode, index.rescore = path, dim, mode, rescore
+        index._floats = None
+        index._codes = np.load(path / _CODES_FILE)
+        index._scales = np.load(path / _SCALES_FILE)
+        index._alive = state["alive"]
+        index._labels = state["labels"]
+        index._label_to_row = {
+            label: row for row, label in enumerate(index._labels) if index._alive[row]
+        }
+
+        # Drop float rows appended after the last snapshot
+        size = len(index._labels) * dim * 4
+        with (path / _FLOATS_FILE).open("r+b") as f:
+            f.truncate(size)
+
+        return index
+
+    @property
+    def _row_axis(self) -> int:
+        """Axis of `_codes` that indexes rows."""
+        return 1 if self.mode == "binary" else 0
+
+    def _quantize(self, matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Encode normalized vectors into compact codes and scales."""
+        if self.mode == "binary":
+            bits = np.packbits(matrix > 0, axis=1)
+            words = np.ascontiguousarray(bits).view(np.uint64)
+            return np.ascontiguousarray(words.T), np.ones(len(matrix), np.float32)
+
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        codes = np.round(matrix / scales[:, None]).astype(np.int8)
+        return codes, scales
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Score every row from compact codes (higher is better)."""
+        if self.mode == "binary":
+            query_words, _ = self._quantize(query[None, :])
+            return -_hamming(self._codes, query_words[:, 0]).astype(np.float32)
+
+        # int8 has no BLAS path; widen blocks to float32 and use one GEMV each
+        scores = np.empty(len(self._codes), dtype=np.float32)
+        for start in range(0, len(self._codes), _INT8_BLOCK):
+            block = self._codes[start : start + _INT8_BLOCK]
+            scores[start : start + len(block)] = block.astype(np.float32) @ query
+        return scores * self._scales
+
+    def _float_rows(self) -> np.memmap:
+        """Return the float vectors file mapped read-only."""
+        if self._floats is None:
+            self._floats = np.memmap(
+                self.path / _FLOATS_FILE,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self._labels), self.dim),
+            )
+        return self._floats
+
+
+def _hamming(words: np.ndarray, query_words: np.ndarray) -> np.ndarray:
+    """Hamming distances between column-major code words and a query.
+
+    Uses `np.bitwise_count` where available (NumPy >= 2), else SWAR
+    arithmetic on whole columns.
+    """
+    total = np.zeros(words.shape[1], dtype=np.uint32)
+    if hasattr(np, "bitwise_count"):
+        for column, query_word in zip(words, query_words, strict=True):
+            total += np.bitwise_count(np.bitwise_xor(column, query_word))
+        return total
+
+    acc = np.zeros(words.shape[1], dtype=np.uint64)
+    tmp = np.empty_like(acc)
+
+    for i, (column, query_word) in enumerate(zip(words, query_words, strict=True)):
+        x = np.bitwise_xor(column, query_word)
+        np.right_shift(x, np.uint64(1), out=tmp)
+        tmp &= _M1
+        x -= tmp
+        np.right_shift(x, np.uint64(2), out=tmp)
+        tmp &= _M2
+        x &= _M2
+        x += tmp
+        np.right_shift(x, np.uint64(4), out=tmp)
+        x += tmp
+        x &= _M4
+        acc += x  # per-byte counts
+
+        if (i + 1) % _WORDS_PER_SUM == 0 or i == len(words) - 1:
+            acc *= _H01
+            acc >>= np.uint64(56)
+            total += acc.astype(np.uint32)
+            acc[:] = 0
+
+    return total
@@ -0,0 +1,284 @@
+"""Concurrent recall stages with per-stage timeouts and timings.
+
+The vector, BM25 and graph recall paths are independent until their
+candidates are merged, so they run side by side on a shared thread pool
+and the recall wall time is the slowest stage rather than their sum. A
+stage still running when its timeout (RECALL_TIMEOUTS_MS) expires is
+dropped: the query goes on with the other stages' candidates.
+
+Note:
+- A stage's timeout counts from when it starts on a worker and is per
+  query: a batch pass of n queries gets n times the budget. A stage
+  still queued for a worker after its timeout is dropped too
+- A dropped stage is cancelled cooperatively: stages call
+  `check_cancelled` between the queries of a batch, so abandoned work
+  stops at the next query instead of holding a worker that later
+  passes need. Its result is discarded
+- If every stage overruns, none is dropped: the pass waits for them,
+  as if they had run one after another, rather than recall nothing
+- Errors raised by a stage propagate, only timeouts are tolerated
+- With RECALL_PARALLEL off (the default, as the stages are mostly
+  GIL-bound) they run one after another with no timeouts; this is the
+  baseline the critical-path saving is measured against
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextvars import ContextVar, copy_context
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from app.config import settings
+from app.core.tracing import annotate, span
+from app.models.retrieval import RecallStageStats, RecallStats
+
+# Recall timings kept for percentiles
+_TIMING_WINDOW = 512
+
+# Set once the running stage has been dropped
+_cancel: ContextVar[Optional[threading.Event]] = ContextVar(
+    "recall_stage_cancel", default=None
+)
+
+
+class StageCancelled(Exception):
+    """Raised inside a dropped stage to stop its remaining work."""
+
+
+class RecallTimings(NamedTuple):
+    """Wall times of one recall pass, in milliseconds."""
+
+    stages: Dict[str, float]  # per stage (dropped stages: time waited)
+    dropped: List[str]
+    wall_ms: float
+
+    @property
+    def serial_ms(self) -> float:
+        """Time the stages would have taken one after another."""
+        return sum(self.stages.values())
+
+    @property
+    def saved_ms(self) -> float:
+        """Critical-path saving of running the stages side by side."""
+        return max(0.0, self.serial_ms - self.wall_ms)
+
+
+class _Started:
+    """When a submitted stage began running on a worker."""
+
+    __slots__ = ("_at", "_event")
+
+    def __init__(self) -> None:
+        self._at = 0.0
+        self._event = threading.Event()
+
+    def mark(self) -> None:
+        """Record that the stage starts now."""
+        self._at = time.perf_counter()
+        self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for the stage to start."""
+        return self._event.wait(timeout)
+
+    def at(self, default: float) -> float:
+        """Start time, or `default` if the stage has not started."""
+        return self._at if self._event.is_set() else default
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+_timings: Deque[RecallTimings] = deque(maxlen=_TIMING_WINDOW)
+_timeouts: Dict[str, int] = {}
+_timings_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Return the shared stage pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.recall_workers,
+                thread_name_prefix="recall-stage",
+            )
+        return _pool
+
+
+def run_stages(
+    stages: Dict[str, Callable[[], Any]],
+    batch: int = 1,
+) -> Dict[str, Any]:
+    """Run independent recall stages and return each one's result.
+
+    Args:
+        stages: Stage name to a zero-argument callable.
+        batch: Number of queries the stages serve; timeouts scale with it.
+
+    Returns:
+        Stage name to result, or None for a stage dropped on timeout.
+    """
+    start = time.perf_counter()
+    results: Dict[str, Any] = {}
+    wall: Dict[str, float] = {}
+    dropped: List[str] = []
+
+    if not settings.recall_parallel:
+        for name, stage in stages.items():
+            results[name], wall[name] = _timed(name, stage)
+    else:
+        pool = _get_pool()
+        started = {name: _Started() for name in stages}
+        cancel = {name: threading.Event() for name in stages}
+        # Each stage carries the caller's context, so its span nests
+        futures: Dict[str, Future] = {
+            name: pool.submit(
+                copy_context().run, _timed, name, stage, started[name], cancel[name]
+            )
+            for name, stage in stages.items()
+        }
+        for name, future in futures.items():
+            timeout = settings.recall_timeouts_ms.get(name, 0) / 1000 * batch
+            try:
+                if timeout > 0:
+                    result, wall[name] = _result(future, started[name], start, timeout)
+                else:
+                    result, wall[name] = future.result()
+            except FutureTimeout:
+                future.cancel()
+                result = None
+                wall[name] = (time.perf_counter() - started[name].at(start)) * 1000
+                dropped.append(name)
+            results[name] = result
+
+        if dropped and len(dropped) == len(stages):
+            # Nothing to merge: wait for the stages rather than recall nothing
+            annotate(overran=",".join(dropped))
+            for name in dropped:
+                if futures[name].cancelled():
+                    results[name], wall[name] = _timed(name, stages[name])
+                else:
+                    results[name], wall[name] = futures[name].result()
+            _count_timeouts(dropped)
+            dropped = []
+
+        for name in dropped:
+            cancel[name].set()
+
+    timings = RecallTimings(
+        stages=wall,
+        dropped=dropped,
+        wall_ms=(time.perf_counter() - start) * 1000,
+    )
+    if dropped:
+        annotate(dropped=",".join(dropped))
+    with _timings_lock:
+        _timings.append(timings)
+    _count_timeouts(dropped)
+
+    return results
+
+
+def _result(
+    future: Future,
+    started: _Started,
+    submitted: float,
+    timeout: float,
+) -> Tuple[Any, float]:
+    """Wait for a stage until `timeout` after it started on a worker.
+
+    Raises:
+        FutureTimeout: If the stage overran, or was not started within
+            `timeout` of being submitted.
+    """
+    if not started.wait(max(0.0, submitted + timeout - time.perf_counter())):
+        raise FutureTimeout
+    deadline = started.at(submitted) + timeout
+    return future.result(timeout=max(0.0, deadline - time.perf_counter()))
+
+
+def _count_timeouts(names: List[str]) -> None:
+    """Count stages that overran their timeout."""
+    with _timings_lock:
+        for name in names:
+            _timeouts[name] = _timeouts.get(name, 0) + 1
+
+
+def check_cancelled() -> None:
+    """Stop the running stage if it has been dropped.
+
+    Stages call this between units of work (the queries of a batch).
+
+    Raises:
+        StageCancelled: If run_stages dropped the stage on timeout.
+    """
+    event = _cancel.get()
+    if event is not None and event.is_set():
+        raise StageCancelled
+
+
+def _timed(
+    name: str,
+    stage: Callable[[], Any],
+    started: Optional[_Started] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Tuple[Any, float]:
+    """Run a stage in its span, returning its result and wall time in ms.
+
+    A stage cancelled part-way returns None; nobody waits for it.
+    """
+    if started is not None:
+        started.mark()
+    _cancel.set(cancel)
+    began = time.perf_counter()
+    with span(name):
+        try:
+            result = stage()
+        except StageCancelled:
+            result = None
+            annotate(cancelled=True)
+    return result, (time.perf_counter() - began) * 1000
+
+
+def reset_recall_stats() -> None:
+    """Forget recorded timings and timeouts."""
+    with _timings_lock:
+        _timings.clear()
+        _timeouts.clear()
+
+
+def recall_stats() -> RecallStats:
+    """Return per-stage wall times, timeouts and the critical-path saving."""
+    with _timings_lock:
+        timings = list(_timings)
+        timeouts = dict(_timeouts)
+
+    names = list(dict.fromkeys(name for t in timings for name in t.stages))
+    stages: List[RecallStageStats] = []
+    for name in names:
+        ms = np.array([t.stages[name] for t in timings if name in t.stages])
+        stages.append(
+            RecallStageStats(
+                stage=name,
+                runs=len(ms),
+                timeouts=timeouts.get(name, 0),
+                p50_ms=round(float(np.percentile(ms, 50)), 2),
+                p95_ms=round(float(np.percentile(ms, 95)), 2),
+            )
+        )
+
+    def mean(values: List[float]) -> float:
+        return round(float(np.mean(values)), 2) if values else 0.0
+
+    return RecallStats(
+        parallel=settings.recall_parallel,
+        passes=len(timings),
+        wall_ms_mean=mean([t.wall_ms for t in timings]),
+        serial_ms_mean=mean([t.serial_ms for t in timings]),
+        saved_ms_mean=mean([t.saved_ms for t in timings]),
+        stages=stages,
+    )
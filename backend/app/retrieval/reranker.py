@@ -2,9 +2,13 @@
 
 from typing import List
 
+from app.core.metrics import inference, rerank_candidates
 from app.models.retrieval import ScoredChunk
 from sentence_transformers import CrossEncoder
 
+# Pairs per cross-encoder forward pass
+_BATCH_SIZE = 64
+
 
 class CrossEncoderReranker:
     """Cross-encoder reranker for precise relevance scoring.
@@ -26,15 +30,38 @@ class CrossEncoderReranker:
         top_k: int,
     ) -> List[ScoredChunk]:
         """Rerank candidate chunks using cross-encoder relevance scores."""
-        if not candidates:
-            return []
+        return self.rerank_batch([query], [candidates], top_k)[0]
+
+    def rerank_batch(
+        self,
+        queries: List[str],
+        candidates: List[List[ScoredChunk]],
+        top_k: int,
+    ) -> List[List[ScoredChunk]]:
+        """Rerank the candidates of several queries.
+
+        All (query, chunk) pairs are scored together, so the model runs
+        full batches instead of one short batch per query.
+        """
+        for pool in candidates:
+            rerank_candidates.observe(len(pool))
 
-        pairs = [(query, sc.chunk.text) for sc in candidates]
+        pairs = [
+            (query, sc.chunk.text)
+            for query, pool in zip(queries, candidates, strict=True)
+            for sc in pool
+        ]
+        if not pairs:
+            return [[] for _ in queries]
 
-        scores = self.model.predict(pairs)
+        with inference("cross_encoder", len(pairs)):
+            scores = iter(self.model.predict(pairs, batch_size=_BATCH_SIZE))
 
-        for sc, score in zip(candidates, scores):
-            sc.score = float(score)
+        reranked: List[List[ScoredChunk]] = []
+        for pool in candidates:
+            for sc in pool:
+                sc.score = float(next(scores))
+            pool.sort(key=lambda x: x.score, reverse=True)
+            reranked.append(pool[:top_k])
 
-        candidates.sort(key=lambda x: x.score, reverse=True)
-        return candidates[:top_k]
+        return reranked
@@ -1,20 +1,29 @@
 """Unified Hybrid + Adaptive Graph-RAG retrieval."""
 
-from typing import Dict, List, Set
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set
 
-from app.ingestion.entities import NLP
+from app.config import settings
+from app.core.admission import rerank_stage
+from app.core.concepts import normalize_concept
+from app.core.embeddings import embed_texts
+from app.core.tracing import annotate, span
 from app.models.retrieval import ScoredChunk
-from app.retrieval.chunk_registry import get_chunks
+from app.retrieval.chunk_registry import chunk_store
+from app.retrieval.doc_router import document_router
 from app.retrieval.graph_utils import (
     adaptive_hops,
     build_graph,
-    chunks_from_entities,
+    corpus_graph,
     expand_entities,
-    extract_query_entities,
+    handles_from_entities,
+    match_query_concepts,
 )
 from app.retrieval.keyword_index import bm25_search
+from app.retrieval.recall_stages import check_cancelled, run_stages
 from app.retrieval.reranker import CrossEncoderReranker
-from app.retrieval.vector_store import vector_search
+from app.retrieval.sharding import shard_coordinator
+from app.retrieval.vector_store import hybrid_search_batch, vector_search_batch
 
 # Keywords that indicate comparison-style queries
 _COMPARISON_KEYWORDS = {
@@ -26,76 +35,292 @@ _COMPARISON_KEYWORDS = {
     "versus",
 }
 
-# Initialize reranker once
-_reranker = CrossEncoderReranker()
+
+@lru_cache(maxsize=1)
+def get_reranker() -> CrossEncoderReranker:
+    """Initialize the reranker once, on first use.
+
+    Shard processes only run recall and never load it.
+    """
+    return CrossEncoderReranker()
 
 
 def _fallback_query_terms(query: str) -> Set[str]:
-    """Fallback entity-like terms when NER fails."""
-    return {token.lower() for token in query.split() if len(token) >= 4}
+    """Fallback entity-like terms when no known concept matches."""
+    terms = {normalize_concept(token) for token in query.split() if len(token) >= 4}
+    terms.discard("")
+    return terms
+
+
+def route_chunks(
+    query: str,
+    query_vector: Sequence[float],
+    doc_ids: Optional[Iterable[str]] = None,
+) -> Optional[Set[int]]:
+    """Coarse routing stage: chunk handles of the most relevant documents.
+
+    Documents the caller selected are all kept, however many there are;
+    only unrestricted queries are routed. Returns None when recall should
+    cover the whole corpus, i.e. no documents were selected and routing
+    is disabled or would keep every document.
+    """
+    if doc_ids is not None:
+        return document_router.handles(doc_ids)
+
+    fan_out = settings.route_fan_out
+    if fan_out <= 0 or len(document_router) <= fan_out:
+        return None
+
+    routed = document_router.route(query, query_vector, fan_out)
+    return document_router.handles(routed)
 
 
-def hybrid_graph_search(query: str, top_k: int) -> List[ScoredChunk]:
+def hybrid_graph_search(
+    query: str,
+    top_k: int,
+    doc_ids: Optional[Iterable[str]] = None,
+) -> List[ScoredChunk]:
     """Hybrid + Adaptive Graph-RAG retrieval.
 
     Design principles:
+    - Documents are routed first; recall only covers routed documents
     - Recall is BROAD and independent of top_k
     - Graph-RAG activates for abstract & comparison queries
     - Cross-encoder reranker provides final precision
     - top_k controls ONLY final context size
+
+    When sharded, recall is scattered to every shard and the merged
+    candidate pool is reranked once here.
+
+    Args:
+        query: Search query.
+        top_k: Final number of chunks.
+        doc_ids: Optional documents to restrict retrieval to.
+    """
+    return hybrid_graph_search_batch([query], top_k, doc_ids)[0]
+
+
+def hybrid_graph_search_batch(
+    queries: List[str],
+    top_k: int,
+    doc_ids: Optional[Iterable[str]] = None,
+) -> List[List[ScoredChunk]]:
+    """Run `hybrid_graph_search` for many queries at once.
+
+    Every model runs once per batch rather than once per query: one
+    embedding pass and one vector store batch search, then batched
+    cross-encoder scoring over all (query, chunk) pairs. Query concepts
+    come from the ingest-time vocabulary, with no NLP pass.
+
+    Args:
+        queries: Search queries.
+        top_k: Final number of chunks per query.
+        doc_ids: Optional documents to restrict retrieval to.
+
+    Returns:
+        Final chunks for each query, in query order.
+    """
+    if not queries:
+        return []
+
+    with span("recall", queries=len(queries), sharded=shard_coordinator.enabled):
+        if shard_coordinator.enabled:
+            candidates = shard_coordinator.recall_batch(queries, top_k, doc_ids)
+        else:
+            candidates = recall_candidates_batch(queries, top_k, doc_ids)
+        annotate(candidates=sum(len(pool) for pool in candidates))
+
+    return select_final_batch(queries, candidates, top_k)
+
+
+def recall_candidates(
+    query: str,
+    top_k: int,
+    doc_ids: Optional[Iterable[str]] = None,
+    query_vector: Optional[Sequence[float]] = None,
+) -> List[ScoredChunk]:
+    """Recall stage: routed vector, BM25 and graph candidates, unranked.
+
+    Args:
+        query: Search query.
+        top_k: Final number of chunks (recall depth scales with it).
+        doc_ids: Optional documents to restrict recall to.
+        query_vector: Precomputed query embedding, if already available.
     """
+    return recall_candidates_batch(
+        [query],
+        top_k,
+        doc_ids,
+        query_vectors=None if query_vector is None else [query_vector],
+    )[0]
+
+
+def recall_candidates_batch(
+    queries: List[str],
+    top_k: int,
+    doc_ids: Optional[Iterable[str]] = None,
+    query_vectors: Optional[Sequence[Sequence[float]]] = None,
+) -> List[List[ScoredChunk]]:
+    """Recall stage for many queries, sharing model and index calls.
+
+    Args:
+        queries: Search queries.
+        top_k: Final number of chunks (recall depth scales with it).
+        doc_ids: Optional documents to restrict recall to.
+        query_vectors: Precomputed query embeddings, if already available.
+    """
+    selected = None if doc_ids is None else list(doc_ids)
+
+    # 0. Coarse routing to the most relevant documents
+    if query_vectors is None:
+        with span("embed_query"):
+            query_vectors = embed_texts(queries)
+    with span("route"):
+        routed = [
+            route_chunks(query, vector, selected)
+            for query, vector in zip(queries, query_vectors, strict=True)
+        ]
+
     # 1. Broad seed retrieval (recall-focused)
     seed_k = max(top_k * 4, 8)
 
-    vector_hits = vector_search(query, top_k=seed_k)
-    bm25_hits = bm25_search(query, top_k=seed_k)
+    chunk_ids = [
+        None if handles is None else [chunk_store.chunk_id(h) for h in handles]
+        for handles in routed
+    ]
+    native_lexical = settings.lexical_backend == "qdrant"
+
+    def vector_stage() -> List[List[ScoredChunk]]:
+        if native_lexical:
+            # Dense and BM25 hits of every query from one Qdrant request
+            return hybrid_search_batch(
+                queries, query_vectors, top_k=seed_k, chunk_ids=chunk_ids
+            )
+        return vector_search_batch(query_vectors, top_k=seed_k, chunk_ids=chunk_ids)
+
+    def bm25_stage() -> List[List[ScoredChunk]]:
+        hits = []
+        for query, handles in zip(queries, routed, strict=True):
+            check_cancelled()
+            hits.append(bm25_search(query, top_k=seed_k, handles=handles))
+        return hits
+
+    def graph_stage() -> List[List[int]]:
+        return _graph_recall(queries, routed)
+
+    # The recall paths are independent until the merge: run them side by
+    # side, dropping any that outlast their timeout
+    stages = {"vector": vector_stage, "graph": graph_stage}
+    if not native_lexical:
+        stages["bm25"] = bm25_stage
+    recalled = run_stages(stages, batch=len(queries))
+
+    empty: List[list] = [[] for _ in queries]
+    vector_hits = recalled["vector"] or empty
+    bm25_hits = recalled.get("bm25") or empty
+    graph_handles = recalled["graph"] or empty
+    annotate(
+        vector_hits=sum(len(hits) for hits in vector_hits),
+        bm25_hits=sum(len(hits) for hits in bm25_hits),
+        graph_hits=sum(len(handles) for handles in graph_handles),
+    )
+
+    # 3. Merge recall pools (graph chunks are only materialized if new)
+    pools: List[List[ScoredChunk]] = []
+    for hits, lexical, handles in zip(
+        vector_hits, bm25_hits, graph_handles, strict=True
+    ):
+        combined: Dict[str, ScoredChunk] = {sc.chunk.chunk_id: sc for sc in hits}
+
+        for sc in lexical:
+            combined.setdefault(sc.chunk.chunk_id, sc)
+
+        new_handles = [
+            handle for handle in handles if chunk_store.chunk_id(handle) not in combined
+        ]
+        graph_recalled = [
+            ScoredChunk(
+                chunk=chunk,
+                # Recall-only score (NOT ranking score)
+                score=0.20 + (0.05 * len(chunk.entities)),
+            )
+            for chunk in chunk_store.hydrate_many(new_handles)
+        ]
 
-    combined: Dict[str, ScoredChunk] = {sc.chunk.chunk_id: sc for sc in vector_hits}
+        pools.append(list(combined.values()) + graph_recalled)
 
-    for sc in bm25_hits:
-        combined.setdefault(sc.chunk.chunk_id, sc)
+    return pools
 
-    # 2. Graph-based recall expansion
-    all_chunks = get_chunks()
-    graph = build_graph(all_chunks)
 
-    query_entities = extract_query_entities(query, NLP)
+def _graph_recall(
+    queries: List[str],
+    routed: List[Optional[Set[int]]],
+) -> List[List[int]]:
+    """Graph-based recall expansion: chunk handles reached from query concepts."""
+    # Known concepts, matched against the ingest-time vocabulary
+    entity_sets = match_query_concepts(queries)
 
-    # Fallback when NER finds nothing
-    if not query_entities:
-        query_entities = _fallback_query_terms(query)
+    recalled: List[List[int]] = []
+    for query, handles, query_entities in zip(
+        queries, routed, entity_sets, strict=True
+    ):
+        # Stop between queries once the graph stage has been dropped
+        check_cancelled()
 
-    hops = adaptive_hops(len(query_entities))
+        # Fallback when no known concept matches
+        if not query_entities:
+            query_entities = _fallback_query_terms(query)
 
-    graph_recalled: List[ScoredChunk] = []
+        hops = adaptive_hops(len(query_entities))
+        if hops <= 0 or not query_entities:
+            recalled.append([])
+            continue
+
+        # Unrouted queries share the corpus graph, cached until ingest
+        graph = build_graph(handles) if handles is not None else corpus_graph()
 
-    if hops > 0 and query_entities:
         expanded_entities = expand_entities(graph, query_entities, hops)
-        graph_chunks = chunks_from_entities(all_chunks, expanded_entities)
-
-        for chunk in graph_chunks:
-            if chunk.chunk_id not in combined:
-                graph_recalled.append(
-                    ScoredChunk(
-                        chunk=chunk,
-                        # Recall-only score (NOT ranking score)
-                        score=0.20 + (0.05 * len(chunk.entities)),
-                    )
-                )
-
-    # 3. Merge recall pools
-    candidates = list(combined.values()) + graph_recalled
-
-    if not candidates:
-        return []
+        recalled.append(handles_from_entities(expanded_entities, handles))
+
+    return recalled
+
+
+def select_final(
+    query: str,
+    candidates: List[ScoredChunk],
+    top_k: int,
+) -> List[ScoredChunk]:
+    """Precision stage: rerank recalled candidates and pick the final set."""
+    return select_final_batch([query], [candidates], top_k)[0]
+
+
+def select_final_batch(
+    queries: List[str],
+    candidates: List[List[ScoredChunk]],
+    top_k: int,
+) -> List[List[ScoredChunk]]:
+    """Precision stage for many queries, reranked in shared batches."""
+    # 4. Cross-encoder reranking (precision step), within the rerank limit
+    pairs = sum(len(pool) for pool in candidates)
+    with span("rerank", pairs=pairs), rerank_stage.slot():
+        reranked = get_reranker().rerank_batch(
+            queries=queries,
+            candidates=candidates,
+            top_k=max(top_k, 2),
+        )
+
+    return [
+        _final_selection(query, ranked, top_k)
+        for query, ranked in zip(queries, reranked, strict=True)
+    ]
 
-    # 4. Cross-encoder reranking (precision step)
-    reranked = _reranker.rerank(
-        query=query,
-        candidates=candidates,
-        top_k=max(top_k, 2),
-    )
 
+def _final_selection(
+    query: str,
+    reranked: List[ScoredChunk],
+    top_k: int,
+) -> List[ScoredChunk]:
+    """Pick the final chunks from a reranked pool."""
     # 5. Comparison-safe final selection
     is_comparison = any(keyword in query.lower() for keyword in _COMPARISON_KEYWORDS)
 
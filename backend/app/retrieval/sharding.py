@@ -0,0 +1,481 @@
+"""Sharded scatter-gather retrieval.
+
+With `settings.shard_count > 0`, documents are partitioned across that
+many local shard processes by a stable hash of `doc_id`. Each shard owns
+a full, independent set of indexes (chunk registry, BM25, concept index,
+document router, vector store under `shard_path/shard-<i>`).
+
+The coordinator (the API process):
+
+- forwards ingestion writes and removals to the owning shard
+- fans recall out to every shard in parallel, with the query embedded once
+- merges the candidate pools; reranking then runs once over the merge
+
+Per-shard recall latency is kept for the last requests so stragglers show
+up in `stats()`.
+
+Note:
+- Near-duplicate folding only spans documents on the same shard
+- Each shard applies document routing to its own documents
+- Shard-local scores (BM25 IDF is per shard) only pick each shard's
+  candidates; they are never compared across shards, since the merged
+  pool is re-scored by the cross-encoder
+- A shard whose process died is marked down: recall goes on with the
+  other shards, and requests for documents it owns raise `ShardError`
+- Shards are started by a single API process: a second uvicorn worker
+  would start its own shards over the same files, so it fails at startup
+- With a Qdrant server (QDRANT_URL), each shard has its own collection
+- Each shard serves reads (recall, chunk gathering, sizes) on a second
+  pipe, so a long write to a shard does not hold up recall fan-out to it
+"""
+
+import fcntl
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.connection import Connection
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from app.config import settings
+from app.core.embeddings import embed_texts
+from app.core.tracing import annotate
+from app.models.ingestion import Chunk
+from app.models.retrieval import DocumentMemory, ScoredChunk, ShardStats
+from app.retrieval.chunk_registry import chunk_store
+from app.retrieval.chunk_registry import get_chunks as get_local_chunks
+
+# Recall latencies kept per shard for percentiles
+_LATENCY_WINDOW = 256
+
+# Requests served on a shard's read pipe, alongside writes
+_READS = frozenset({"recall", "chunks", "count", "memory"})
+
+
+class ShardError(RuntimeError):
+    """Raised when a shard process fails a request or is down."""
+
+
+def shard_for(doc_id: str, shard_count: int) -> int:
+    """Return the shard owning a document (stable across restarts)."""
+    return zlib.crc32(doc_id.encode()) % shard_count
+
+
+class _Shard:
+    """Coordinator-side handle of one shard process."""
+
+    def __init__(
+        self,
+        shard_id: int,
+        process,
+        conn: Connection,
+        read_conn: Optional[Connection] = None,
+    ) -> None:
+        self.shard_id = shard_id
+        self.process = process
+        self.conn = conn
+        self.read_conn = read_conn
+        # One request in flight per pipe
+        self.lock = threading.Lock()
+        self.read_lock = threading.Lock()
+        self.recall_ms: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.round_trip_ms: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self.dirty = False  # written since the last lexical refresh
+        self.alive = True  # False once the pipe broke
+
+    def call(self, op: str, *args: Any) -> Any:
+        """Send a request and wait for its reply.
+
+        Raises:
+            ShardError: If the shard failed the request or is down.
+        """
+        conn, lock = self.conn, self.lock
+        if op in _READS and self.read_conn is not None:
+            conn, lock = self.read_conn, self.read_lock
+
+        with lock:
+            if not self.alive:
+                msg = f"Shard {self.shard_id} is down"
+                raise ShardError(msg)
+            try:
+                conn.send((op, args))
+                status, result = conn.recv()
+            except (EOFError, OSError) as e:
+                # The process died (or was killed); its pipe is unusable
+                self.alive = False
+                msg = f"Shard {self.shard_id} is down: {e!r}"
+                raise ShardError(msg) from e
+
+        if status == "error":
+            msg = f"Shard {self.shard_id} failed {op}: {result}"
+            raise ShardError(msg)
+        return result
+
+
+class ShardCoordinator:
+    """Starts shard processes and scatters/gathers requests."""
+
+    def __init__(self, shard_count: int, path: Path) -> None:
+        """Configure the coordinator; processes start in `start`."""
+        self.shard_count = shard_count
+        self.path = path
+        self._shards: List[_Shard] = []
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock_file = None  # held while this process owns the shards
+
+    @property
+    def enabled(self) -> bool:
+        """Whether requests are served by shard processes."""
+        return bool(self._shards)
+
+    def start(self) -> None:
+        """Spawn the shard processes.
+
+        Raises:
+            ShardError: If another process already runs the shards.
+        """
+        if self._shards or self.shard_count <= 0:
+            return
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.path / "coordinator.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as e:
+            lock_file.close()
+            msg = (
+                f"Shards under {self.path} are run by another process; "
+                "SHARD_COUNT needs a single uvicorn worker (WEB_CONCURRENCY=1)"
+            )
+            raise ShardError(msg) from e
+        self._lock_file = lock_file
+
+        ctx = get_context("spawn")
+        for shard_id in range(self.shard_count):
+            parent, child = ctx.Pipe()
+            read_parent, read_child = ctx.Pipe()
+            process = ctx.Process(
+                target=_serve_shard,
+                args=(shard_id, str(self.path), child, read_child),
+                name=f"shard-{shard_id}",
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            read_child.close()
+            self._shards.append(_Shard(shard_id, process, parent, read_parent))
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.shard_count,
+            thread_name_prefix="shard-call",
+        )
+        # Wait until every shard has loaded its models and indexes
+        self._scatter("ping")
+
+    def shutdown(self) -> None:
+        """Flush and stop the shard processes."""
+        if not self._shards:
+            return
+
+        try:
+            self._scatter("flush")
+        finally:
+            for shard in self._shards:
+                shard.conn.close()
+                shard.read_conn.close()
+                shard.process.join(timeout=10)
+                if shard.process.is_alive():
+                    shard.process.terminate()
+            self._pool.shutdown(wait=False)
+            self._shards, self._pool = [], None
+            self._lock_file.close()
+            self._lock_file = None
+
+    def write_batch(self, chunks: List[Chunk]) -> Set[str]:
+        """Write chunks to their owning shards; returns folded chunk IDs."""
+        by_shard: Dict[int, List[Chunk]] = {}
+        for chunk in chunks:
+            by_shard.setdefault(self._owner(chunk.doc_id), []).append(chunk)
+
+        futures = [
+            self._pool.submit(self._shards[shard_id].call, "write", batch)
+            for shard_id, batch in by_shard.items()
+        ]
+        for shard_id in by_shard:
+            self._shards[shard_id].dirty = True
+
+        folded: Set[str] = set()
+        for future in futures:
+            folded |= future.result()
+        return folded
+
+    def refresh_lexical_index(self) -> None:
+        """Rebuild BM25 on shards written since their last rebuild."""
+        dirty = [shard for shard in self._shards if shard.dirty]
+        for shard in dirty:
+            shard.dirty = False
+        self._scatter("refresh", shards=dirty)
+
+    def remove_document(self, doc_id: str) -> int:
+        """Remove a document from its shard; returns chunks removed."""
+        return self._shards[self._owner(doc_id)].call("remove", doc_id)
+
+    def purge_document(self, doc_id: str) -> None:
+        """Delete a document's vectors on its shard."""
+        self._shards[self._owner(doc_id)].call("purge", doc_id)
+
+    def get_chunks(self, doc_ids: Optional[Iterable[str]] = None) -> List[Chunk]:
+        """Gather registered chunks, of some documents or of all of them.
+
+        Only the shards owning the selected documents are asked.
+        """
+        selected = None if doc_ids is None else list(doc_ids)
+        shards = self._shards
+        if selected is not None:
+            owners = {self._owner(doc_id) for doc_id in selected}
+            shards = [shard for shard in shards if shard.shard_id in owners]
+        return [
+            chunk
+            for chunks in self._scatter("chunks", selected, shards=shards)
+            for chunk in chunks
+        ]
+
+    def memory_usage(self) -> List[DocumentMemory]:
+        """Gather per-document memory usage from all shards."""
+        return [doc for usage in self._scatter("memory") for doc in usage]
+
+    def recall(
+        self,
+        query: str,
+        top_k: int,
+        doc_ids: Optional[Iterable[str]] = None,
+    ) -> List[ScoredChunk]:
+        """Fan recall out to every shard and merge the candidate pools."""
+        return self.recall_batch([query], top_k, doc_ids)[0]
+
+    def recall_batch(
+        self,
+        queries: List[str],
+        top_k: int,
+        doc_ids: Optional[Iterable[str]] = None,
+    ) -> List[List[ScoredChunk]]:
+        """Fan a batch of queries out to every shard in one request each.
+
+        Shards that are down are skipped, so recall degrades to the
+        documents of the live shards rather than failing.
+
+        Raises:
+            ShardError: If no shard that was asked could answer.
+        """
+        query_vectors = embed_texts(queries)
+        selected = None if doc_ids is None else list(doc_ids)
+
+        shards = self._shards
+        if selected is not None:
+            owners = {self._owner(doc_id) for doc_id in selected}
+            shards = [shard for shard in shards if shard.shard_id in owners]
+
+        def recall_on(shard: _Shard) -> List[List[ScoredChunk]]:
+            start = time.perf_counter()
+            pools, recall_ms = shard.call(
+                "recall", queries, top_k, selected, query_vectors
+            )
+            shard.round_trip_ms.append((time.perf_counter() - start) * 1000)
+            shard.recall_ms.append(recall_ms)
+            return pools
+
+        futures = [
+            self._pool.submit(recall_on, shard) for shard in shards if shard.alive
+        ]
+        down = len(shards) - len(futures)
+
+        # Candidates are only pooled; their shard-local scores are replaced
+        # by the cross-encoder before any ranking across shards
+        merged: List[Dict[str, ScoredChunk]] = [{} for _ in queries]
+        for future in futures:
+            try:
+                pools = future.result()
+            except ShardError:
+                down += 1
+                continue
+            for pool, candidates in zip(merged, pools, strict=True):
+                for sc in candidates:
+                    pool.setdefault(sc.chunk.chunk_id, sc)
+
+        if down:
+            annotate(shards_down=down)
+            if down == len(shards):
+                msg = "No shard is available for recall"
+                raise ShardError(msg)
+        return [list(pool.values()) for pool in merged]
+
+    def stats(self) -> List[ShardStats]:
+        """Return per-shard sizes and recall latency percentiles."""
+        counts = self._scatter("count", tolerate_down=True)
+        stats: List[ShardStats] = []
+
+        for shard, count in zip(self._shards, counts, strict=True):
+            documents, chunks = count or (0, 0)
+            recall = np.array(shard.recall_ms or [0.0])
+            round_trip = np.array(shard.round_trip_ms or [0.0])
+            stats.append(
+                ShardStats(
+                    shard=shard.shard_id,
+                    alive=shard.alive and shard.process.is_alive(),
+                    documents=documents,
+                    chunks=chunks,
+                    queries=len(shard.recall_ms),
+                    recall_p50_ms=round(float(np.percentile(recall, 50)), 2),
+                    recall_p95_ms=round(float(np.percentile(recall, 95)), 2),
+                    recall_max_ms=round(float(recall.max()), 2),
+                    round_trip_p95_ms=round(float(np.percentile(round_trip, 95)), 2),
+                )
+            )
+
+        return stats
+
+    def _owner(self, doc_id: str) -> int:
+        """Return the index of the shard owning a document."""
+        return shard_for(doc_id, len(self._shards))
+
+    def _scatter(
+        self,
+        op: str,
+        *args: Any,
+        shards=None,
+        tolerate_down: bool = False,
+    ) -> List[Any]:
+        """Send the same request to shards in parallel; results in order.
+
+        With `tolerate_down`, a shard that is down yields None.
+        """
+        targets = self._shards if shards is None else shards
+        futures = [self._pool.submit(shard.call, op, *args) for shard in targets]
+
+        results = []
+        for shard, future in zip(targets, futures, strict=True):
+            try:
+                results.append(future.result())
+            except ShardError:
+                if not (tolerate_down and not shard.alive):
+                    raise
+                results.append(None)
+        return results
+
+
+shard_coordinator = ShardCoordinator(settings.shard_count, Path(settings.shard_path))
+
+
+def all_chunks(doc_ids: Optional[Iterable[str]] = None) -> List[Chunk]:
+    """Return registered chunks, of some documents or of all of them.
+
+    Gathers from the owning shards when sharded.
+    """
+    if shard_coordinator.enabled:
+        return shard_coordinator.get_chunks(doc_ids)
+    return _local_chunks(doc_ids)
+
+
+def _local_chunks(doc_ids: Optional[Iterable[str]] = None) -> List[Chunk]:
+    """Registered chunks of this process, of some documents or of all."""
+    if doc_ids is None:
+        return get_local_chunks()
+
+    from app.retrieval.doc_router import document_router
+
+    handles = sorted(document_router.handles(doc_ids))
+    return chunk_store.hydrate_many(handles, touch=False)
+
+
+def all_memory_usage() -> List[DocumentMemory]:
+    """Return per-document memory usage, gathering from shards when sharded."""
+    if shard_coordinator.enabled:
+        return shard_coordinator.memory_usage()
+    return _local_memory_usage()
+
+
+def _local_memory_usage() -> List[DocumentMemory]:
+    """Memory usage of this process, with each document's index share."""
+    from app.retrieval.graph_utils import concept_bytes
+    from app.retrieval.keyword_index import bm25_bytes
+
+    return chunk_store.memory_usage(lambda h: bm25_bytes(h) + concept_bytes(h))
+
+
+def _serve_shard(
+    shard_id: int,
+    path: str,
+    conn: Connection,
+    read_conn: Connection,
+) -> None:
+    """Shard process main loop: own indexes, serve coordinator requests.
+
+    Writes are served on `conn`, reads on `read_conn` from a thread.
+    """
+    root = Path(path) / f"shard-{shard_id}"
+    settings.shard_count = 0  # a shard never delegates further
+    settings.qdrant_path = str(root / "qdrant")
+    settings.qdrant_collection = f"{settings.qdrant_collection}_shard{shard_id}"
+    settings.hnsw_path = str(root / "hnsw")
+    settings.quantized_path = str(root / "quantized")
+
+    # Imported here so each shard builds its own module-level indexes
+    from app.ingestion.pipeline import (
+        purge_document,
+        refresh_lexical_index,
+        remove_document,
+        write_batch,
+    )
+    from app.retrieval.doc_router import document_router
+    from app.retrieval.retrieve import recall_candidates_batch
+    from app.retrieval.vector_backends import get_vector_store
+
+    chunk_store.open()
+
+    def recall(queries, top_k, doc_ids, query_vectors):
+        start = time.perf_counter()
+        pools = recall_candidates_batch(
+            queries, top_k, doc_ids=doc_ids, query_vectors=query_vectors
+        )
+        return pools, (time.perf_counter() - start) * 1000
+
+    reads = {
+        "recall": recall,
+        "chunks": _local_chunks,
+        "count": lambda: (len(document_router), len(chunk_store)),
+        "memory": _local_memory_usage,
+    }
+    writes = {
+        "ping": lambda: shard_id,
+        "write": write_batch,
+        "refresh": refresh_lexical_index,
+        "remove": remove_document,
+        "purge": purge_document,
+        "flush": lambda: get_vector_store().flush(),
+    }
+
+    threading.Thread(
+        target=_serve, args=(read_conn, reads), name="shard-reads", daemon=True
+    ).start()
+    _serve(conn, writes)
+
+    get_vector_store().flush()
+    chunk_store.close()
+
+
+def _serve(conn: Connection, handlers: Dict[str, Any]) -> None:
+    """Answer requests on a pipe until the coordinator closes it."""
+    while True:
+        try:
+            op, args = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        try:
+            conn.send(("ok", handlers[op](*args)))
+        except Exception as e:
+            conn.send(("error", repr(e)))
@@ -0,0 +1,57 @@
+"""BM25 sparse vectors for Qdrant-native lexical search.
+
+With LEXICAL_BACKEND=qdrant, chunks are stored with a named sparse
+vector next to their embedding. Chunk weights are BM25 term-frequency
+weights (saturated, length-normalized against a typical chunk length)
+and query weights are IDF, so the sparse dot product Qdrant computes is
+a BM25 score. IDF is document-level, from the routing statistics.
+
+Note:
+- Terms map to indices by CRC32, so no vocabulary has to be stored
+- Tokenization matches the in-process BM25 index
+"""
+
+import zlib
+from typing import Dict
+
+from app.core.text import tokenize
+from app.retrieval.doc_router import document_router
+from app.retrieval.vector_backends import SparseTerms
+
+# BM25 parameters, as in the in-process index
+_K1 = 1.5
+_B = 0.75
+
+# Typical chunk length in tokens (chunks are at most MAX_CHARS long)
+_AVG_TOKENS = 230
+
+
+def chunk_sparse_vector(text: str) -> SparseTerms:
+    """BM25 term-frequency weights of a chunk."""
+    tokens = tokenize(text)
+    norm = _K1 * (1 - _B + _B * len(tokens) / _AVG_TOKENS)
+
+    counts: Dict[int, int] = {}
+    for token in tokens:
+        index = _term_index(token)
+        counts[index] = counts.get(index, 0) + 1
+
+    return SparseTerms(
+        indices=list(counts),
+        values=[tf * (_K1 + 1) / (tf + norm) for tf in counts.values()],
+    )
+
+
+def query_sparse_vector(text: str) -> SparseTerms:
+    """IDF weights of a query's terms (terms unseen in the corpus dropped)."""
+    weights: Dict[int, float] = {}
+    for token, idf in document_router.idf(set(tokenize(text))).items():
+        index = _term_index(token)
+        weights[index] = weights.get(index, 0.0) + idf
+
+    return SparseTerms(indices=list(weights), values=list(weights.values()))
+
+
+def _term_index(token: str) -> int:
+    """Stable sparse index of a term."""
+    return zlib.crc32(token.encode())
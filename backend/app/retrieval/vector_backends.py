@@ -0,0 +1,908 @@
+"""Pluggable vector storage backends.
+
+`index_chunks` and `vector_search` talk to a `VectorStore`, selected by
+`settings.vector_backend`:
+
+- "qdrant": Qdrant collection (local path mode by default)
+- "hnsw": built-in in-process HNSW graph persisted under `hnsw_path`
+- "quantized": binary/int8 codes in RAM, exact rescoring from a
+  memory-mapped float file under `quantized_path`
+
+Payloads carry `doc_id` (for `delete_doc`) and, unless
+`settings.vector_payload` is "ids", the chunk's text and metadata.
+
+With `settings.lexical_backend` "qdrant", Qdrant points also carry a
+named BM25 sparse vector, and lexical search runs in the same batch
+request as dense search (see app.retrieval.sparse).
+"""
+
+import pickle
+import threading
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import (
+    Collection,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import numpy as np
+from app.config import settings
+from app.core.metrics import register_index
+from app.retrieval.hnsw import HNSWIndex
+from app.retrieval.quantized import QuantizedIndex
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    HasIdCondition,
+    MatchValue,
+    NamedSparseVector,
+    PointStruct,
+    SearchRequest,
+    SparseVector,
+    SparseVectorParams,
+    VectorParams,
+)
+
+# Name of the BM25 sparse vector in the Qdrant collection
+SPARSE_VECTOR = "text"
+
+# Reciprocal rank fusion constant for dense + sparse hits
+_RRF_K = 60
+
+# Minimum seconds between in-process index snapshots to disk
+_SAVE_INTERVAL = 5.0
+
+_PAYLOADS_FILE = "payloads.pkl"
+
+
+class VectorHit(NamedTuple):
+    """A vector search hit."""
+
+    id: str
+    score: float
+    payload: dict
+
+
+class SparseTerms(NamedTuple):
+    """A sparse vector: term indices and their weights."""
+
+    indices: List[int]
+    values: List[float]
+
+
+class VectorStore(ABC):
+    """Storage for chunk vectors and their payloads."""
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: List[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: List[dict],
+        sparse: Optional[List[SparseTerms]] = None,
+    ) -> None:
+        """Insert or replace vectors with payloads.
+
+        `sparse` carries per-point sparse vectors for backends that store
+        them (Qdrant); others ignore it.
+        """
+
+    @abstractmethod
+    def search(
+        self,
+        vector: Sequence[float],
+        limit: int,
+        ids: Optional[Collection[str]] = None,
+        with_payload: bool = True,
+    ) -> List[VectorHit]:
+        """Return the `limit` most similar vectors, best first.
+
+        When `ids` is given, only those vectors are considered. Without
+        `with_payload`, hits carry an empty payload.
+        """
+
+    def search_batch(
+        self,
+        vectors: Sequence[Sequence[float]],
+        limit: int,
+        ids: Optional[Sequence[Optional[Collection[str]]]] = None,
+        with_payload: bool = True,
+    ) -> List[List[VectorHit]]:
+        """Search for several query vectors; `ids` restricts each query.
+
+        Backends with a native batch request override this loop.
+        """
+        return [
+            self.search(
+                vector,
+                limit,
+                ids=None if ids is None else ids[i],
+                with_payload=with_payload,
+            )
+            for i, vector in enumerate(vectors)
+        ]
+
+    def hybrid_search_batch(
+        self,
+        vectors: Sequence[Sequence[float]],
+        sparse: Sequence[SparseTerms],
+        limit: int,
+        ids: Optional[Sequence[Optional[Collection[str]]]] = None,
+        with_payload: bool = True,
+    ) -> List[List[VectorHit]]:
+        """Dense and sparse search per query, fused by reciprocal rank.
+
+        Each query returns the union of its `limit` dense and `limit`
+        sparse hits. Only backends storing sparse vectors implement it.
+        """
+        msg = (
+            f"{type(self).__name__} does not store sparse vectors; "
+            "LEXICAL_BACKEND=qdrant needs VECTOR_BACKEND=qdrant."
+        )
+        raise NotImplementedError(msg)
+
+    @abstractmethod
+    def get_payloads(self, ids: Collection[str]) -> Dict[str, dict]:
+        """Return stored payloads by ID, skipping unknown IDs."""
+
+    @abstractmethod
+    def scroll_payloads(self, batch_size: int) -> Iterator[Dict[str, dict]]:
+        """Iterate over every stored payload, in batches."""
+
+    @abstractmethod
+    def drop_payload_fields(self, fields: List[str]) -> None:
+        """Remove fields from every stored payload."""
+
+    @abstractmethod
+    def set_payload(self, point_id: str, payload: dict) -> None:
+        """Merge fields into a stored payload."""
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Delete vectors by ID."""
+
+    @abstractmethod
+    def delete_doc(self, doc_id: str) -> None:
+        """Delete every vector whose payload belongs to a document."""
+
+    @abstractmethod
+    def count(self) -> int:
+        """Return the number of stored vectors."""
+
+    @abstractmethod
+    def flush(self) -> None:
+        """Persist pending changes."""
+
+
+@lru_cache(maxsize=1)
+def get_qdrant_client() -> QdrantClient:
+    """Return the shared Qdrant client.
+
+    Local path mode loads the whole collection on open and holds a file
+    lock, so one client is reused rather than one per call. A Qdrant
+    server (`qdrant_url`) can be shared by several worker processes.
+    """
+    if settings.qdrant_url:
+        return QdrantClient(url=settings.qdrant_url)
+    return QdrantClient(path=settings.qdrant_path)
+
+
+class QdrantVectorStore(VectorStore):
+    """Vector store backed by a Qdrant collection."""
+
+    def __init__(self, client: QdrantClient, collection: str) -> None:
+        """Wrap a Qdrant client and collection name."""
+        self.client = client
+        self.collection = collection
+        self._has_sparse = False
+
+    def upsert(
+        self,
+        ids: List[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: List[dict],
+        sparse: Optional[List[SparseTerms]] = None,
+    ) -> None:
+        """Insert or replace points, creating the collection on first use."""
+        if not ids:
+            return
+
+        # Create collection if it doesn't exist
+        if not self.client.collection_exists(self.collection):
+            self.client.create_collection(
+                collection_name=self.collection,
+                vectors_config=VectorParams(
+                    size=len(vectors[0]),
+                    distance=Distance.COSINE,
+                ),
+                sparse_vectors_config=(
+                    {SPARSE_VECTOR: SparseVectorParams()}
+                    if settings.lexical_backend == "qdrant"
+                    else None
+                ),
+            )
+            self._has_sparse = settings.lexical_backend == "qdrant"
+
+        if sparse is None:
+            points = [
+                PointStruct(id=point_id, vector=list(vector), payload=payload)
+                for point_id, vector, payload in zip(
+                    ids, vectors, payloads, strict=True
+                )
+            ]
+        else:
+            self._ensure_sparse()
+            points = [
+                PointStruct(
+                    id=point_id,
+                    # "" is the collection's unnamed dense vector
+                    vector={
+                        "": list(vector),
+                        SPARSE_VECTOR: SparseVector(
+                            indices=terms.indices, values=terms.values
+                        ),
+                    },
+                    payload=payload,
+                )
+                for point_id, vector, payload, terms in zip(
+                    ids, vectors, payloads, sparse, strict=True
+                )
+            ]
+
+        self.client.upsert(collection_name=self.collection, points=points)
+
+    def search(
+        self,
+        vector: Sequence[float],
+        limit: int,
+        ids: Optional[Collection[str]] = None,
+        with_payload: bool = True,
+    ) -> List[VectorHit]:
+        """Search the collection, optionally restricted to point IDs."""
+        if not self.client.collection_exists(self.collection):
+            return []
+        if ids is not None and not ids:
+            return []
+
+        results = self.client.search(
+            collection_name=self.collection,
+            query_vector=list(vector),
+            query_filter=(
+                Filter(must=[HasIdCondition(has_id=list(ids))])
+                if ids is not None
+                else None
+            ),
+            limit=limit,
+            with_payload=with_payload,
+        )
+        return [
+            VectorHit(
+                id=str(point.id),
+                score=float(point.score),
+                payload=point.payload or {},
+            )
+            for point in results
+        ]
+
+    def search_batch(
+        self,
+        vectors: Sequence[Sequence[float]],
+        limit: int,
+        ids: Optional[Sequence[Optional[Collection[str]]]] = None,
+        with_payload: bool = True,
+    ) -> List[List[VectorHit]]:
+        """Run every query in a single Qdrant batch search request."""
+        results: List[List[VectorHit]] = [[] for _ in vectors]
+        if not self.client.collection_exists(self.collection):
+            return results
+
+        requests: List[SearchRequest] = []
+        positions: List[int] = []
+        for i, vector in enumerate(vectors):
+            restrict = None if ids is None else ids[i]
+            if restrict is not None and not restrict:
+                continue
+            requests.append(
+                SearchRequest(
+                    vector=list(vector),
+                    filter=(
+                        Filter(must=[HasIdCondition(has_id=list(restrict))])
+                        if restrict is not None
+                        else None
+                    ),
+                    limit=limit,
+                    with_payload=with_payload,
+                )
+            )
+            positions.append(i)
+
+        if not requests:
+            return results
+
+        batches = self.client.search_batch(
+            collection_name=self.collection,
+            requests=requests,
+        )
+        for i, points in zip(positions, batches, strict=True):
+            results[i] = [
+                VectorHit(
+                    id=str(point.id),
+                    score=float(point.score),
+                    payload=point.payload or {},
+                )
+                for point in points
+            ]
+        return results
+
+    def hybrid_search_batch(
+        self,
+        vectors: Sequence[Sequence[float]],
+        sparse: Sequence[SparseTerms],
+        limit: int,
+        ids: Optional[Sequence[Optional[Collection[str]]]] = None,
+        with_payload: bool = True,
+    ) -> List[List[VectorHit]]:
+        """Run every query's dense and sparse search in one batch request.
+
+        Fusion happens client-side: qdrant-client 1.9 has no query API
+        with server-side fusion, but both rankings arrive in one response.
+        """
+        results: List[List[VectorHit]] = [[] for _ in vectors]
+        if not self.client.collection_exists(self.collection):
+            return results
+        self._ensure_sparse()
+
+        requests: List[SearchRequest] = []
+        # (query position, dense request, sparse request or None)
+        slots: List[tuple] = []
+        for i, (vector, terms) in enumerate(zip(vectors, sparse, strict=True)):
+            restrict = None if ids is None else ids[i]
+            if restrict is not None and not restrict:
+                continue
+            query_filter = (
+                Filter(must=[HasIdCondition(has_id=list(restrict))])
+                if restrict is not None
+                else None
+            )
+            requests.append(
+                SearchRequest(
+                    vector=list(vector),
+                    filter=query_filter,
+                    limit=limit,
+                    with_payload=with_payload,
+                )
+            )
+            slots.append((i, len(requests) - 1, None))
+
+            if terms.indices:
+                requests.append(
+                    SearchRequest(
+                        vector=NamedSparseVector(
+                            name=SPARSE_VECTOR,
+                            vector=SparseVector(
+                                indices=terms.indices, values=terms.values
+                            ),
+                        ),
+                        filter=query_filter,
+                        limit=limit,
+                        with_payload=with_payload,
+                    )
+                )
+                slots[-1] = (i, len(requests) - 2, len(requests) - 1)
+
+        if not requests:
+            return results
+
+        batches = self.client.search_batch(
+            collection_name=self.collection,
+            requests=requests,
+        )
+        for i, dense, lexical in slots:
+            results[i] = _fuse(
+                batches[dense], [] if lexical is None else batches[lexical]
+            )
+        return results
+
+    def get_payloads(self, ids: Collection[str]) -> Dict[str, dict]:
+        """Fetch payloads of points in one request."""
+        if not ids or not self.client.collection_exists(self.collection):
+            return {}
+
+        records = self.client.retrieve(
+            collection_name=self.collection,
+            ids=list(ids),
+            with_payload=True,
+        )
+        return {str(record.id): record.payload or {} for record in records}
+
+    def scroll_payloads(self, batch_size: int) -> Iterator[Dict[str, dict]]:
+        """Page through the collection's payloads."""
+        if not self.client.collection_exists(self.collection):
+            return
+
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+            )
+            if records:
+                yield {str(record.id): record.payload or {} for record in records}
+            if offset is None:
+                return
+
+    def drop_payload_fields(self, fields: List[str]) -> None:
+        """Delete payload keys from every point in one request."""
+        if not self.client.collection_exists(self.collection):
+            return
+
+        self.client.delete_payload(
+            collection_name=self.collection,
+            keys=fields,
+            points=Filter(must=[]),
+        )
+
+    def set_payload(self, point_id: str, payload: dict) -> None:
+        """Merge fields into a point's payload."""
+        self.client.set_payload(
+            collection_name=self.collection,
+            payload=payload,
+            points=[point_id],
+        )
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete points by ID."""
+        if ids and self.client.collection_exists(self.collection):
+            self.client.delete(collection_name=self.collection, points_selector=ids)
+
+    def delete_doc(self, doc_id: str) -> None:
+        """Delete points by `doc_id` payload filter."""
+        if not self.client.collection_exists(self.collection):
+            return
+
+        self.client.delete(
+            collection_name=self.collection,
+            points_selector=FilterSelector(
+                filter=Filter(
+                    must=[FieldCondition(key="doc_id", match=MatchValue(value=doc_id))],
+                )
+            ),
+        )
+
+    def _ensure_sparse(self) -> None:
+        """Check the collection was created with the sparse vector.
+
+        Qdrant cannot add a sparse vector to an existing collection.
+        """
+        if self._has_sparse:
+            return
+        params = self.client.get_collection(self.collection).config.params
+        if SPARSE_VECTOR not in (params.sparse_vectors or {}):
+            msg = (
+                f"Collection {self.collection} has no sparse vectors. Delete it "
+                "and re-ingest documents to use LEXICAL_BACKEND=qdrant."
+            )
+            raise ValueError(msg)
+        self._has_sparse = True
+
+    def count(self) -> int:
+        """Return the number of points."""
+        if not self.client.collection_exists(self.collection):
+            return 0
+        return self.client.count(collection_name=self.collection, exact=True).count
+
+    def flush(self) -> None:
+        """Qdrant persists every write; nothing to do."""
+
+
+class HNSWVectorStore(VectorStore):
+    """In-process HNSW vector store with on-disk snapshots.
+
+    Deletes (and replacing upserts) leave tombstones. Once they dominate,
+    a background thread rebuilds the graph from a snapshot of the live
+    vectors and swaps it in, replaying changes made meanwhile, so
+    searches never wait on a rebuild.
+
+    Writers take turns on a write lock. An upsert finds each node's
+    neighbours holding only that, and takes the search lock just to link
+    the node in, so searches run between the nodes of a large batch.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        m: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 64,
+    ) -> None:
+        """Load a persisted index from `path` or start empty."""
+        self.path = path
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._index = HNSWIndex.load(path)
+        self._payloads: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+        # Serializes graph changes; held without `_lock` while planning
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = 0.0
+        # Labels changed while a background compaction runs, else None
+        self._touched: Optional[Set[str]] = None
+
+        if self._index is not None:
+            # Search-time tuning follows current settings, not the snapshot
+            self._index.ef_search = ef_search
+            payloads_path = path / _PAYLOADS_FILE
+            if payloads_path.exists():
+                self._payloads = _load_pickle(payloads_path)
+
+    def upsert(
+        self,
+        ids: List[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: List[dict],
+        sparse: Optional[List[SparseTerms]] = None,
+    ) -> None:
+        """Insert or replace vectors."""
+        if not ids:
+            return
+
+        with self._write_lock:
+            with self._lock:
+                if self._index is None:
+                    self._index = HNSWIndex(
+                        dim=len(vectors[0]),
+                        m=self.m,
+                        ef_construction=self.ef_construction,
+                        ef_search=self.ef_search,
+                    )
+                index = self._index
+
+            for point_id, vector, payload in zip(ids, vectors, payloads, strict=True):
+                # The graph search for neighbours runs off the search lock
+                planned = index.plan(point_id, vector)
+                with self._lock:
+                    index.insert(planned)
+                    self._payloads[point_id] = payload
+
+            with self._lock:
+                self._changed(ids)
+
+    def search(
+        self,
+        vector: Sequence[float],
+        limit: int,
+        ids: Optional[Collection[str]] = None,
+        with_payload: bool = True,
+    ) -> List[VectorHit]:
+        """Approximate graph search, or exact over `ids` when given."""
+        with self._lock:
+            if self._index is None:
+                return []
+            if ids is not None:
+                found = self._index.search_labels(vector, ids, limit)
+            else:
+                found = self._index.search(vector, limit)
+            return [
+                VectorHit(
+                    id=label,
+                    score=score,
+                    payload=self._payloads[label] if with_payload else {},
+                )
+                for label, score in found
+            ]
+
+    def get_payloads(self, ids: Collection[str]) -> Dict[str, dict]:
+        """Return stored payloads by ID."""
+        with self._lock:
+            return {i: self._payloads[i] for i in ids if i in self._payloads}
+
+    def scroll_payloads(self, batch_size: int) -> Iterator[Dict[str, dict]]:
+        """Iterate over a snapshot of the stored payloads."""
+        with self._lock:
+            items = list(self._payloads.items())
+        for start in range(0, len(items), batch_size):
+            yield dict(items[start : start + batch_size])
+
+    def drop_payload_fields(self, fields: List[str]) -> None:
+        """Remove fields from every stored payload."""
+        with self._lock:
+            for payload in self._payloads.values():
+                for field in fields:
+                    payload.pop(field, None)
+            self._changed()
+
+    def set_payload(self, point_id: str, payload: dict) -> None:
+        """Merge fields into a stored payload."""
+        with self._lock:
+            if point_id in self._payloads:
+                self._payloads[point_id].update(payload)
+                self._changed()
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete vectors by ID."""
+        with self._write_lock, self._lock:
+            if self._index is None:
+                return
+            for point_id in ids:
+                self._index.delete(point_id)
+                self._payloads.pop(point_id, None)
+            self._changed(ids)
+
+    def delete_doc(self, doc_id: str) -> None:
+        """Delete vectors whose payload belongs to a document."""
+        with self._lock:
+            ids = [
+                point_id
+                for point_id, payload in self._payloads.items()
+                if payload.get("doc_id") == doc_id
+            ]
+        self.delete(ids)
+
+    def count(self) -> int:
+        """Return the number of live vectors."""
+        with self._lock:
+            return len(self._index) if self._index is not None else 0
+
+    def flush(self) -> None:
+        """Write a snapshot if anything changed since the last one."""
+        with self._lock:
+            if not self._dirty or self._index is None:
+                return
+            self._index.save(self.path)
+            _dump_pickle(self.path / _PAYLOADS_FILE, self._payloads)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+
+    def _changed(self, ids: Collection[str] = ()) -> None:
+        """Mark dirty, snapshot at most every few seconds, compact if due.
+
+        Called with the lock held.
+        """
+        self._dirty = True
+        if self._touched is not None:
+            self._touched.update(ids)
+        elif self._index is not None and self._index.needs_compaction:
+            self._touched = set(ids)
+            threading.Thread(
+                target=self._compact,
+                args=(self._index.items(),),
+                name="hnsw-compact",
+                daemon=True,
+            ).start()
+
+        if time.monotonic() - self._saved_at >= _SAVE_INTERVAL:
+            self.flush()
+
+    def _compact(self, live: List[Tuple[str, np.ndarray]]) -> None:
+        """Rebuild the graph off the lock, then swap it in."""
+        try:
+            rebuilt = HNSWIndex(
+                dim=self._index.dim,
+                m=self.m,
+                ef_construction=self.ef_construction,
+                ef_search=self.ef_search,
+            )
+            for label, vector in live:
+                rebuilt.add(label, vector)
+
+            # No upsert is mid-batch on the old graph while it is swapped
+            with self._write_lock, self._lock:
+                # Replay what changed since the snapshot was taken
+                for label in self._touched:
+                    vector = self._index.vector(label)
+                    if vector is None:
+                        rebuilt.delete(label)
+                    else:
+                        rebuilt.add(label, vector)
+                self._index = rebuilt
+                self._dirty = True
+        finally:
+            with self._lock:
+                self._touched = None
+
+
+class QuantizedVectorStore(VectorStore):
+    """Quantized in-process vector store with exact rescoring.
+
+    Only compact codes and payloads stay resident; float vectors live in
+    a memory-mapped file and are read for the rescoring candidates.
+    """
+
+    def __init__(self, path: Path, mode: str = "binary", rescore: int = 8) -> None:
+        """Load a persisted index from `path` or start empty."""
+        self.path = path
+        self.mode = mode
+        self.rescore = rescore
+        self._index = QuantizedIndex.load(path, rescore=rescore)
+        self._payloads: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._saved_at = 0.0
+
+        if self._index is not None:
+            payloads_path = path / _PAYLOADS_FILE
+            if payloads_path.exists():
+                self._payloads = _load_pickle(payloads_path)
+
+    def upsert(
+        self,
+        ids: List[str],
+        vectors: Sequence[Sequence[float]],
+        payloads: List[dict],
+        sparse: Optional[List[SparseTerms]] = None,
+    ) -> None:
+        """Insert or replace vectors."""
+        if not ids:
+            return
+
+        with self._lock:
+            if self._index is None:
+                self._index = QuantizedIndex(
+                    self.path,
+                    dim=len(vectors[0]),
+                    mode=self.mode,
+                    rescore=self.rescore,
+                )
+            self._index.add(ids, vectors)
+            self._payloads.update(zip(ids, payloads, strict=True))
+            self._changed()
+
+    def search(
+        self,
+        vector: Sequence[float],
+        limit: int,
+        ids: Optional[Collection[str]] = None,
+        with_payload: bool = True,
+    ) -> List[VectorHit]:
+        """Compact-code first pass then exact rescoring, or exact over `ids`."""
+        with self._lock:
+            if self._index is None:
+                return []
+            if ids is not None:
+                found = self._index.search_labels(vector, ids, limit)
+            else:
+                found = self._index.search(vector, limit)
+            return [
+                VectorHit(
+                    id=label,
+                    score=score,
+                    payload=self._payloads[label] if with_payload else {},
+                )
+                for label, score in found
+            ]
+
+    def get_payloads(self, ids: Collection[str]) -> Dict[str, dict]:
+        """Return stored payloads by ID."""
+        with self._lock:
+            return {i: self._payloads[i] for i in ids if i in self._payloads}
+
+    def scroll_payloads(self, batch_size: int) -> Iterator[Dict[str, dict]]:
+        """Iterate over a snapshot of the stored payloads."""
+        with self._lock:
+            items = list(self._payloads.items())
+        for start in range(0, len(items), batch_size):
+            yield dict(items[start : start + batch_size])
+
+    def drop_payload_fields(self, fields: List[str]) -> None:
+        """Remove fields from every stored payload."""
+        with self._lock:
+            for payload in self._payloads.values():
+                for field in fields:
+                    payload.pop(field, None)
+            self._changed()
+
+    def set_payload(self, point_id: str, payload: dict) -> None:
+        """Merge fields into a stored payload."""
+        with self._lock:
+            if point_id in self._payloads:
+                self._payloads[point_id].update(payload)
+                self._changed()
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete vectors by ID."""
+        with self._write_lock, self._lock:
+            if self._index is None:
+                return
+            self._index.delete(ids)
+            for point_id in ids:
+                self._payloads.pop(point_id, None)
+            self._changed()
+
+    def delete_doc(self, doc_id: str) -> None:
+        """Delete vectors whose payload belongs to a document."""
+        with self._lock:
+            ids = [
+                point_id
+                for point_id, payload in self._payloads.items()
+                if payload.get("doc_id") == doc_id
+            ]
+        self.delete(ids)
+
+    def count(self) -> int:
+        """Return the number of live vectors."""
+        with self._lock:
+            return len(self._index) if self._index is not None else 0
+
+    def flush(self) -> None:
+        """Write a snapshot if anything changed since the last one."""
+        with self._lock:
+            if not self._dirty or self._index is None:
+                return
+            self._index.save()
+            _dump_pickle(self.path / _PAYLOADS_FILE, self._payloads)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+
+    def _changed(self) -> None:
+        """Mark dirty and snapshot, at most every few seconds."""
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= _SAVE_INTERVAL:
+            self.flush()
+
+
+@lru_cache(maxsize=1)
+def get_vector_store() -> VectorStore:
+    """Return the configured vector store."""
+    if settings.vector_backend == "quantized":
+        return QuantizedVectorStore(
+            Path(settings.quantized_path),
+            mode=settings.quantization,
+            rescore=settings.quantized_rescore,
+        )
+    if settings.vector_backend == "hnsw":
+        return HNSWVectorStore(
+            Path(settings.hnsw_path),
+            m=settings.hnsw_m,
+            ef_construction=settings.hnsw_ef_construction,
+            ef_search=settings.hnsw_ef_search,
+        )
+    return QdrantVectorStore(get_qdrant_client(), settings.qdrant_collection)
+
+
+register_index("vector_points", lambda: get_vector_store().count(), cached=True)
+
+
+def _fuse(dense: list, sparse: list) -> List[VectorHit]:
+    """Reciprocal rank fusion of dense and sparse Qdrant hits."""
+    scores: Dict[str, float] = {}
+    payloads: Dict[str, dict] = {}
+    for points in (dense, sparse):
+        for rank, point in enumerate(points):
+            point_id = str(point.id)
+            scores[point_id] = scores.get(point_id, 0.0) + 1.0 / (_RRF_K + rank + 1)
+            payloads.setdefault(point_id, point.payload or {})
+
+    return [
+        VectorHit(id=point_id, score=score, payload=payloads[point_id])
+        for point_id, score in sorted(scores.items(), key=lambda kv: -kv[1])
+    ]
+
+
+def _load_pickle(path: Path) -> dict:
+    """Read a pickled dict from our own snapshot directory."""
+    with path.open("rb") as f:
+        return pickle.load(f)
+
+
+def _dump_pickle(path: Path, value: dict) -> None:
+    """Atomically pickle a dict into the snapshot directory."""
+    tmp_path = path.with_suffix(".tmp")
+    with tmp_path.open("wb") as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_path.replace(path)
@@ -1,40 +1,126 @@
-"""Vector-based retrieval using Qdrant."""
+"""Vector-based retrieval over the configured vector store."""
 
-from typing import List
+from typing import Collection, Dict, List, Optional, Sequence
 
 from app.core.embeddings import embed_texts
-from app.ingestion.indexing import COLLECTION_NAME, get_qdrant_client
 from app.models.ingestion import Chunk
 from app.models.retrieval import ScoredChunk
-from qdrant_client.models import ScoredPoint
+from app.retrieval.chunk_registry import get_chunks_by_id
+from app.retrieval.sparse import query_sparse_vector
+from app.retrieval.vector_backends import VectorHit, VectorStore, get_vector_store
 
 
-def vector_search(query: str, top_k: int = 5) -> List[ScoredChunk]:
-    """Search for semantically similar chunks."""
-    client = get_qdrant_client()
+def vector_search(
+    query: str,
+    top_k: int = 5,
+    chunk_ids: Optional[Collection[str]] = None,
+    query_vector: Optional[Sequence[float]] = None,
+) -> List[ScoredChunk]:
+    """Search for semantically similar chunks.
 
-    query_vector = embed_texts([query])[0]
+    The search itself is id-only: hits are resolved against the chunk
+    registry in one batched lookup. Only hits the registry does not hold
+    (e.g. after a restart) are built from their stored payloads, fetched
+    in one further request; hits without a text payload are dropped.
 
-    results: List[ScoredPoint] = client.search(
-        collection_name=COLLECTION_NAME,
-        query_vector=query_vector,
+    Args:
+        query: Query text.
+        top_k: Number of hits.
+        chunk_ids: Optional chunk IDs to restrict the search to.
+        query_vector: Precomputed query embedding, if already available.
+    """
+    if query_vector is None:
+        query_vector = embed_texts([query])[0]
+
+    return vector_search_batch([query_vector], top_k, [chunk_ids])[0]
+
+
+def vector_search_batch(
+    query_vectors: Sequence[Sequence[float]],
+    top_k: int,
+    chunk_ids: Optional[Sequence[Optional[Collection[str]]]] = None,
+) -> List[List[ScoredChunk]]:
+    """Search for several embedded queries at once.
+
+    Runs one batch search against the vector store and resolves the hits
+    of all queries in a single registry lookup.
+
+    Args:
+        query_vectors: Query embeddings.
+        top_k: Number of hits per query.
+        chunk_ids: Optional per-query chunk IDs to restrict each search to.
+    """
+    store = get_vector_store()
+    results = store.search_batch(
+        query_vectors,
         limit=top_k,
+        ids=chunk_ids,
+        with_payload=False,
     )
+    return _resolve_hits(store, results)
+
 
-    scored_chunks: List[ScoredChunk] = []
+def hybrid_search_batch(
+    queries: List[str],
+    query_vectors: Sequence[Sequence[float]],
+    top_k: int,
+    chunk_ids: Optional[Sequence[Optional[Collection[str]]]] = None,
+) -> List[List[ScoredChunk]]:
+    """Dense + BM25 sparse search for several queries in one request.
 
-    for point in results:
-        payload = point.payload
+    Each query returns the union of its `top_k` dense and `top_k` sparse
+    hits, scored by reciprocal rank fusion (LEXICAL_BACKEND=qdrant).
 
-        chunk = Chunk(
-            chunk_id=str(point.id),
+    Args:
+        queries: Query texts, for the sparse side.
+        query_vectors: Query embeddings, for the dense side.
+        top_k: Number of hits per side and query.
+        chunk_ids: Optional per-query chunk IDs to restrict each search to.
+    """
+    store = get_vector_store()
+    results = store.hybrid_search_batch(
+        query_vectors,
+        [query_sparse_vector(query) for query in queries],
+        limit=top_k,
+        ids=chunk_ids,
+        with_payload=False,
+    )
+    return _resolve_hits(store, results)
+
+
+def _resolve_hits(
+    store: VectorStore,
+    results: List[List[VectorHit]],
+) -> List[List[ScoredChunk]]:
+    """Resolve id-only hits from the registry, then stored payloads."""
+    hit_ids = {hit.id for hits in results for hit in hits}
+    chunks = get_chunks_by_id(hit_ids)
+    missing = hit_ids - chunks.keys()
+    if missing:
+        chunks.update(chunks_from_payloads(store.get_payloads(missing)))
+
+    return [
+        [
+            ScoredChunk(chunk=chunks[hit.id], score=hit.score)
+            for hit in hits
+            if hit.id in chunks
+        ]
+        for hits in results
+    ]
+
+
+def chunks_from_payloads(payloads: Dict[str, dict]) -> Dict[str, Chunk]:
+    """Build chunks from full payloads, skipping id-only ones."""
+    return {
+        point_id: Chunk(
+            chunk_id=point_id,
             doc_id=payload["doc_id"],
             page_start=payload["page_start"],
             page_end=payload["page_end"],
             text=payload["text"],
             entities=payload.get("entities", []),
+            sources=payload.get("sources", []),
         )
-
-        scored_chunks.append(ScoredChunk(chunk=chunk, score=float(point.score)))
-
-    return scored_chunks
+        for point_id, payload in payloads.items()
+        if "text" in payload
+    }
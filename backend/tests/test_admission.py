@@ -0,0 +1,101 @@
+"""Admission control: queueing order, rejection and async waiters."""
+
+import asyncio
+import threading
+
+import pytest
+from app.core.admission import BULK, INTERACTIVE, OverloadedError, Stage
+
+
+def _stage(limit: int = 1, queue_max: int = 8) -> Stage:
+    """A stage that never rejects on estimated wait."""
+    return Stage("test", limit, queue_max=queue_max, max_wait_s=60.0)
+
+
+def test_full_queue_is_rejected() -> None:
+    """Past `queue_max` waiters a request is rejected with the stage name."""
+    stage = _stage(queue_max=0)
+    with stage.slot():
+        with pytest.raises(OverloadedError) as excinfo:
+            stage.acquire()
+    assert excinfo.value.stage == "test"
+    assert stage.stats().rejected == 1
+
+
+def test_check_rejects_before_queueing() -> None:
+    """`check` compares the estimated wait with the limit and queues nothing."""
+    stage = Stage("test", 1, queue_max=8, max_wait_s=0.5)
+    stage._hold_s = 1.0
+    stage.check()
+    with stage.slot():
+        with pytest.raises(OverloadedError):
+            stage.check()
+    assert stage.stats().queued == 0
+
+
+def test_async_waiters_hold_no_thread() -> None:
+    """Queued coroutines are served by priority, then arrival, on one loop."""
+    stage = _stage()
+    order = []
+
+    async def work(name: str, priority: int) -> None:
+        async with stage.aslot(priority):
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def main() -> None:
+        async with stage.aslot():
+            tasks = [
+                asyncio.create_task(work("bulk", BULK)),
+                asyncio.create_task(work("first", INTERACTIVE)),
+                asyncio.create_task(work("second", INTERACTIVE)),
+            ]
+            await asyncio.sleep(0.01)
+            assert stage.stats().queued == 3
+            # No executor thread is parked on the queue
+            assert threading.active_count() == threads
+        await asyncio.gather(*tasks)
+
+    threads = threading.active_count()
+    asyncio.run(main())
+    assert order == ["first", "second", "bulk"]
+    assert stage.stats().active == 0
+
+
+def test_cancelled_async_waiter_leaves_queue() -> None:
+    """Cancelling a queued coroutine frees its place for the next one."""
+    stage = _stage()
+
+    async def main() -> None:
+        async with stage.aslot():
+            waiter = asyncio.create_task(stage.aslot().__aenter__())
+            await asyncio.sleep(0.01)
+            assert stage.stats().queued == 1
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            assert stage.stats().queued == 0
+        async with stage.aslot():
+            assert stage.stats().active == 1
+
+    asyncio.run(main())
+    assert stage.stats().active == 0
+
+
+def test_thread_and_async_waiters_share_the_queue() -> None:
+    """A releasing thread hands the slot to a waiting coroutine."""
+    stage = _stage()
+    granted_at = stage.acquire()
+
+    async def main() -> None:
+        slot = stage.aslot()
+        waiter = asyncio.create_task(slot.__aenter__())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        threading.Thread(target=stage.release, args=(granted_at,)).start()
+        await asyncio.wait_for(waiter, timeout=5)
+        assert stage.stats().active == 1
+        await slot.__aexit__(None, None, None)
+
+    asyncio.run(main())
+    assert stage.stats().active == 0
@@ -0,0 +1,28 @@
+"""Document catalog: token counts match what a summary sends."""
+
+from app.core.tokens import count_tokens
+from app.ingestion.catalog import DocumentCatalog
+from app.ingestion.chunking import chunk_segments
+from app.models.ingestion import RawSegment
+from app.retrieval.context_packer import join_chunks
+
+
+def test_tokens_leave_out_chunk_overlap() -> None:
+    """Overlapping chunk edges are counted once, as join_chunks sends them."""
+    pages = [
+        " ".join(f"word{page}x{i} follows." for i in range(600)) for page in range(3)
+    ]
+    chunks = chunk_segments(
+        [RawSegment(doc_id="doc", page=p, text=text) for p, text in enumerate(pages)]
+    )
+    catalog = DocumentCatalog()
+    catalog.begin("doc")
+    catalog.add_chunks(chunks, folded=set())
+
+    counted = catalog._pending["doc"].stats.tokens
+    joined = count_tokens(join_chunks(chunks))
+    with_overlap = sum(count_tokens(chunk.text) for chunk in chunks)
+
+    # Only the separators between passages are not counted
+    assert joined - len(chunks) <= counted <= joined
+    assert counted < with_overlap
@@ -0,0 +1,82 @@
+"""Chunk store tiering: offloaded text reads back unchanged."""
+
+import time
+
+from app.models.ingestion import Chunk, ChunkSource
+from app.retrieval.chunk_registry import ChunkStore
+
+
+def _chunks(doc_id: str, n: int) -> list:
+    """`n` chunks of a document with distinct, non-ASCII text."""
+    return [
+        Chunk(
+            chunk_id=f"{doc_id}-{i}",
+            doc_id=doc_id,
+            page_start=i,
+            page_end=i + 1,
+            text=f"{doc_id} passage {i} naïve café " * 20,
+            entities=[f"concept {i}"],
+        )
+        for i in range(n)
+    ]
+
+
+def _settle(store: ChunkStore) -> None:
+    """Wait for the background offload to finish."""
+    deadline = time.monotonic() + 30
+    while store._offloading and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not store._offloading
+
+
+def _tiers(store: ChunkStore) -> dict:
+    """Tier of each document."""
+    return {usage.doc_id: usage.tier for usage in store.memory_usage()}
+
+
+def test_tiered_store_round_trip(tmp_path) -> None:
+    """Register past the budget, offload cold docs, then look them up."""
+    docs = {f"doc{d}": _chunks(f"doc{d}", 20) for d in range(4)}
+    doc_bytes = sum(len(c.text.encode()) for c in docs["doc0"])
+    # Room for two documents' text
+    store = ChunkStore(int(2.5 * doc_bytes), tmp_path)
+    store.open()
+
+    for chunks in docs.values():
+        store.register(chunks)
+        _settle(store)
+
+    tiers = _tiers(store)
+    assert tiers["doc0"] == tiers["doc1"] == "cold"
+    assert tiers["doc3"] == "hot"
+    assert len(list(tmp_path.iterdir())) == 2
+
+    # Offloaded text reads in place without reloading the document
+    handle = store.handle("doc0-3")
+    assert store.text(handle) == docs["doc0"][3].text
+    assert _tiers(store)["doc0"] == "cold"
+
+    # A query-path lookup reloads it and offloads the coldest hot one
+    found = store.lookup([c.chunk_id for c in docs["doc0"]])
+    assert [found[c.chunk_id] for c in docs["doc0"]] == docs["doc0"]
+    _settle(store)
+    tiers = _tiers(store)
+    assert tiers["doc0"] == "hot"
+    assert tiers["doc2"] == "cold"
+    assert store.tier_counts()[1] == 1
+
+    # Re-registering a cold chunk promotes it and keeps the update
+    updated = docs["doc1"][0].model_copy(
+        update={"sources": [ChunkSource(doc_id="doc3", page_start=1, page_end=1)]}
+    )
+    store.register([updated])
+    _settle(store)
+    assert store.hydrate(store.handle(updated.chunk_id)) == updated
+
+    for chunks in docs.values():
+        for chunk in chunks:
+            if chunk.chunk_id != updated.chunk_id:
+                assert store.text(store.handle(chunk.chunk_id)) == chunk.text
+
+    store.close()
+    assert not tmp_path.exists()
@@ -0,0 +1,47 @@
+"""Concept vocabulary: normalization and whole-word trie matching."""
+
+from app.core.concepts import ConceptTrie, normalize_concept
+
+
+def test_normalize_concept() -> None:
+    """Case, punctuation, width and plain plurals fold to one key."""
+    assert normalize_concept("Transformer Models") == "transformer model"
+    assert normalize_concept("transformer-model") == "transformer model"
+    assert normalize_concept("ＭＯＤＥＬＳ") == "model"
+    assert normalize_concept("class analysis") == "class analysis"
+
+
+def test_trie_matches_whole_words() -> None:
+    """Concepts match as whole word sequences, including nested ones."""
+    trie = ConceptTrie()
+    trie.add(["transformer", "transformer model", "attention", "model"])
+
+    query = "How do Transformer Models use attention?"
+    assert trie.match(query) == {
+        "transformer",
+        "transformer model",
+        "model",
+        "attention",
+    }
+    assert trie.match("transformers") == {"transformer"}
+    assert trie.match("attentional transformerish") == set()
+    assert trie.match_batch(["attention", ""]) == [{"attention"}, set()]
+
+
+def test_trie_reference_counts() -> None:
+    """A concept added twice survives one removal; pruning keeps siblings."""
+    trie = ConceptTrie()
+    trie.add(["neural network", "neural network", "neural net"])
+    assert len(trie) == 2
+
+    trie.remove(["neural network"])
+    assert trie.match("a neural network") == {"neural network"}
+
+    trie.remove(["neural network"])
+    assert trie.match("a neural network") == set()
+    assert trie.match("a neural net") == {"neural net"}
+    assert trie._root == {"neural": {"net": {"": "neural net"}}}
+
+    trie.remove(["neural net", "unknown"])
+    assert len(trie) == 0
+    assert trie._root == {}
@@ -0,0 +1,60 @@
+"""Context packing: chunk overlap is sent once and passages read in order."""
+
+from app.ingestion.chunking import OVERLAP_CHARS
+from app.models.ingestion import Chunk
+from app.models.retrieval import ScoredChunk
+from app.retrieval.context_packer import join_chunks, pack_context
+
+# One document's text, split like the chunker does: neighbours share
+# OVERLAP_CHARS characters
+_SENTENCES = [
+    f"Part {i} covers " + " ".join(f"term{i}x{j}" for j in range(6)) + "."
+    for i in range(60)
+]
+_TEXT = " ".join(_SENTENCES)
+# Split between two sentences
+_SPLIT = _TEXT.index(". ", len(_TEXT) // 2) + 1
+
+
+def _chunks() -> list:
+    """Two neighbouring chunks of one document, overlapping by the chunker's margin."""
+    first = _TEXT[:_SPLIT]
+    second = _TEXT[_SPLIT - OVERLAP_CHARS :]
+    return [
+        Chunk(chunk_id="a", doc_id="doc", page_start=1, page_end=1, text=first),
+        Chunk(chunk_id="b", doc_id="doc", page_start=2, page_end=2, text=second),
+    ]
+
+
+def _squeezed(text: str) -> str:
+    """Text without whitespace (passages may split mid-word)."""
+    return "".join(text.split())
+
+
+def test_pack_context_strips_overlap() -> None:
+    """The shared edge is kept once, in reading order, whatever the rank."""
+    first, second = _chunks()
+    # The later chunk ranks first; reading order still puts it second
+    results = [
+        ScoredChunk(chunk=second, score=0.9),
+        ScoredChunk(chunk=first, score=0.8),
+    ]
+
+    packed = pack_context(results, budget=100_000)
+
+    assert _squeezed(packed.text) == _squeezed(_TEXT)
+    assert [sc.chunk.chunk_id for sc in packed.chunks] == ["a", "b"]
+    assert packed.stats.passages == 2
+    assert packed.stats.tokens < packed.stats.raw_tokens
+
+    # Citations quote the passages as the prompt holds them
+    assert "\n\n".join(sc.chunk.text for sc in packed.chunks) == packed.text
+    assert len(packed.chunks[0].chunk.text) + len(packed.chunks[1].chunk.text) < len(
+        first.text
+    ) + len(second.text)
+
+
+def test_join_chunks_strips_overlap() -> None:
+    """Consecutive chunks of a document are joined without the repeat."""
+    joined = join_chunks(_chunks())
+    assert _squeezed(joined) == _squeezed(_TEXT)
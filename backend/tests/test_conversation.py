@@ -0,0 +1,40 @@
+"""Shared conversation memory: concurrent workers never lose compacted turns."""
+
+import threading
+
+from app.config import settings
+from app.core.shared_state import SharedState
+from app.memory.conversation import SUMMARY_ROLE, SharedConversationMemory
+
+
+def test_concurrent_appends_keep_every_turn(tmp_path, monkeypatch) -> None:
+    """Each message is either in the window or in the summary, exactly once."""
+    monkeypatch.setattr(settings, "session_summary_tokens", 100_000)
+    path = tmp_path / "state.db"
+    # Two workers: separate connections to one database
+    workers = [SharedConversationMemory(SharedState(path), max_turns=1) for _ in "ab"]
+
+    def chat(memory: SharedConversationMemory, name: str) -> None:
+        for i in range(25):
+            memory.add_user_message("session", f"Question {name}{i}.")
+
+    threads = [
+        threading.Thread(target=chat, args=(memory, name))
+        for memory, name in zip(workers, "ab", strict=True)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    history = workers[0].get_history("session")
+    assert history[0][0] == SUMMARY_ROLE
+    summary_lines = history[0][1].splitlines()
+    window = history[1:]
+    assert len(window) == 2
+    assert len(summary_lines) + len(window) == 50
+
+    seen = {line.split(": ", 1)[1] for line in summary_lines}
+    seen |= {content for _, content in window}
+    assert seen == {f"Question {name}{i}." for name in "ab" for i in range(25)}
+    assert workers[0].stats().compacted + workers[1].stats().compacted == 48
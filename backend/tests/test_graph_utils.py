@@ -0,0 +1,45 @@
+"""Concept graph: the corpus graph is cached until the concept index changes."""
+
+from app.models.ingestion import Chunk
+from app.retrieval.chunk_registry import clear_chunks, register_chunks
+from app.retrieval.graph_utils import clear_entities, corpus_graph, index_entities
+
+
+def _chunk(chunk_id: str, entities: list) -> Chunk:
+    """A one-page chunk mentioning `entities`."""
+    return Chunk(
+        chunk_id=chunk_id,
+        doc_id="doc",
+        page_start=1,
+        page_end=1,
+        text=" ".join(entities),
+        entities=entities,
+    )
+
+
+def _ingest(chunks: list) -> None:
+    """Register chunks and index their concepts."""
+    register_chunks(chunks)
+    index_entities(chunks)
+
+
+def test_corpus_graph_cached_until_ingest() -> None:
+    """Queries share one graph; ingest and clear rebuild it."""
+    clear_chunks()
+    clear_entities()
+    try:
+        _ingest([_chunk("a", ["vector search", "embedding"])])
+        graph = corpus_graph()
+        assert corpus_graph() is graph
+        assert graph.has_edge("vector search", "embedding")
+
+        _ingest([_chunk("b", ["embedding", "reranker"])])
+        rebuilt = corpus_graph()
+        assert rebuilt is not graph
+        assert rebuilt.has_edge("embedding", "reranker")
+
+        clear_entities()
+        assert corpus_graph() is not rebuilt
+    finally:
+        clear_chunks()
+        clear_entities()
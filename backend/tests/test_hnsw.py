@@ -0,0 +1,121 @@
+"""HNSW index: recall against exact search across deletes and compaction."""
+
+import threading
+import time
+
+import numpy as np
+from app.retrieval.hnsw import HNSWIndex
+from app.retrieval.vector_backends import HNSWVectorStore
+
+_DIM = 32
+_K = 10
+
+
+def _unit(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Random unit vectors."""
+    vectors = rng.standard_normal((n, _DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _recall(index: HNSWIndex, vectors: np.ndarray, live: list, queries) -> float:
+    """Mean top-k overlap with exact search over the live labels."""
+    live_vectors = vectors[live]
+    total = 0.0
+    for query in queries:
+        exact = np.argsort(-(live_vectors @ query))[:_K]
+        expected = {str(live[i]) for i in exact}
+        found = {label for label, _ in index.search(query, _K, ef=128)}
+        total += len(found & expected) / _K
+    return total / len(queries)
+
+
+def test_recall_after_delete_and_compact():
+    """Tombstoned labels never come back, and recall holds up to compaction."""
+    rng = np.random.default_rng(0)
+    vectors = _unit(rng, 2000)
+    queries = _unit(rng, 50)
+
+    index = HNSWIndex(_DIM, m=12, ef_construction=100)
+    for i, vector in enumerate(vectors):
+        index.add(str(i), vector)
+    assert _recall(index, vectors, list(range(2000)), queries) >= 0.9
+
+    deleted = set(rng.choice(2000, size=800, replace=False).tolist())
+    for i in deleted:
+        index.delete(str(i))
+    live = [i for i in range(2000) if i not in deleted]
+
+    assert len(index) == len(live)
+    assert index.needs_compaction
+    for query in queries:
+        assert all(int(label) not in deleted for label, _ in index.search(query, _K))
+    assert _recall(index, vectors, live, queries) >= 0.85
+
+    index.compact()
+    assert not index.needs_compaction
+    assert len(index) == len(live)
+    assert _recall(index, vectors, live, queries) >= 0.9
+
+
+def test_delete_does_not_rebuild():
+    """Deleting only tombstones; the rebuild is left to the owner."""
+    rng = np.random.default_rng(1)
+    index = HNSWIndex(_DIM)
+    for i, vector in enumerate(_unit(rng, 300)):
+        index.add(str(i), vector)
+
+    links = index._links
+    for i in range(200):
+        index.delete(str(i))
+    # Tombstoned only: the graph is the same object until compaction
+    assert index._links is links
+    assert index.needs_compaction
+
+
+def test_store_compacts_in_background(tmp_path):
+    """The store swaps in a rebuilt graph without losing concurrent writes."""
+    rng = np.random.default_rng(2)
+    vectors = _unit(rng, 400)
+    ids = [str(i) for i in range(400)]
+    store = HNSWVectorStore(tmp_path, m=8, ef_construction=50)
+    store.upsert(ids, vectors.tolist(), [{"doc_id": "d"} for _ in ids])
+
+    store.delete(ids[:300])
+    # Written while the rebuild may be running; must survive the swap
+    store.upsert(["new"], [vectors[0].tolist()], [{"doc_id": "e"}])
+
+    deadline = time.monotonic() + 30
+    while store._touched is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert store._touched is None
+    assert not store._index.needs_compaction
+    assert store.count() == 101
+    hits = store.search(vectors[0].tolist(), 1)
+    assert hits[0].id == "new"
+
+
+def test_search_runs_during_large_upsert(tmp_path):
+    """Searches are answered between the nodes of a large upsert batch."""
+    rng = np.random.default_rng(3)
+    vectors = _unit(rng, 3000)
+    ids = [str(i) for i in range(3000)]
+    store = HNSWVectorStore(tmp_path, m=8, ef_construction=50)
+    store.upsert(ids[:100], vectors[:100].tolist(), [{"doc_id": "d"}] * 100)
+
+    writer = threading.Thread(
+        target=store.upsert,
+        args=(ids[100:], vectors[100:].tolist(), [{"doc_id": "d"}] * 2900),
+    )
+    writer.start()
+    try:
+        while store.count() <= 100:
+            time.sleep(0.001)
+        hits = store.search(vectors[0].tolist(), 1)
+        # Answered while the batch is still being written
+        assert writer.is_alive()
+        assert 100 < store.count() < 3000
+        assert hits[0].id == "0"
+    finally:
+        writer.join()
+    assert store.count() == 3000
@@ -0,0 +1,36 @@
+"""Ingestion queue: multi-file submissions are queued whole or not at all."""
+
+from types import SimpleNamespace
+
+import pytest
+from app.ingestion.jobs import IngestionQueue, QueueFullError
+
+
+def _queue(tmp_path, max_size: int) -> IngestionQueue:
+    """A queue with no workers running, so submitted jobs stay queued."""
+    jobs = IngestionQueue(
+        docs_dir=tmp_path,
+        jobs_dir=tmp_path / "jobs",
+        ingestor=SimpleNamespace(processes=1),
+        max_size=max_size,
+    )
+    jobs.jobs_dir.mkdir()
+    return jobs
+
+
+def test_submit_many_is_all_or_nothing(tmp_path) -> None:
+    """A batch that does not fit is rejected without queueing any job."""
+    jobs = _queue(tmp_path, max_size=3)
+    jobs.submit("doc0", "a.pdf")
+
+    with pytest.raises(QueueFullError):
+        jobs.check(3)
+    with pytest.raises(QueueFullError):
+        jobs.submit_many([("doc1", "b.pdf"), ("doc2", "c.pdf"), ("doc3", "d.pdf")])
+    assert jobs.pending() == 1
+    assert len(jobs.list_jobs()) == 1
+
+    submitted = jobs.submit_many([("doc1", "b.pdf"), ("doc2", "c.pdf")])
+    assert [job.doc_id for job in submitted] == ["doc1", "doc2"]
+    assert jobs.pending() == 3
+    assert {job.status for job in jobs.list_jobs()} == {"queued"}
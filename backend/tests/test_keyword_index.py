@@ -0,0 +1,87 @@
+"""BM25 index: incremental rebuilds score like rank_bm25 without re-reading text."""
+
+import pytest
+from app.core.text import tokenize
+from app.models.ingestion import Chunk
+from app.retrieval import keyword_index
+from app.retrieval.chunk_registry import (
+    chunk_store,
+    clear_chunks,
+    register_chunks,
+    remove_chunks,
+)
+from app.retrieval.keyword_index import bm25_search, build_bm25_index, clear_bm25_index
+from rank_bm25 import BM25Okapi
+
+_TEXTS = {
+    "a": "vector search with an embedding model",
+    "b": "keyword search ranks exact terms",
+    "c": "the reranker orders search results",
+    "d": "embedding drift breaks vector recall",
+}
+
+
+def _chunk(chunk_id: str) -> Chunk:
+    """A one-page chunk with the text for `chunk_id`."""
+    return Chunk(
+        chunk_id=chunk_id,
+        doc_id=f"doc-{chunk_id}",
+        page_start=1,
+        page_end=1,
+        text=_TEXTS[chunk_id],
+        entities=[],
+    )
+
+
+@pytest.fixture
+def index():
+    """An empty chunk store and BM25 index, emptied again afterwards."""
+    clear_chunks()
+    clear_bm25_index()
+    yield
+    clear_chunks()
+    clear_bm25_index()
+
+
+def _scores(query: str, **kwargs) -> dict:
+    """Chunk ID -> BM25 score for `query`."""
+    hits = bm25_search(query, top_k=10, **kwargs)
+    return {hit.chunk.chunk_id: hit.score for hit in hits}
+
+
+def test_scores_match_rank_bm25(index) -> None:
+    """Full-corpus and subset scores equal BM25Okapi's positive scores."""
+    ids = list(_TEXTS)
+    register_chunks([_chunk(i) for i in ids])
+    build_bm25_index(chunk_store.handles())
+    reference = BM25Okapi([tokenize(_TEXTS[i]) for i in ids])
+
+    query = "vector embedding search"
+    expected = reference.get_scores(tokenize(query))
+    assert _scores(query) == pytest.approx(
+        {i: s for i, s in zip(ids, expected, strict=True) if s > 0}
+    )
+
+    subset = chunk_store.handles(["a", "c"])
+    assert _scores(query, handles=subset).keys() == {"a", "c"}
+    assert _scores(query, handles=subset)["a"] == pytest.approx(expected[0])
+
+
+def test_rebuild_reads_only_new_text(index, monkeypatch) -> None:
+    """A rebuild tokenizes new chunks only and drops removed ones."""
+    register_chunks([_chunk("a"), _chunk("b")])
+    build_bm25_index(chunk_store.handles())
+
+    read = []
+    text = chunk_store.text
+    monkeypatch.setattr(chunk_store, "text", lambda h: read.append(h) or text(h))
+
+    register_chunks([_chunk("c")])
+    build_bm25_index(chunk_store.handles())
+    assert read == chunk_store.handles(["c"])
+    assert "c" in _scores("reranker")
+
+    remove_chunks(["b"])
+    build_bm25_index(chunk_store.handles())
+    assert _scores("keyword") == {}
+    assert "keyword" not in keyword_index._postings
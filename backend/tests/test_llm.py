@@ -0,0 +1,140 @@
+"""LLM calls: circuit breaker states, error classes and hedging."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from app.config import settings
+from app.core import llm
+from app.core.llm import CircuitBreaker, LLMUnavailableError
+from groq import APIStatusError
+
+
+def _status_error(status_code: int) -> APIStatusError:
+    """The error the Groq client raises for an HTTP `status_code` response."""
+    request = httpx.Request("POST", "http://llm/chat/completions")
+    response = httpx.Response(status_code, request=request)
+    return APIStatusError("error", response=response, body=None)
+
+
+class _FakeClient:
+    """Groq stand-in answering (or failing) per model after `delay_s`."""
+
+    def __init__(self, failures: dict, delay_s: float = 0.0) -> None:
+        self.failures = failures
+        self.delay_s = delay_s
+        self.calls: list = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model: str, messages: list) -> SimpleNamespace:
+        self.calls.append(model)
+        await asyncio.sleep(self.delay_s)
+        if model in self.failures:
+            raise self.failures[model]
+        message = SimpleNamespace(content=f"answer from {model}")
+        return SimpleNamespace(usage=None, choices=[SimpleNamespace(message=message)])
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Patch in a fake client factory with fresh model state and no hedging."""
+    monkeypatch.setattr(llm, "_models", {})
+    monkeypatch.setattr(settings, "llm_hedge_percentile", 0.0)
+    monkeypatch.setattr(settings, "llm_fallback_models", ["backup"])
+    monkeypatch.setattr(settings, "llm_breaker_failures", 2)
+
+    def install(client: _FakeClient) -> _FakeClient:
+        monkeypatch.setattr(llm, "_get_groq_client", lambda: client)
+        return client
+
+    return install
+
+
+def _ask(model: str = "main") -> str:
+    """One chat call to `model` and its fallbacks."""
+    return asyncio.run(llm._chat([{"role": "user", "content": "hi"}], model, None))
+
+
+def test_breaker_state_transitions() -> None:
+    """Failures open the circuit; after the cooldown one trial decides."""
+    breaker = CircuitBreaker(failures=2, cooldown_s=0.05)
+    assert breaker.state == "closed"
+
+    breaker.record(ok=False)
+    assert breaker.state == "closed"
+    breaker.record(ok=False)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    # Only one trial at a time
+    assert not breaker.allow()
+    breaker.record(ok=False)
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    # A cancelled trial hands the slot back
+    breaker.release()
+    assert breaker.allow()
+    breaker.record(ok=True)
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_server_errors_fall_back_and_open_the_circuit(fake_llm) -> None:
+    """5xx responses try the fallback and count toward the breaker."""
+    client = fake_llm(_FakeClient({"main": _status_error(503)}))
+
+    assert _ask() == "answer from backup"
+    assert _ask() == "answer from backup"
+    assert llm.circuit_states()["main"] == "open"
+
+    # The open circuit is skipped without a call
+    assert _ask() == "answer from backup"
+    assert client.calls.count("main") == 2
+
+
+def test_client_errors_are_raised_without_tripping(fake_llm) -> None:
+    """A 4xx is raised as is: no fallback, and the circuit stays closed."""
+    client = fake_llm(_FakeClient({"main": _status_error(400)}))
+
+    for _ in range(3):
+        with pytest.raises(APIStatusError):
+            _ask()
+    assert client.calls == ["main"] * 3
+    assert llm.circuit_states()["main"] == "closed"
+
+
+def test_every_model_down_is_unavailable(fake_llm) -> None:
+    """With every candidate failing the caller gets LLMUnavailableError."""
+    fake_llm(_FakeClient({"main": _status_error(500), "backup": _status_error(502)}))
+    with pytest.raises(LLMUnavailableError):
+        _ask()
+
+
+def test_half_open_trial_is_not_hedged(fake_llm, monkeypatch) -> None:
+    """The trial call runs alone, and a hedge loser's time is recorded."""
+    monkeypatch.setattr(settings, "llm_hedge_percentile", 95.0)
+    monkeypatch.setattr(settings, "llm_hedge_delay_ms", 10.0)
+    client = fake_llm(_FakeClient({}, delay_s=0.1))
+
+    breaker = llm._state("main").breaker
+    breaker.cooldown_s = 0.0
+    breaker.record(ok=False)
+    breaker.record(ok=False)
+    assert breaker.state == "half-open"
+
+    assert _ask() == "answer from main"
+    assert client.calls == ["main"]
+    assert breaker.state == "closed"
+
+    # Closed again: the slow primary is hedged and the loser is censored
+    client.calls.clear()
+    assert _ask() == "answer from main"
+    assert client.calls == ["main", "main"]
+    assert len(llm._state("main").latencies) == 3
@@ -0,0 +1,46 @@
+"""Metrics: in multiprocess mode a scrape aggregates every worker."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# One API worker: record events, register scrape-time readings, publish
+_WORKER = """
+from app.core import metrics
+metrics.llm_events.labels("call").inc()
+metrics.register_cache("test", lambda: (3, 1))
+metrics.register_index("test_index", lambda: 7)
+metrics.publish()
+"""
+
+_SCRAPE = "from app.core import metrics; print(metrics.render().decode())"
+
+
+def _run(code: str, multiproc_dir: Path) -> str:
+    """Run `code` in a fresh interpreter, as a worker would with the env set.
+
+    prometheus_client picks multiprocess mode at import, hence a process.
+    """
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(multiproc_dir)}
+    done = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parents[1],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return done.stdout
+
+
+def test_scrape_sums_workers(tmp_path) -> None:
+    """Counters and published cache counts add up over worker processes."""
+    _run(_WORKER, tmp_path)
+    _run(_WORKER, tmp_path)
+
+    scraped = _run(_SCRAPE, tmp_path).splitlines()
+    assert 'atlasrag_llm_events_total{event="call"} 2.0' in scraped
+    assert 'atlasrag_cache_hits_total{cache="test"} 6.0' in scraped
+    assert 'atlasrag_cache_misses_total{cache="test"} 2.0' in scraped
+    assert 'atlasrag_index_size{index="test_index"} 7.0' in scraped
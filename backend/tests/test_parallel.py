@@ -0,0 +1,58 @@
+"""Parallel ingestor: a dead worker fails its documents, not later ones."""
+
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+from app.ingestion import parallel
+from app.ingestion.parallel import ParallelIngestor
+
+
+class _FakePool:
+    """Executor stand-in: broken, or finishing each document at once."""
+
+    def __init__(self, ingestor: ParallelIngestor, broken: bool) -> None:
+        self.ingestor = ingestor
+        self.broken = broken
+        self.shut_down = False
+
+    def submit(self, fn, key, file_path, doc_id, batch_size) -> Future:
+        future: Future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool("worker died"))
+        else:
+            # An empty document: the worker only reports it is done
+            self.ingestor._channel.put(("done", key, 0))
+            future.set_result(0)
+        return future
+
+    def shutdown(self, wait: bool, cancel_futures: bool) -> None:
+        self.shut_down = True
+
+
+def test_broken_pool_is_replaced(monkeypatch, tmp_path) -> None:
+    """The document in flight fails; the pool is replaced for the next."""
+    ingestor = ParallelIngestor(processes=1)
+    pools = []
+
+    def new_pool() -> _FakePool:
+        pools.append(_FakePool(ingestor, broken=not pools))
+        return pools[-1]
+
+    monkeypatch.setattr(ingestor, "_new_pool", new_pool)
+    monkeypatch.setattr(parallel, "abort_document", lambda doc_id: 0)
+    monkeypatch.setattr(parallel.document_catalog, "finish", lambda *args: None)
+    pdf = tmp_path / "doc.pdf"
+
+    with pytest.raises(BrokenProcessPool):
+        ingestor.ingest(pdf, "broken-doc")
+    assert pools[0].shut_down
+    assert ingestor.ingest(pdf, "next-doc") == (0, 0)
+    assert len(pools) == 2
+
+    # Restarting after shutdown reuses the relay and writer threads
+    threads = parallel.threading.active_count()
+    ingestor.shutdown()
+    ingestor.start()
+    assert parallel.threading.active_count() == threads
+    assert ingestor.ingest(pdf, "after-restart") == (0, 0)
@@ -0,0 +1,45 @@
+"""Quantized index: bit-packed Hamming distances and search."""
+
+import numpy as np
+import pytest
+from app.retrieval.quantized import QuantizedIndex, _hamming
+
+
+def _brute_force(bits: np.ndarray, query_bits: np.ndarray) -> np.ndarray:
+    """Hamming distances by counting differing sign bits directly."""
+    return (bits != query_bits).sum(axis=1)
+
+
+@pytest.mark.parametrize("dim", [384, 1024])
+def test_hamming_matches_brute_force(tmp_path, dim):
+    """Distances agree with a direct popcount, up to the full dimension."""
+    rng = np.random.default_rng(dim)
+    vectors = rng.standard_normal((500, dim)).astype(np.float32)
+    query = vectors[0]
+    # Antipodal vector: every bit differs, the largest possible distance
+    vectors[1] = -query
+
+    index = QuantizedIndex(tmp_path, dim=dim, mode="binary")
+    codes, _ = index._quantize(vectors)
+    query_codes, _ = index._quantize(query[None, :])
+
+    expected = _brute_force(vectors > 0, query > 0)
+    distances = _hamming(codes, query_codes[:, 0])
+
+    np.testing.assert_array_equal(distances, expected)
+    assert distances[0] == 0
+    assert distances[1] == dim
+
+
+def test_binary_search_ranks_far_vectors_last(tmp_path):
+    """The antipode of the query is never returned as a neighbour."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((200, 384)).astype(np.float32)
+    vectors[1] = -vectors[0]
+
+    index = QuantizedIndex(tmp_path, dim=384, mode="binary", rescore=1)
+    index.add([str(i) for i in range(200)], vectors)
+
+    hits = index.search(vectors[0], 199)
+    assert hits[0][0] == "0"
+    assert "1" not in {label for label, _ in hits}
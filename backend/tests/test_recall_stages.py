@@ -0,0 +1,99 @@
+"""Recall stages: per-stage deadlines, cancellation and the all-overran fallback."""
+
+import time
+
+import pytest
+from app.config import settings
+from app.retrieval import recall_stages
+from app.retrieval.recall_stages import (
+    check_cancelled,
+    recall_stats,
+    reset_recall_stats,
+    run_stages,
+)
+
+
+def _sleeper(seconds: float, value: str):
+    """A stage that takes `seconds` and returns `value`."""
+
+    def stage() -> str:
+        time.sleep(seconds)
+        return value
+
+    return stage
+
+
+@pytest.fixture
+def stages_config(monkeypatch):
+    """Parallel stages on a fresh pool of `workers`, with `timeouts_ms`."""
+
+    def configure(timeouts_ms: dict, workers: int = 4) -> None:
+        monkeypatch.setattr(settings, "recall_parallel", True)
+        monkeypatch.setattr(settings, "recall_workers", workers)
+        monkeypatch.setattr(settings, "recall_timeouts_ms", timeouts_ms)
+        monkeypatch.setattr(recall_stages, "_pool", None)
+        reset_recall_stats()
+
+    yield configure
+    reset_recall_stats()
+
+
+def test_slow_stage_is_dropped(stages_config) -> None:
+    """A stage past its timeout is dropped; the others are kept."""
+    stages_config({"fast": 1000.0, "slow": 50.0})
+    results = run_stages(
+        {"fast": _sleeper(0.01, "fast"), "slow": _sleeper(0.5, "slow")}
+    )
+    assert results == {"fast": "fast", "slow": None}
+    stats = {s.stage: s.timeouts for s in recall_stats().stages}
+    assert stats == {"fast": 0, "slow": 1}
+
+
+def test_deadline_counts_from_stage_start(stages_config) -> None:
+    """Time queued behind another stage does not count against a stage."""
+    # One worker: "second" starts only once "first" is done
+    stages_config({"first": 0.0, "second": 150.0}, workers=1)
+    results = run_stages(
+        {"first": _sleeper(0.2, "first"), "second": _sleeper(0.1, "second")}
+    )
+    assert results == {"first": "first", "second": "second"}
+
+
+def test_batch_scales_timeouts(stages_config) -> None:
+    """A pass over n queries gets n times each stage's budget."""
+    stages_config({"vector": 50.0, "bm25": 1000.0})
+    stages = {"vector": _sleeper(0.15, "vector"), "bm25": _sleeper(0.0, "bm25")}
+    assert run_stages(stages)["vector"] is None
+    assert run_stages(stages, batch=8)["vector"] == "vector"
+
+
+def test_all_stages_overran_are_waited_for(stages_config) -> None:
+    """If every stage overruns, the pass waits rather than recall nothing."""
+    stages_config({"vector": 20.0, "bm25": 20.0})
+    results = run_stages(
+        {"vector": _sleeper(0.1, "vector"), "bm25": _sleeper(0.1, "bm25")}
+    )
+    assert results == {"vector": "vector", "bm25": "bm25"}
+    stats = {s.stage: s.timeouts for s in recall_stats().stages}
+    assert stats == {"vector": 1, "bm25": 1}
+
+
+def test_dropped_stage_stops_between_queries(stages_config) -> None:
+    """A dropped stage stops at its next check instead of holding a worker."""
+    stages_config({"fast": 1000.0, "slow": 50.0})
+    served = []
+
+    def slow() -> list:
+        # 20 queries of 20 ms each, checking between queries
+        for query in range(20):
+            check_cancelled()
+            time.sleep(0.02)
+            served.append(query)
+        return served
+
+    results = run_stages({"fast": _sleeper(0.01, "fast"), "slow": slow})
+    assert results == {"fast": "fast", "slow": None}
+
+    # Left alone it would serve every query within 0.4 s
+    time.sleep(0.5)
+    assert 0 < len(served) < 20
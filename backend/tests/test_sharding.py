@@ -0,0 +1,110 @@
+"""Shard coordinator: dead shards are dropped; one process owns the shards."""
+
+import fcntl
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pipe
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from app.retrieval import sharding
+from app.retrieval.sharding import ShardCoordinator, ShardError, _Shard
+
+# Stand-in for a shard process that has not exited
+_RUNNING = SimpleNamespace(is_alive=lambda: True)
+
+
+def _dead_shard(shard_id: int) -> _Shard:
+    """A shard whose process end of the pipe is gone."""
+    parent, child = Pipe()
+    child.close()
+    return _Shard(shard_id, _RUNNING, parent)
+
+
+def _live_shard(shard_id: int, reply) -> _Shard:
+    """A shard answering every request with `reply` from a thread."""
+    parent, child = Pipe()
+
+    def serve() -> None:
+        try:
+            while True:
+                child.recv()
+                child.send(("ok", reply))
+        except EOFError:
+            pass
+
+    threading.Thread(target=serve, daemon=True).start()
+    return _Shard(shard_id, _RUNNING, parent)
+
+
+def _coordinator(shards) -> ShardCoordinator:
+    """A coordinator over in-process shard handles."""
+    coordinator = ShardCoordinator(len(shards), Path("/nonexistent"))
+    coordinator._shards = shards
+    coordinator._pool = ThreadPoolExecutor(max_workers=len(shards))
+    return coordinator
+
+
+def test_broken_pipe_marks_shard_down() -> None:
+    """A broken pipe raises ShardError and later calls fail fast."""
+    shard = _dead_shard(0)
+    with pytest.raises(ShardError):
+        shard.call("ping")
+    assert not shard.alive
+    with pytest.raises(ShardError, match="down"):
+        shard.call("ping")
+
+
+def test_recall_skips_dead_shards(monkeypatch) -> None:
+    """Recall answers from the live shards and fails only if none is left."""
+    monkeypatch.setattr(sharding, "embed_texts", lambda texts: [[0.0]] * len(texts))
+
+    coordinator = _coordinator([_dead_shard(0), _live_shard(1, ([[]], 1.0))])
+    assert coordinator.recall_batch(["query"], top_k=5) == [[]]
+
+    coordinator = _coordinator([_dead_shard(0), _dead_shard(1)])
+    with pytest.raises(ShardError, match="No shard"):
+        coordinator.recall_batch(["query"], top_k=5)
+
+
+def test_stats_report_dead_shards() -> None:
+    """Stats still answer, with the dead shard down and empty."""
+    coordinator = _coordinator([_dead_shard(0), _live_shard(1, (2, 7))])
+    stats = coordinator.stats()
+    assert [(s.alive, s.documents, s.chunks) for s in stats] == [
+        (False, 0, 0),
+        (True, 2, 7),
+    ]
+
+
+def test_second_process_cannot_start_shards(tmp_path) -> None:
+    """Shards already owned by another process fail startup, not respawn."""
+    with open(tmp_path / "coordinator.lock", "a") as held:
+        fcntl.flock(held, fcntl.LOCK_EX)
+        # flock locks are per open file, so this stands in for another worker
+        coordinator = ShardCoordinator(2, tmp_path)
+        with pytest.raises(ShardError, match="single uvicorn worker"):
+            coordinator.start()
+    assert not coordinator.enabled
+
+
+def test_reads_do_not_wait_for_writes() -> None:
+    """Recall goes over the read pipe while a write holds the other one."""
+    stuck, unanswered = Pipe()  # a write that is never answered
+    reads = _live_shard(0, ([[]], 1.0))
+    shard = _Shard(0, _RUNNING, stuck, reads.conn)
+
+    def write() -> None:
+        with pytest.raises(ShardError):
+            shard.call("write", [])
+
+    writer = threading.Thread(target=write, daemon=True)
+    writer.start()
+    writer.join(timeout=0.1)
+    assert writer.is_alive()
+    assert shard.call("recall", ["query"], 5, None, [[0.0]]) == ([[]], 1.0)
+
+    unanswered.close()
+    writer.join(timeout=5)
+    assert not writer.is_alive()